@@ -42,6 +42,9 @@ install_requires = [
     "networkx"
 ]
 tests_require = []
+extras_require = {
+    "msgpack": ["msgpack"],
+}
 
 # compile description
 underline = "=" * (len(package_name) + len(short_description) + 2)
@@ -65,6 +68,7 @@ setup(
     url=library_webpage,
     tests_require=tests_require,
     install_requires=install_requires,
+    extras_require=extras_require,
     package_dir={"": "src"},
     packages=find_packages("./src"),
     long_description=description,
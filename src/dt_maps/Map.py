@@ -1,20 +1,28 @@
+import asyncio
 import os
-import subprocess
 import tempfile
-from typing import Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Optional, Iterator, Tuple, Dict, Union, List
 
-import yaml
 import glob
 import logging
 
 import networkx as nx
+import numpy as np
 
-from pathlib import Path
-
+from .cache import LayerCache, default_cache_dir
+from .codecs import get_codec, DEFAULT_LAYER_EXTENSION
+from .context import make_context_archive
 from .exceptions import InvalidMapLayer
-from .graph.tile_maps import get_tile_map_graph
-from .types import MapAsset, MapLayer
-from .types.map import MapLayerNamespace
+from .graph.tile_maps import populate_tile_map_graph
+from .graph.utils import GraphBuilder, densify_graph, stitch_graph
+from .snapshots import export_frames_snapshot, load_frames_snapshot
+from .transforms import TransformEngine
+from .types import MapAsset, MapAssetCache, MapLayer
+from .types.map import MapLayerNamespace, DEFAULT_LAYER_VERSION
+from .utils.files import atomic_open
+from .utils.tiles import TileLookup, tiles_at, tile_to_world
 
 from .types.tiles import Tile
 from .types.frames import Frame
@@ -27,6 +35,16 @@ from .types.ground_tags import GroundTag
 
 logging.basicConfig()
 
+# file in the map directory listing the layers not stored in the default format
+LAYER_FORMATS_FILE = "layer_formats"
+
+# files in the map directory that are never treated as layers
+NON_LAYER_FILES = {
+    "main",
+    "renderer_authentication",
+    LAYER_FORMATS_FILE,
+}
+
 REGISTER = {
     "frames": Frame,
     "tile_maps": TileMap,
@@ -40,6 +58,28 @@ REGISTER = {
 }
 
 
+def _read_layer_file(layer_fpath: str, cache_dir: Optional[str] = None) -> dict:
+    # NOTE: this needs to be a module-level function so that it can be sent to worker processes
+    if cache_dir is not None:
+        return LayerCache(cache_dir).load(layer_fpath)
+    codec = get_codec(os.path.splitext(layer_fpath)[1])
+    with open(layer_fpath, "rb") as fin:
+        return codec.load(fin)
+
+
+def _layer_formats_fpath(map_dir: str) -> str:
+    return os.path.join(map_dir, f"{LAYER_FORMATS_FILE}{DEFAULT_LAYER_EXTENSION}")
+
+
+def _read_layer_formats(map_dir: str) -> Dict[str, str]:
+    fpath = _layer_formats_fpath(map_dir)
+    if not os.path.isfile(fpath):
+        return {}
+    with open(fpath, "rb") as fin:
+        content = get_codec(DEFAULT_LAYER_EXTENSION).load(fin) or {}
+    return dict(content.get(LAYER_FORMATS_FILE, None) or {})
+
+
 class Map:
     """
     Provides an interface to a Duckietown Map.
@@ -60,6 +100,10 @@ class Map:
         print(map.layers.frames)
         print(map.layers.tile_maps)
 
+    Layer files can be stored in any format for which a codec is registered in
+    :py:mod:`dt_maps.codecs` (e.g., ``frames.json`` next to ``tiles.yaml``), see
+    :py:meth:`set_layer_format`. Layers not stored in YAML are listed in the file
+    ``layer_formats.yaml``, other files in the map directory are never loaded as layers.
 
     Args:
         name (:obj:`str`): name of the new map
@@ -70,9 +114,18 @@ class Map:
         self._name: str = name
         self._path = path
         self._assets_dir = os.path.join(self._path, "assets")
+        self._assets: MapAssetCache = MapAssetCache(self._assets_dir)
         self._logger = logging.getLogger(f"Map[{name}]")
         self._logger.setLevel(loglevel)
         self._layers: MapLayerNamespace = MapLayerNamespace()
+        # layer name -> path to the file the layer is stored in
+        self._layer_files: Dict[str, str] = {}
+        # layer name -> file extension to use the next time the layer is saved
+        self._layer_formats: Dict[str, str] = {}
+        # directory of the compiled layer cache (if enabled)
+        self._cache_dir: Optional[str] = None
+        # world poses of the frames
+        self._transforms: TransformEngine = TransformEngine(self)
 
     @property
     def name(self) -> str:
@@ -95,19 +148,78 @@ class Map:
         """
         return self._assets_dir
 
+    @property
+    def assets(self) -> MapAssetCache:
+        """
+        Cache serving the map's assets, use it to configure the memory budget or to
+        prefetch assets.
+        """
+        return self._assets
+
+    @property
+    def transforms(self) -> TransformEngine:
+        """
+        Engine resolving the poses of the frames in the world frame, e.g.,
+
+        .. code-block:: python
+
+            map.transforms.world("map_0/tile_0_0")
+            map.transforms.transform("map_0/vehicle_0", "map_0/watchtower_0")
+        """
+        return self._transforms
+
     def graph(self, subdivision_steps: int = 0) -> nx.DiGraph:
-        G = nx.DiGraph()
+        g = GraphBuilder()
+        tile_map_nodes = []
         for tile_map in self.layers.tile_maps.values():
-            tile_map_G = get_tile_map_graph(self, tile_map, subdivision_steps=subdivision_steps)
-            G = nx.compose(G, tile_map_G)
+            start = len(g.nodes)
+            populate_tile_map_graph(g, self, tile_map)
+            tile_map_nodes.append(dict.fromkeys(node for node, _ in g.nodes[start:]))
+        G = g.build()
+        # tile maps have their own frames, their lanes are stitched separately
+        for nodes in tile_map_nodes:
+            stitch_graph(G, nodes=nodes)
+        densify_graph(G, subdivision_steps)
         return G
 
+    def tiles_at(self, points: np.ndarray, tile_map: Optional[str] = None) -> TileLookup:
+        """
+        Finds the tiles containing the given world points, see
+        :py:func:`dt_maps.utils.tiles.tiles_at`.
+
+        Args:
+            points (:obj:`numpy.ndarray`):  Nx2 array of world points ``(x, y)``
+            tile_map (:obj:`str`):          key of the tile map to look into
+
+        Return:
+            :obj:`dt_maps.utils.tiles.TileLookup`   keys, ``(i, j)`` coordinates and
+                                                    tile-local coordinates of the points
+        """
+        return tiles_at(self, points, tile_map)
+
+    def tile_to_world(self, ij: np.ndarray, tile_map: Optional[str] = None,
+                      local: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        World points at the given tile coordinates, inverse of :py:meth:`tiles_at`.
+
+        Args:
+            ij (:obj:`numpy.ndarray`):      Nx2 array of tile coordinates ``(i, j)``
+            tile_map (:obj:`str`):          key of the tile map, optional if there is only one
+            local (:obj:`numpy.ndarray`):   Nx2 array of tile-local coordinates, the centers
+                                            of the tiles are used if omitted
+
+        Return:
+            :obj:`numpy.ndarray`            Nx2 array of world points
+        """
+        return tile_to_world(self, ij, tile_map, local)
+
     def get_layer(self, name: str) -> MapLayer:
         return self._layers.get(name)
 
     def asset(self, key: str) -> MapAsset:
         """
-        Creates a MapAsset object representing the asset with ``key``.
+        Returns the MapAsset object representing the asset with ``key``.
+        Assets are served through the map's asset cache, see :py:attr:`assets`.
 
         Args:
             key (:obj:`str`)    key of the asset
@@ -115,84 +227,369 @@ class Map:
         Return:
             :obj:`dt_maps.MapAsset`     asset object
         """
-        asset_fpath = os.path.join(self._assets_dir, key)
-        return MapAsset(asset_fpath)
+        return self._assets.asset(key)
+
+    def layer_format(self, name: str) -> str:
+        """
+        File extension (e.g., ``.yaml``) used to store the layer ``name`` on disk.
+
+        Args:
+            name (:obj:`str`):  name of the layer
+
+        Returns:
+            :obj:`str`:         file extension, including the leading dot
+        """
+        if name in self._layer_formats:
+            return self._layer_formats[name]
+        if name in self._layer_files:
+            return os.path.splitext(self._layer_files[name])[1]
+        return DEFAULT_LAYER_EXTENSION
+
+    def set_layer_format(self, name: str, extension: str):
+        """
+        Sets the file format used to store the layer ``name`` the next time the map is saved.
+        The file in the old format is removed when the layer is saved in the new one, and the
+        format is recorded in the file ``layer_formats.yaml`` of the map.
+
+        Args:
+            name (:obj:`str`):      name of the layer
+            extension (:obj:`str`): file extension of a registered codec (e.g., ``.json``)
+        """
+        # make sure we know how to write this format
+        get_codec(extension)
+        self._layer_formats[name] = extension
+
+    def export_frames_snapshot(self, fpath: str):
+        """
+        Writes the poses of all frames to a columnar ``.npy`` snapshot that can later be
+        opened with :py:meth:`load_frames_snapshot`.
+
+        Args:
+            fpath (:obj:`str`):     path to the ``.npy`` file to create
+        """
+        export_frames_snapshot(self.layers.frames, fpath)
+
+    def load_frames_snapshot(self, fpath: str, mmap_mode: Optional[str] = "c"):
+        """
+        Replaces the ``frames`` layer with one backed by a (memory-mapped) snapshot created
+        with :py:meth:`export_frames_snapshot`. Poses are then read straight from the mapped
+        arrays. With the default copy-on-write mode, processes mapping the same snapshot share
+        the same physical memory until they modify a pose.
 
-    def to_disk(self):
+        Args:
+            fpath (:obj:`str`):         path to the ``.npy`` snapshot
+            mmap_mode (:obj:`str`):     memory-mapping mode as in :py:func:`numpy.load`
+        """
+        version = self.layers.frames.version if self.layers.has("frames") else DEFAULT_LAYER_VERSION
+        layer = load_frames_snapshot(self, fpath, mmap_mode=mmap_mode, version=version)
+        layer.register_entity_helper(REGISTER["frames"])
+        self.layers.set("frames", layer)
+
+    @property
+    def dirty_layers(self) -> List[str]:
+        """
+        Names of the layers modified since they were last loaded from or saved to disk.
+        """
+        return [name for name in self.layers.loaded if self.layers.get(name).is_dirty]
+
+    def to_disk(self, force: bool = False, workers: Optional[int] = None, canonical: bool = False):
         """
         Save map to disk.
+        Each layer is written in the format it was loaded from, see :py:meth:`layer_format`.
+        Only layers that were modified (see :py:attr:`dirty_layers`), changed format or are
+        missing on disk are written, unless ``force`` is set. Layers that were never
+        materialized (see lazy loading in :py:meth:`from_disk`) are never written.
+
+        Layer files are written to temporary files first and then atomically renamed, so a
+        crash never leaves a truncated layer on disk. In ``canonical`` mode, keys are sorted and
+        the output format is fixed, so identical maps produce byte-identical files.
+
+        Args:
+            force (:obj:`bool`):        write all the loaded layers
+            workers (:obj:`int`):       number of threads used to serialize the layers
+            canonical (:obj:`bool`):    write layers in canonical form
         """
+        # find layers to write
+        jobs: List[Tuple[str, MapLayer, str]] = []
+        for name in self.layers.loaded:
+            layer = self.layers.get(name)
+            fpath = os.path.join(self._path, f"{name}{self.layer_format(name)}")
+            if force or layer.is_dirty or self._layer_file_moved(name, fpath) or \
+                    not os.path.isfile(fpath):
+                jobs.append((name, layer, fpath))
         # dump layers
-        for name, layer in self.layers.items():
-            fpath = os.path.join(self._path, f"{name}.yaml")
-            with open(fpath, "wt") as fout:
-                yaml.safe_dump({
-                    "version": layer.version,
-                    name: layer.as_raw_dict()
-                }, fout)
-
-    def make_context(self, fpath: Optional[str] = None) -> str:
+        if workers is None or len(jobs) <= 1:
+            for job in jobs:
+                self._write_layer(*job, canonical=canonical)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                futures = [pool.submit(self._write_layer, *job, canonical=canonical) for job in jobs]
+                for future in futures:
+                    future.result()
+        # update bookkeeping
+        moved: List[str] = []
+        for name, layer, fpath in jobs:
+            layer.mark_clean()
+            if self._layer_file_moved(name, fpath):
+                moved.append(self._layer_files[name])
+            self._layer_files[name] = fpath
+        # the new files are found only once their format is recorded
+        self._write_layer_formats()
+        # remove the copies of the layers stored in a different format (if any)
+        for old_fpath in moved:
+            if os.path.isfile(old_fpath):
+                os.remove(old_fpath)
+
+    def _write_layer_formats(self):
+        formats: Dict[str, str] = {}
+        for name, fpath in sorted(self._layer_files.items()):
+            extension = os.path.splitext(fpath)[1]
+            if extension != DEFAULT_LAYER_EXTENSION:
+                formats[name] = extension
+        if formats == _read_layer_formats(self._path):
+            return
+        fpath = _layer_formats_fpath(self._path)
+        if not formats:
+            os.remove(fpath)
+            return
+        content = {"version": DEFAULT_LAYER_VERSION, LAYER_FORMATS_FILE: formats}
+        with atomic_open(fpath, "wb") as fout:
+            get_codec(DEFAULT_LAYER_EXTENSION).dump(content, fout, canonical=True)
+
+    def _layer_file_moved(self, name: str, fpath: str) -> bool:
+        old_fpath = self._layer_files.get(name, None)
+        return old_fpath is not None and os.path.abspath(old_fpath) != os.path.abspath(fpath)
+
+    def _write_layer(self, name: str, layer: MapLayer, fpath: str, canonical: bool = False):
+        codec = get_codec(os.path.splitext(fpath)[1])
+        with atomic_open(fpath, "wb") as fout:
+            codec.dump({
+                "version": layer.version,
+                name: layer.as_raw_dict()
+            }, fout, canonical=canonical)
+        self._logger.debug(f"Layer '{name}' written to '{fpath}'")
+
+    def make_context(self, fpath: Optional[str] = None, previous: Optional[str] = None,
+                     compression: Optional[Dict[str, int]] = None,
+                     compresslevel: Optional[int] = None,
+                     return_hash: bool = False) -> Union[str, Tuple[str, str]]:
         """
         Compresses all map layers and assets into a ZIP file.
 
+        Already-compressed assets (e.g., images) are stored as they are, everything else is
+        deflated, see :py:func:`dt_maps.context.make_context_archive`. Members of a previous
+        archive whose content did not change are reused without compressing them again.
+        If ``fpath`` points to an existing archive, that archive is used as ``previous``.
+
         Args:
-            fpath (float):  Path to the ZIP file to create. Defaults to a temporary file.
+            fpath (str):            Path to the ZIP file to create. Defaults to a temporary file.
+            previous (str):         Path to a context previously created for this map.
+            compression (dict):     Compression method (e.g., ``zipfile.ZIP_STORED``) by file
+                                    extension (e.g., ``.yaml``).
+            compresslevel (int):    Compression level as in :py:class:`zipfile.ZipFile`.
+            return_hash (bool):     Also return the content hash of the archive.
 
         Returns:
-            str: Path to the ZIP file containing the context.
+            str: Path to the ZIP file containing the context. When ``return_hash`` is set, a
+            tuple with the path and the SHA-256 of the content of the archive, which only
+            depends on the names and contents of the files in the context.
 
         """
         context_fpath: str = fpath
         if context_fpath is None:
             context_fpath = tempfile.NamedTemporaryFile(suffix='.zip').name
-        subprocess.check_output([
-            "zip", "-b", "/tmp", "-x", "renderer_authentication.*", "-r", context_fpath, "."
-        ], cwd=self._path)
-        return context_fpath
+        if previous is None and os.path.isfile(context_fpath):
+            previous = context_fpath
+        content_hash = make_context_archive(
+            self._path, context_fpath, previous=previous, compression=compression,
+            compresslevel=compresslevel
+        )
+        return (context_fpath, content_hash) if return_hash else context_fpath
+
+    def _make_layer(self, layer_name: str, layer_fpath: str, layer_content: dict) -> MapLayer:
+        if "version" not in layer_content:
+            raise InvalidMapLayer(layer_name, f"File '{layer_fpath}' does not have the "
+                                              f"field 'version'")
+        layer_version: str = layer_content["version"]
+        if layer_name not in layer_content:
+            raise InvalidMapLayer(layer_name, f"File '{layer_fpath}' does not have the "
+                                              f"root key '{layer_name}'")
+        layer_objects = layer_content[layer_name]
+        # turn raw dict into a MapLayer object
+        layer = MapLayer(self, layer_name, layer_version, **layer_objects)
+        # register type converter for known layers
+        if layer_name in REGISTER:
+            layer.register_entity_helper(REGISTER[layer_name])
+        # the layer is in sync with its file
+        layer.mark_clean()
+        # ---
+        return layer
+
+    def _load_layer(self, layer_name: str, layer_fpath: str) -> MapLayer:
+        layer_content = _read_layer_file(layer_fpath, self._cache_dir)
+        layer = self._make_layer(layer_name, layer_fpath, layer_content)
+        self._logger.debug(f"Layer '{layer_name}' loaded from '{layer_fpath}'")
+        return layer
+
+    @staticmethod
+    def _find_layers(map_dir: str) -> Iterator[Tuple[str, str]]:
+        found: Dict[str, str] = {}
+        # layers are stored in the default format, unless their format was recorded
+        layer_pattern = os.path.join(map_dir, f"*{DEFAULT_LAYER_EXTENSION}")
+        layer_fpaths = sorted(glob.glob(layer_pattern))
+        for layer_name, extension in _read_layer_formats(map_dir).items():
+            layer_fpath = os.path.join(map_dir, f"{layer_name}{extension}")
+            if not os.path.isfile(layer_fpath):
+                raise InvalidMapLayer(layer_name, f"File '{layer_fpath}' listed in "
+                                                  f"'{_layer_formats_fpath(map_dir)}' not found")
+            layer_fpaths.append(layer_fpath)
+        for layer_fpath in layer_fpaths:
+            layer_name = os.path.splitext(os.path.basename(layer_fpath))[0]
+            if layer_name in NON_LAYER_FILES:
+                continue
+            if layer_name in found:
+                raise InvalidMapLayer(layer_name, "Multiple files found for the same layer",
+                                      files=[found[layer_name], layer_fpath])
+            found[layer_name] = layer_fpath
+        yield from found.items()
 
     @classmethod
-    def from_disk(cls, name: str, map_dir: str) -> 'Map':
+    def _prepare_load(cls, name: str, map_dir: str,
+                      cache: Union[bool, str]) -> Tuple['Map', List[Tuple[str, str]]]:
+        # make sure the map exists on disk
+        if not os.path.isdir(map_dir):
+            raise NotADirectoryError(f"The path '{map_dir}' is not a directory.")
+        # build empty map
+        m = Map(name, map_dir)
+        if cache:
+            m._cache_dir = default_cache_dir() if cache is True else cache
+        # find layers
+        layers = list(cls._find_layers(map_dir))
+        m._layer_files.update(layers)
+        return m, layers
+
+    @classmethod
+    def from_disk(cls, name: str, map_dir: str, lazy: bool = False, workers: Optional[int] = None,
+                  processes: bool = False, cache: Union[bool, str] = False) -> 'Map':
         """
         Loads a map from disk.
 
+        When ``lazy`` is set, layer files are only located at load time and each one is
+        parsed the first time the layer is accessed (e.g., ``map.layers.tiles``).
+        Use :py:attr:`dt_maps.types.map.MapLayerNamespace.loaded` to know which layers
+        were actually materialized.
+
+        When ``workers`` is given, layer files are parsed in parallel using a pool of
+        ``workers`` threads (or processes, if ``processes`` is set). Layer objects are
+        then built in the calling thread. Parallel parsing does not apply to lazy loads.
+
+        When ``cache`` is set, decoded layer files are stored in a compiled cache and reused
+        by later loads for as long as the layer files do not change. Use ``cache=True`` to keep
+        the cache in the user cache directory (see :py:func:`dt_maps.cache.default_cache_dir`),
+        or pass the path to a cache directory. Cache entries are trusted, never use a cache
+        directory that others can write to (e.g., one shipped with a map).
+
         Args:
             name (:obj:`str`):      name of the loaded map
             map_dir (:obj:`str`):   path to the directory containing the map to load
+            lazy (:obj:`bool`):     defer parsing of each layer until its first use
+            workers (:obj:`int`):   number of workers used to parse the layer files
+            processes (:obj:`bool`): use a pool of processes instead of threads
+            cache (:obj:`bool,str`): enable the compiled layer cache, optionally at a given path
 
         Returns:
             :obj:`dt_maps.Map`:   the loaded map
         """
-        # make sure the map exists on disk
-        if not os.path.isdir(map_dir):
-            raise NotADirectoryError(f"The path '{map_dir}' is not a directory.")
-        # build empty map
-        m = Map(name, map_dir)
-        # find layers
-        layer_pattern = os.path.join(map_dir, "*.yaml")
-        layer_fpaths = glob.glob(layer_pattern)
-        # load layers
-        for layer_fpath in layer_fpaths:
-            layer_name = str(Path(layer_fpath).stem)
-            if layer_name == "main":
-                continue
-            with open(layer_fpath, "rt") as fin:
-                layer_content = yaml.safe_load(fin)
-                if "version" not in layer_content:
-                    raise InvalidMapLayer(layer_name, f"File '{layer_fpath}' does not have the "
-                                                      f"field 'version'")
-                layer_version: str = layer_content["version"]
-                if layer_name not in layer_content:
-                    raise InvalidMapLayer(layer_name, f"File '{layer_fpath}' does not have the "
-                                                      f"root key '{layer}'")
-                layer_objects = layer_content[layer_name]
-                # turn raw dict into a MapLayer object
-                layer = MapLayer(m, layer_name, layer_version, **layer_objects)
-                # populate map
+        if workers is not None and workers < 1:
+            raise ValueError(f"Argument 'workers' must be a positive integer, got {workers}.")
+        # build empty map and find layers
+        m, layers = cls._prepare_load(name, map_dir, cache)
+        # lazy load: only register the layers
+        if lazy:
+            for layer_name, layer_fpath in layers:
+                m.layers.defer(layer_name, partial(m._load_layer, layer_name, layer_fpath))
+            return m
+        # sequential load
+        if workers is None or len(layers) <= 1:
+            for layer_name, layer_fpath in layers:
+                m.layers.set(layer_name, m._load_layer(layer_name, layer_fpath))
+            return m
+        # parallel load: parse files in the pool, build layers here
+        pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_cls(max_workers=min(workers, len(layers))) as pool:
+            read = partial(_read_layer_file, cache_dir=m._cache_dir)
+            contents = pool.map(read, [fpath for _, fpath in layers])
+            for (layer_name, layer_fpath), layer_content in zip(layers, contents):
+                layer = m._make_layer(layer_name, layer_fpath, layer_content)
                 m.layers.set(layer_name, layer)
+                m._logger.debug(f"Layer '{layer_name}' loaded from '{layer_fpath}'")
+        # ---
+        return m
+
+    @classmethod
+    async def from_disk_async(cls, name: str, map_dir: str, lazy: bool = False,
+                              cache: Union[bool, str] = False,
+                              executor: Optional[Executor] = None) -> 'Map':
+        """
+        Awaitable version of :py:meth:`from_disk`.
+
+        Layer files are read, decoded and turned into layers (indices included) concurrently
+        in ``executor`` (defaults to the event loop's default executor), only attaching the
+        layers to the map happens on the event loop.
 
-        # register type converters for known layers
-        register = lambda l, t: m.layers.get(l).register_entity_helper(t) if m.layers.has(l) else 0
-        for layer_name in REGISTER:
-            register(layer_name, REGISTER[layer_name])        
+        With ``lazy`` set, layers are only registered here, each layer is then loaded
+        synchronously, in the thread that first accesses it. Load eagerly when the layers will
+        be used from within the event loop.
+
+        Args:
+            name (:obj:`str`):          name of the loaded map
+            map_dir (:obj:`str`):       path to the directory containing the map to load
+            lazy (:obj:`bool`):         defer parsing of each layer until its first use
+            cache (:obj:`bool,str`):    enable the compiled layer cache, optionally at a given path
+            executor (:obj:`Executor`): executor used for the file work
+
+        Returns:
+            :obj:`dt_maps.Map`:   the loaded map
+        """
+        loop = asyncio.get_running_loop()
+        m, layers = await loop.run_in_executor(executor, cls._prepare_load, name, map_dir, cache)
+        # lazy load: only register the layers
+        if lazy:
+            for layer_name, layer_fpath in layers:
+                m.layers.defer(layer_name, partial(m._load_layer, layer_name, layer_fpath))
+            return m
+        # read and build layers concurrently, only attach them here
+        loaded = await asyncio.gather(*[
+            loop.run_in_executor(executor, m._load_layer, layer_name, layer_fpath)
+            for layer_name, layer_fpath in layers
+        ])
+        for (layer_name, _), layer in zip(layers, loaded):
+            m.layers.set(layer_name, layer)
         # ---
         return m
+
+    async def to_disk_async(self, force: bool = False, workers: Optional[int] = None,
+                            canonical: bool = False, executor: Optional[Executor] = None):
+        """
+        Awaitable version of :py:meth:`to_disk`.
+        The layers are serialized and written in ``executor`` (defaults to the event loop's
+        default executor).
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            executor, partial(self.to_disk, force=force, workers=workers, canonical=canonical)
+        )
+
+    async def make_context_async(self, fpath: Optional[str] = None, previous: Optional[str] = None,
+                                 compression: Optional[Dict[str, int]] = None,
+                                 compresslevel: Optional[int] = None, return_hash: bool = False,
+                                 executor: Optional[Executor] = None) -> Union[str, Tuple[str, str]]:
+        """
+        Awaitable version of :py:meth:`make_context`.
+        The archive is built in ``executor`` (defaults to the event loop's default executor).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(
+            self.make_context, fpath, previous=previous, compression=compression,
+            compresslevel=compresslevel, return_hash=return_hash
+        ))
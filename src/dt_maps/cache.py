@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from typing import Any, Optional
+
+from .codecs import get_codec
+from .constants import NOTSET
+from .utils.files import atomic_open
+
+CACHE_FORMAT_VERSION = 2
+
+# maximum size of the header of a cache entry
+_MAX_HEADER_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> str:
+    """
+    Default directory of the compiled layer cache, ``dt-maps`` inside the user cache directory
+    (``$XDG_CACHE_HOME``, or ``~/.cache``).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME", None) or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "dt-maps")
+
+
+class LayerCache:
+    """
+    Compiled cache of decoded layer files.
+
+    Each layer file gets its own cache entry, keyed by the path, size, modification time and
+    content hash of the file. An entry whose path, size and modification time match the layer
+    file is used without reading the file, otherwise the file is hashed and, if the content
+    changed, decoded with its codec and the entry is rewritten.
+
+    Entries start with a plain JSON header holding the key, the decoded content (a pickle)
+    is only loaded after the header matches the layer file. Entries can still run code when
+    loaded, so the cache directory must only be writable by trusted users, which is the case
+    for the default one (see :py:func:`default_cache_dir`).
+
+    Args:
+        cache_dir (:obj:`str`):     directory where the cache entries are stored
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> str:
+        """
+        Directory containing the cache entries.
+        """
+        return self._cache_dir
+
+    def entry_path(self, layer_fpath: str) -> str:
+        """
+        Path to the cache entry for the given layer file.
+
+        Args:
+            layer_fpath (:obj:`str`):   path to the layer file
+
+        Returns:
+            :obj:`str`:                 path to the cache entry
+        """
+        layer_fpath = os.path.abspath(layer_fpath)
+        path_hash = hashlib.sha1(layer_fpath.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self._cache_dir, f"{path_hash}-{os.path.basename(layer_fpath)}.cache")
+
+    def load(self, layer_fpath: str) -> Any:
+        """
+        Loads the content of a layer file, from the cache if the entry is up-to-date.
+
+        Args:
+            layer_fpath (:obj:`str`):   path to the layer file
+
+        Returns:
+            :obj:`dict`:                decoded content of the layer file
+        """
+        layer_fpath = os.path.abspath(layer_fpath)
+        stat = os.stat(layer_fpath)
+        key = {
+            "format": CACHE_FORMAT_VERSION,
+            "path": layer_fpath,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+        entry_key = self._read_key(layer_fpath)
+        if entry_key is not None and all(entry_key.get(k, None) == v for k, v in key.items()):
+            # fast path, the file was not touched since the entry was written
+            content = self._read_content(layer_fpath, entry_key)
+            if content is not NOTSET:
+                return content
+            entry_key = None
+        with open(layer_fpath, "rb") as fin:
+            data = fin.read()
+        key["hash"] = hashlib.sha1(data).hexdigest()
+        if entry_key is not None and self._same_content(entry_key, key):
+            # the file was touched but not changed, refresh the key only
+            content = self._read_content(layer_fpath, entry_key)
+            if content is not NOTSET:
+                self._write_entry(layer_fpath, key, content)
+                return content
+        # miss or stale entry
+        logger.debug(f"Cache miss for layer file '{layer_fpath}'")
+        content = get_codec(os.path.splitext(layer_fpath)[1]).loads(data)
+        self._write_entry(layer_fpath, key, content)
+        return content
+
+    def invalidate(self, layer_fpath: str):
+        """
+        Removes the cache entry for the given layer file (if any).
+
+        Args:
+            layer_fpath (:obj:`str`):   path to the layer file
+        """
+        try:
+            os.remove(self.entry_path(layer_fpath))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _same_content(key1: dict, key2: dict) -> bool:
+        return all(key1.get(k, None) == key2[k] for k in ["format", "path", "size", "hash"])
+
+    def _read_key(self, layer_fpath: str) -> Optional[dict]:
+        # reads the header of the entry only
+        try:
+            with open(self.entry_path(layer_fpath), "rb") as fin:
+                header = fin.readline(_MAX_HEADER_SIZE)
+            key = json.loads(header.decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # corrupted entries are simply replaced
+            logger.warning(f"Ignoring invalid cache entry for layer file '{layer_fpath}': {e}")
+            return None
+        if not isinstance(key, dict) or key.get("path", None) != layer_fpath:
+            return None
+        return key
+
+    def _read_content(self, layer_fpath: str, key: dict) -> Any:
+        # loads the content of an entry whose header was already checked against the layer
+        # file, returns NOTSET if the entry changed in the meantime or cannot be loaded
+        try:
+            with open(self.entry_path(layer_fpath), "rb") as fin:
+                header = fin.readline(_MAX_HEADER_SIZE)
+                if json.loads(header.decode("utf-8")) != key:
+                    return NOTSET
+                return pickle.load(fin)
+        except Exception as e:
+            logger.warning(f"Ignoring invalid cache entry for layer file '{layer_fpath}': {e}")
+            return NOTSET
+
+    def _write_entry(self, layer_fpath: str, key: dict, content: Any):
+        os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+        # concurrent readers never see partial entries
+        with atomic_open(self.entry_path(layer_fpath), "wb") as fout:
+            fout.write(json.dumps(key, sort_keys=True).encode("utf-8") + b"\n")
+            pickle.dump(content, fout, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,197 @@
+import io
+import json
+from abc import abstractmethod
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import yaml
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# use the libyaml bindings when available, they are much faster than the pure-Python ones
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAMLDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+# canonical YAML output never wraps lines
+YAML_CANONICAL_WIDTH = 2 ** 16
+
+DEFAULT_LAYER_EXTENSION = ".yaml"
+
+# extensions handled by codecs that need optional dependencies, with the extra providing them
+OPTIONAL_EXTENSIONS = {
+    ".msgpack": "msgpack",
+}
+
+
+def canonicalize(content: Any) -> Any:
+    """
+    Returns a copy of ``content`` in which all the dictionaries have sorted keys.
+    """
+    if isinstance(content, dict):
+        return {k: canonicalize(content[k]) for k in sorted(content)}
+    if isinstance(content, (list, tuple)):
+        return [canonicalize(v) for v in content]
+    return content
+
+
+class LayerCodec:
+    """
+    Base class for codecs used to read and write map layer files.
+
+    A codec is associated with one or more file extensions (e.g., ``.yaml``) and converts
+    between the raw content of a layer file and its Python representation.
+    """
+
+    extensions: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """
+        Decodes the content of a layer file.
+
+        Args:
+            data (:obj:`bytes`):    raw content of the file
+
+        Returns:
+            :obj:`dict`:            decoded layer content
+        """
+
+    @abstractmethod
+    def dumps(self, content: Any) -> bytes:
+        """
+        Encodes the content of a layer file.
+
+        Args:
+            content (:obj:`dict`):  layer content to encode
+
+        Returns:
+            :obj:`bytes`:           raw content of the file
+        """
+
+    def load(self, fin: BinaryIO) -> Any:
+        return self.loads(fin.read())
+
+    def dump(self, content: Any, fout: BinaryIO, canonical: bool = False):
+        """
+        Encodes the content of a layer file and writes it to ``fout``.
+
+        In canonical mode, keys are sorted and the output format is fixed, so that identical
+        contents always produce byte-identical files.
+
+        Args:
+            content (:obj:`dict`):      layer content to encode
+            fout (:obj:`BinaryIO`):     binary stream to write to
+            canonical (:obj:`bool`):    produce canonical output
+        """
+        fout.write(self.dumps(canonicalize(content) if canonical else content))
+
+
+class YAMLCodec(LayerCodec):
+    extensions = (".yaml",)
+
+    def loads(self, data: bytes) -> Any:
+        return yaml.load(data, Loader=YAMLLoader)
+
+    def dumps(self, content: Any) -> bytes:
+        return yaml.dump(content, Dumper=YAMLDumper, encoding="utf-8")
+
+    def load(self, fin: BinaryIO) -> Any:
+        return yaml.load(fin, Loader=YAMLLoader)
+
+    def dump(self, content: Any, fout: BinaryIO, canonical: bool = False):
+        if not canonical:
+            yaml.dump(content, fout, Dumper=YAMLDumper, encoding="utf-8")
+            return
+        # the emitter streams to the file, no intermediate string is built
+        yaml.dump(content, fout, Dumper=YAMLDumper, encoding="utf-8", sort_keys=True,
+                  default_flow_style=False, allow_unicode=True, width=YAML_CANONICAL_WIDTH,
+                  indent=2, line_break="\n", explicit_start=False)
+
+
+class JSONCodec(LayerCodec):
+    extensions = (".json",)
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, content: Any) -> bytes:
+        return json.dumps(content, indent=2).encode("utf-8")
+
+    def dump(self, content: Any, fout: BinaryIO, canonical: bool = False):
+        if not canonical:
+            fout.write(self.dumps(content))
+            return
+        # json.dump streams chunks to the file, no intermediate string is built
+        writer = io.TextIOWrapper(fout, encoding="utf-8", newline="\n", write_through=True)
+        try:
+            json.dump(content, writer, indent=2, sort_keys=True, separators=(",", ": "),
+                      ensure_ascii=False)
+        finally:
+            writer.detach()
+
+
+class MsgPackCodec(LayerCodec):
+    """
+    Binary codec based on MessagePack, available only if the package ``msgpack`` is installed
+    (e.g., with ``pip install dt-maps[msgpack]``).
+    """
+
+    extensions = (".msgpack",)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+    def dumps(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+_CODECS: Dict[str, LayerCodec] = {}
+
+
+def register_codec(codec: LayerCodec):
+    """
+    Registers a codec for all the file extensions it declares.
+    Codecs registered later override earlier ones for the same extension.
+
+    Args:
+        codec (:obj:`LayerCodec`):  codec to register
+    """
+    for extension in codec.extensions:
+        _CODECS[extension.lower()] = codec
+
+
+def get_codec(extension: str) -> LayerCodec:
+    """
+    Returns the codec registered for the given file extension.
+
+    Args:
+        extension (:obj:`str`):     file extension, including the leading dot (e.g., ``.yaml``)
+
+    Returns:
+        :obj:`LayerCodec`:          codec registered for the extension
+    """
+    try:
+        return _CODECS[extension.lower()]
+    except KeyError:
+        if extension.lower() in OPTIONAL_EXTENSIONS:
+            extra = OPTIONAL_EXTENSIONS[extension.lower()]
+            raise ValueError(f"Layer files with extension '{extension}' require the optional "
+                             f"dependencies of dt-maps[{extra}], install them with "
+                             f"'pip install dt-maps[{extra}]'.")
+        raise ValueError(f"No codec registered for layer files with extension '{extension}'. "
+                         f"Known extensions are {supported_extensions()}.")
+
+
+def has_codec(extension: str) -> bool:
+    return extension.lower() in _CODECS
+
+
+def supported_extensions() -> List[str]:
+    return list(_CODECS.keys())
+
+
+register_codec(YAMLCodec())
+register_codec(JSONCodec())
+if msgpack is not None:
+    register_codec(MsgPackCodec())
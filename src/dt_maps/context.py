@@ -0,0 +1,201 @@
+import fnmatch
+import hashlib
+import logging
+import os
+import struct
+import zipfile
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .utils.files import atomic_open
+
+logger = logging.getLogger(__name__)
+
+# files and directories (matched against their basename) never added to a context
+DEFAULT_EXCLUDE = [
+    "renderer_authentication.*",
+    ".*.tmp",
+]
+
+# file types that are already compressed and are simply stored in the archive
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ktx2",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".npz",
+    ".mp3", ".mp4", ".ogg", ".webm",
+}
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def context_members(root: str, exclude: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Lists the files to include in a context, in a deterministic order.
+
+    Args:
+        root (:obj:`str`):      directory containing the map
+        exclude (:obj:`list`):  basename patterns of files and directories to skip
+
+    Returns:
+        :obj:`iterator`:        pairs ``(path on disk, name in the archive)``
+    """
+    exclude = DEFAULT_EXCLUDE if exclude is None else exclude
+    excluded = lambda name: any(fnmatch.fnmatch(name, pattern) for pattern in exclude)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not excluded(d))
+        for filename in sorted(filenames):
+            if excluded(filename):
+                continue
+            fpath = os.path.join(dirpath, filename)
+            yield fpath, os.path.relpath(fpath, root).replace(os.sep, "/")
+
+
+def _digest_file(fpath: str) -> Tuple[int, int, str]:
+    crc, size, sha = 0, 0, hashlib.sha256()
+    with open(fpath, "rb") as fin:
+        for chunk in iter(lambda: fin.read(_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            sha.update(chunk)
+    return crc, size, sha.hexdigest()
+
+
+def _archive_comment(compresslevel: Optional[int]) -> bytes:
+    # members of a previous archive are only reused if they were compressed the same way
+    return f"dt-maps context; compresslevel={compresslevel}".encode("ascii")
+
+
+def _can_copy_raw(zout: zipfile.ZipFile) -> bool:
+    # NOTE: copying members without decompressing them is not supported by the public API of
+    #       zipfile, it relies on the internals checked here (the same in CPython 3.7 to 3.13)
+    #       and members are compressed again whenever any of them is missing or different
+    return isinstance(getattr(zout, "start_dir", None), int) \
+        and isinstance(getattr(zout, "filelist", None), list) \
+        and isinstance(getattr(zout, "NameToInfo", None), dict) \
+        and hasattr(getattr(zout, "fp", None), "write") \
+        and getattr(zout, "_seekable", False) is True \
+        and getattr(zout, "_writing", True) is False \
+        and callable(getattr(zipfile.ZipInfo, "FileHeader", None))
+
+
+def _raw_member_offset(fin, info: zipfile.ZipInfo) -> int:
+    # skip the local file header, its length depends on the length of the name and extra fields
+    fin.seek(info.header_offset)
+    header = fin.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[0:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local file header for member '{info.filename}'")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    offset = info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+    # check the data is all there before anything is written to the new archive
+    if offset + info.compress_size > os.fstat(fin.fileno()).st_size:
+        raise zipfile.BadZipFile(f"Truncated data for member '{info.filename}'")
+    return offset
+
+
+def _copy_raw_member(fin, zout: zipfile.ZipFile, info: zipfile.ZipInfo):
+    offset = _raw_member_offset(fin, info)
+    # NOTE: this mirrors what zipfile does when a member is written, minus the compression
+    member = zipfile.ZipInfo(info.filename, info.date_time)
+    member.compress_type = info.compress_type
+    member.external_attr = info.external_attr
+    member.create_system = info.create_system
+    member.CRC = info.CRC
+    member.compress_size = info.compress_size
+    member.file_size = info.file_size
+    member.header_offset = zout.start_dir
+    zip64 = member.file_size > zipfile.ZIP64_LIMIT or member.compress_size > zipfile.ZIP64_LIMIT
+    # the header is built before anything is written, a failure leaves the archive untouched
+    header = member.FileHeader(zip64)
+    zout.fp.seek(zout.start_dir)
+    zout.fp.write(header)
+    # stream the compressed data
+    fin.seek(offset)
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fin.read(min(_CHUNK_SIZE, remaining))
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(member)
+    zout.NameToInfo[member.filename] = member
+
+
+def make_context_archive(root: str, fpath: str, previous: Optional[str] = None,
+                         compression: Optional[Dict[str, int]] = None,
+                         compresslevel: Optional[int] = None,
+                         exclude: Optional[List[str]] = None) -> str:
+    """
+    Compresses the content of ``root`` into the ZIP file ``fpath``.
+
+    Members are streamed from disk into the archive. Files whose extension is in
+    ``compression`` use the given compression method, already-compressed file types
+    (see :py:data:`STORED_EXTENSIONS`) are stored, everything else is deflated.
+    Members of the ``previous`` archive whose content did not change are copied as they are,
+    without compressing them again. This only happens when ``previous`` was created by this
+    function with the same ``compresslevel`` (recorded in the comment of the archive) and when
+    the running version of :py:mod:`zipfile` exposes the internals needed to write raw members,
+    otherwise every member is compressed from disk.
+
+    Args:
+        root (:obj:`str`):          directory to compress
+        fpath (:obj:`str`):         path to the ZIP file to create
+        previous (:obj:`str`):      path to an archive previously created from ``root``
+        compression (:obj:`dict`):  compression method (e.g., ``zipfile.ZIP_STORED``) by
+                                    file extension
+        compresslevel (:obj:`int`): compression level as in :py:class:`zipfile.ZipFile`
+        exclude (:obj:`list`):      basename patterns of files and directories to skip
+
+    Returns:
+        :obj:`str`:                 SHA-256 of the content of the archive, it only depends on
+                                    the names and contents of the members
+    """
+    compression = compression or {}
+    fpath = os.path.abspath(fpath)
+    members = [
+        (member_fpath, arcname) for member_fpath, arcname in context_members(root, exclude)
+        if os.path.abspath(member_fpath) != fpath
+    ]
+    # index the previous archive
+    reusable: Dict[str, zipfile.ZipInfo] = {}
+    if previous is not None and os.path.isfile(previous):
+        try:
+            with zipfile.ZipFile(previous, "r") as zprev:
+                if zprev.comment == _archive_comment(compresslevel):
+                    reusable = {info.filename: info for info in zprev.infolist()}
+        except zipfile.BadZipFile:
+            logger.warning(f"Ignoring invalid previous context '{previous}'")
+    # build the new archive
+    content_hash = hashlib.sha256()
+    reused: int = 0
+    with atomic_open(fpath, "wb") as fout, \
+            zipfile.ZipFile(fout, "w", compression=zipfile.ZIP_DEFLATED,
+                            compresslevel=compresslevel) as zout, \
+            open(previous if reusable else os.devnull, "rb") as fprev:
+        zout.comment = _archive_comment(compresslevel)
+        if not _can_copy_raw(zout):
+            reusable = {}
+        for member_fpath, arcname in members:
+            crc, size, sha = _digest_file(member_fpath)
+            content_hash.update(arcname.encode("utf-8") + b"\0" + sha.encode("ascii") + b"\n")
+            extension = os.path.splitext(arcname)[1].lower()
+            compress_type = compression.get(
+                extension, zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else
+                zipfile.ZIP_DEFLATED
+            )
+            old = reusable.get(arcname, None)
+            if old is not None and old.CRC == crc and old.file_size == size and \
+                    old.compress_type == compress_type:
+                try:
+                    _copy_raw_member(fprev, zout, old)
+                    reused += 1
+                    continue
+                except zipfile.BadZipFile as e:
+                    logger.warning(f"Cannot reuse member '{arcname}' of the previous "
+                                   f"context: {e}")
+                except (AttributeError, TypeError, ValueError) as e:
+                    # the internals of zipfile are not the expected ones, stop reusing members
+                    logger.debug(f"Cannot copy members without compressing them: {e}")
+                    reusable = {}
+            zout.write(member_fpath, arcname, compress_type=compress_type,
+                       compresslevel=compresslevel)
+    logger.debug(f"Context '{fpath}' created with {len(members)} members, {reused} reused")
+    return content_hash.hexdigest()
@@ -0,0 +1,237 @@
+from abc import ABC, abstractmethod
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+ArcLength = Union[float, np.ndarray]
+
+
+def _wrap(angle: ArcLength) -> ArcLength:
+    # angles in [-pi, pi)
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def _rotate(xy: np.ndarray, yaw: float) -> np.ndarray:
+    c, s = np.cos(yaw), np.sin(yaw)
+    return np.array([xy[0] * c - xy[1] * s, xy[0] * s + xy[1] * c])
+
+
+class LaneGeometry(ABC):
+    """
+    Analytic centerline of a lane between two nodes of the lane graph, stored in the
+    ``geometry`` attribute of the edges (see :py:meth:`dt_maps.Map.graph`).
+
+    All quantities are evaluated in closed form at an arc length ``s`` measured from the
+    start of the edge, ``s`` can be a number or an array and is clipped to ``[0, length]``.
+    """
+
+    @property
+    @abstractmethod
+    def length(self) -> float:
+        """
+        Length of the geometry, in meters.
+        """
+        pass
+
+    @property
+    def start(self) -> np.ndarray:
+        return self.point(0.0)
+
+    @property
+    def end(self) -> np.ndarray:
+        return self.point(self.length)
+
+    @abstractmethod
+    def point(self, s: ArcLength) -> np.ndarray:
+        """
+        Point at arc length ``s``, a 3D vector or an Nx3 array.
+        """
+        pass
+
+    @abstractmethod
+    def heading(self, s: ArcLength) -> ArcLength:
+        """
+        Direction of travel at arc length ``s``, in radians in ``[-pi, pi)``.
+        """
+        pass
+
+    @abstractmethod
+    def curvature(self, s: ArcLength) -> ArcLength:
+        """
+        Curvature at arc length ``s``, positive when turning left.
+        """
+        pass
+
+    @abstractmethod
+    def project(self, point: Sequence[float]) -> float:
+        """
+        Arc length of the point of the geometry closest to ``point`` on the ``xy`` plane.
+        """
+        pass
+
+    @abstractmethod
+    def split(self, s: float) -> Tuple['LaneGeometry', 'LaneGeometry']:
+        """
+        Splits the geometry at arc length ``s``.
+        """
+        pass
+
+    @abstractmethod
+    def transformed(self, x: float, y: float, z: float, yaw: float) -> 'LaneGeometry':
+        """
+        Geometry rotated by ``yaw`` about the ``z`` axis and then translated by ``(x, y, z)``.
+        """
+        pass
+
+    def sample(self, n: int) -> np.ndarray:
+        """
+        Samples ``n`` points evenly spaced along the geometry, endpoints included.
+
+        Args:
+            n (:obj:`int`):         number of points, at least 2
+
+        Returns:
+            :obj:`numpy.ndarray`:   Nx3 array of points
+        """
+        return self.point(np.linspace(0.0, self.length, max(2, n)))
+
+    def _clip(self, s: ArcLength) -> ArcLength:
+        return np.clip(s, 0.0, self.length)
+
+
+class LineSegment(LaneGeometry):
+    """
+    Straight centerline between two points.
+
+    Args:
+        start (:obj:`list`):    start point ``(x, y, z)``
+        end (:obj:`list`):      end point ``(x, y, z)``
+    """
+
+    def __init__(self, start: Sequence[float], end: Sequence[float]):
+        self._start = np.array(start, dtype=float)
+        self._end = np.array(end, dtype=float)
+        self._length = float(np.linalg.norm(self._end - self._start))
+
+    @property
+    def length(self) -> float:
+        return self._length
+
+    @property
+    def start(self) -> np.ndarray:
+        return self._start.copy()
+
+    @property
+    def end(self) -> np.ndarray:
+        return self._end.copy()
+
+    def point(self, s: ArcLength) -> np.ndarray:
+        t = self._clip(s) / max(self._length, np.finfo(float).tiny)
+        return self._start + np.multiply.outer(t, self._end - self._start)
+
+    def heading(self, s: ArcLength) -> ArcLength:
+        d = self._end - self._start
+        return np.full_like(np.asarray(s, dtype=float), np.arctan2(d[1], d[0]))[()]
+
+    def curvature(self, s: ArcLength) -> ArcLength:
+        return np.zeros_like(np.asarray(s, dtype=float))[()]
+
+    def project(self, point: Sequence[float]) -> float:
+        d = (self._end - self._start)[:2]
+        t = np.dot(np.asarray(point, dtype=float)[:2] - self._start[:2], d) / \
+            max(np.dot(d, d), np.finfo(float).tiny)
+        return float(np.clip(t, 0.0, 1.0) * self._length)
+
+    def split(self, s: float) -> Tuple['LineSegment', 'LineSegment']:
+        mid = self.point(s)
+        return LineSegment(self._start, mid), LineSegment(mid, self._end)
+
+    def transformed(self, x: float, y: float, z: float, yaw: float) -> 'LineSegment':
+        offset = np.array([x, y, z])
+        start, end = self._start.copy(), self._end.copy()
+        start[:2], end[:2] = _rotate(start[:2], yaw), _rotate(end[:2], yaw)
+        return LineSegment(start + offset, end + offset)
+
+    def __repr__(self):
+        return f"LineSegment(start={self._start.tolist()}, end={self._end.tolist()})"
+
+
+class CircularArc(LaneGeometry):
+    """
+    Centerline following an arc of circle on the ``xy`` plane, traveled counterclockwise if
+    ``end_angle > start_angle``, clockwise otherwise.
+
+    Args:
+        center (:obj:`list`):           center ``(x, y, z)`` of the circle
+        radius (:obj:`float`):          radius of the circle
+        start_angle (:obj:`float`):     angle of the start point, in radians
+        end_angle (:obj:`float`):       angle of the end point, in radians
+    """
+
+    def __init__(self, center: Sequence[float], radius: float, start_angle: float,
+                 end_angle: float):
+        self._center = np.array(center, dtype=float)
+        self._radius = float(radius)
+        self._start_angle = float(start_angle)
+        self._end_angle = float(end_angle)
+        self._direction = 1.0 if end_angle >= start_angle else -1.0
+
+    @property
+    def center(self) -> np.ndarray:
+        return self._center.copy()
+
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+    @property
+    def start_angle(self) -> float:
+        return self._start_angle
+
+    @property
+    def end_angle(self) -> float:
+        return self._end_angle
+
+    @property
+    def length(self) -> float:
+        return self._radius * abs(self._end_angle - self._start_angle)
+
+    def _angle(self, s: ArcLength) -> ArcLength:
+        return self._start_angle + self._direction * self._clip(s) / self._radius
+
+    def point(self, s: ArcLength) -> np.ndarray:
+        angle = self._angle(s)
+        offset = np.stack([np.cos(angle), np.sin(angle), np.zeros_like(angle)], axis=-1)
+        return self._center + self._radius * offset
+
+    def heading(self, s: ArcLength) -> ArcLength:
+        return _wrap(self._angle(s) + self._direction * np.pi / 2)
+
+    def curvature(self, s: ArcLength) -> ArcLength:
+        return np.full_like(np.asarray(s, dtype=float), self._direction / self._radius)[()]
+
+    def project(self, point: Sequence[float]) -> float:
+        offset = np.asarray(point, dtype=float)[:2] - self._center[:2]
+        # angle of the point measured from the start, in the direction of travel
+        angle = self._direction * (np.arctan2(offset[1], offset[0]) - self._start_angle)
+        sweep = abs(self._end_angle - self._start_angle)
+        angle = angle % (2 * np.pi)
+        if angle > sweep:
+            # outside of the arc, closest to either end
+            angle = sweep if angle - sweep < 2 * np.pi - angle else 0.0
+        return float(angle * self._radius)
+
+    def split(self, s: float) -> Tuple['CircularArc', 'CircularArc']:
+        mid = float(self._angle(s))
+        return CircularArc(self._center, self._radius, self._start_angle, mid), \
+            CircularArc(self._center, self._radius, mid, self._end_angle)
+
+    def transformed(self, x: float, y: float, z: float, yaw: float) -> 'CircularArc':
+        center = self._center.copy()
+        center[:2] = _rotate(center[:2], yaw)
+        return CircularArc(center + np.array([x, y, z]), self._radius,
+                           self._start_angle + yaw, self._end_angle + yaw)
+
+    def __repr__(self):
+        return f"CircularArc(center={self._center.tolist()}, radius={self._radius}, " \
+               f"start_angle={self._start_angle}, end_angle={self._end_angle})"
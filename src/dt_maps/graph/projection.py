@@ -0,0 +1,166 @@
+from typing import List, NamedTuple, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+class LaneProjection(NamedTuple):
+    """
+    Result of :py:meth:`LaneProjector.project`, one row per pose.
+    """
+    # index of the closest edge in LaneProjector.edges, -1 if the graph has no edges
+    edge: np.ndarray
+    # distance from the start of the edge to the projected point
+    arc: np.ndarray
+    # signed distance from the edge, positive on the left of the direction of travel
+    offset: np.ndarray
+    # yaw of the pose minus the heading of the edge, in [-pi, pi), NaN if no yaw is given
+    heading_error: np.ndarray
+
+
+class LaneProjector:
+    """
+    Projects poses onto the edges of a lane graph (see :py:meth:`dt_maps.Map.graph`).
+
+    Edges are treated as straight segments between the positions of their nodes and are
+    stored in NumPy arrays, together with a uniform grid on the ``xy`` plane that lists the
+    segments close to each cell. Poses are expressed in the same frame as the positions of
+    the nodes of the graph.
+
+    Args:
+        graph (:obj:`networkx.DiGraph`):    lane graph
+        cell_size (:obj:`float`):           side of the cells of the grid, in meters. Poses
+                                            farther than this from every edge fall back to
+                                            a brute-force search.
+    """
+
+    def __init__(self, graph: nx.DiGraph, cell_size: float = 0.5):
+        self._cell_size: float = cell_size
+        self._edges: List[Tuple[str, str]] = list(graph.edges)
+        positions = graph.nodes(data="position")
+        self._a = np.array([positions[u][:2] for u, _ in self._edges], dtype=float) \
+            .reshape((-1, 2))
+        b = np.array([positions[v][:2] for _, v in self._edges], dtype=float).reshape((-1, 2))
+        self._d = b - self._a
+        self._length = np.hypot(self._d[:, 0], self._d[:, 1])
+        self._heading = np.arctan2(self._d[:, 1], self._d[:, 0])
+        self._build_grid(b)
+
+    @property
+    def edges(self) -> List[Tuple[str, str]]:
+        """
+        Edges ``(u, v)`` of the graph, the ids returned by :py:meth:`project` index this list.
+        """
+        return self._edges
+
+    def _cells(self, xy: np.ndarray) -> np.ndarray:
+        return np.floor(xy / self._cell_size).astype(np.int64)
+
+    @staticmethod
+    def _cell_ids(cells: np.ndarray) -> np.ndarray:
+        # pack (cx, cy) into a single integer
+        return (cells[:, 0] << 32) + (cells[:, 1] & 0xFFFFFFFF)
+
+    def _build_grid(self, b: np.ndarray):
+        # every segment is listed in the cells overlapping its bounding box grown by one cell,
+        # so the cell of a point lists all the segments within cell_size from the point
+        low = self._cells(np.minimum(self._a, b) - self._cell_size)
+        high = self._cells(np.maximum(self._a, b) + self._cell_size)
+        cell_ids, segments = [], []
+        for segment, ((x0, y0), (x1, y1)) in enumerate(zip(low, high)):
+            xs, ys = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1), indexing="ij")
+            cells = np.stack([xs.ravel(), ys.ravel()], axis=1)
+            cell_ids.append(self._cell_ids(cells))
+            segments.append(np.full(cells.shape[0], segment, dtype=np.int64))
+        cell_ids = np.concatenate(cell_ids) if cell_ids else np.zeros(0, dtype=np.int64)
+        segments = np.concatenate(segments) if segments else np.zeros(0, dtype=np.int64)
+        order = np.argsort(cell_ids, kind="stable")
+        cell_ids, self._grid_segments = cell_ids[order], segments[order]
+        self._grid_cells, self._grid_starts, self._grid_counts = \
+            np.unique(cell_ids, return_index=True, return_counts=True)
+
+    def _distances(self, points: np.ndarray, segments: np.ndarray) -> Tuple[np.ndarray, ...]:
+        # projection of each point on the corresponding segment
+        a, d = self._a[segments], self._d[segments]
+        length2 = np.maximum(self._length[segments] ** 2, np.finfo(float).tiny)
+        t = np.clip(np.einsum("ij,ij->i", points - a, d) / length2, 0.0, 1.0)
+        closest = a + t[:, None] * d
+        distance = np.hypot(points[:, 0] - closest[:, 0], points[:, 1] - closest[:, 1])
+        return distance, t
+
+    def _brute_force(self, points: np.ndarray) -> np.ndarray:
+        # closest segment to each point among all the segments, in chunks of bounded size
+        best = np.empty(points.shape[0], dtype=np.int64)
+        length2 = np.maximum(self._length ** 2, np.finfo(float).tiny)[None, :]
+        size = max(1, 2 ** 20 // len(self._edges))
+        for start in range(0, points.shape[0], size):
+            v = points[start:start + size, None, :] - self._a[None, :, :]
+            t = np.clip(np.einsum("ijk,jk->ij", v, self._d) / length2, 0.0, 1.0)
+            r = v - t[:, :, None] * self._d[None, :, :]
+            best[start:start + size] = np.argmin(np.einsum("ijk,ijk->ij", r, r), axis=1)
+        return best
+
+    def _closest(self, points: np.ndarray) -> np.ndarray:
+        n = points.shape[0]
+        best = np.full(n, -1, dtype=np.int64)
+        if len(self._edges) == 0 or n == 0:
+            return best
+        best_distance = np.full(n, np.inf)
+        # candidates listed in the cell of each point
+        cell_ids = self._cell_ids(self._cells(points))
+        slot = np.minimum(np.searchsorted(self._grid_cells, cell_ids), len(self._grid_cells) - 1)
+        counts = np.where(self._grid_cells[slot] == cell_ids, self._grid_counts[slot], 0)
+        total = int(counts.sum())
+        if total > 0:
+            point_idx = np.repeat(np.arange(n), counts)
+            group_start = np.repeat(np.cumsum(counts) - counts, counts)
+            segment_idx = self._grid_segments[
+                np.repeat(self._grid_starts[slot], counts) + np.arange(total) - group_start
+            ]
+            distance, _ = self._distances(points[point_idx], segment_idx)
+            # closest candidate of each point, ties go to the lowest edge id
+            order = np.lexsort((segment_idx, distance, point_idx))
+            first = np.unique(point_idx[order], return_index=True)[1]
+            rows = point_idx[order][first]
+            best[rows] = segment_idx[order][first]
+            best_distance[rows] = distance[order][first]
+        # the grid only guarantees the segments within one cell from the point
+        far = np.flatnonzero(best_distance > self._cell_size)
+        if far.size > 0:
+            best[far] = self._brute_force(points[far])
+        return best
+
+    def project(self, poses: np.ndarray) -> LaneProjection:
+        """
+        Projects poses onto their closest edge.
+
+        Args:
+            poses (:obj:`numpy.ndarray`):   Nx3 array of poses ``(x, y, yaw)``, or Nx2 array of
+                                            points ``(x, y)``
+
+        Returns:
+            :obj:`LaneProjection`:          closest edge, arc position, lateral offset and
+                                            heading error of each pose
+        """
+        poses = np.asarray(poses, dtype=float)
+        poses = poses.reshape((-1, poses.shape[-1] if poses.ndim > 0 else 2))
+        points = poses[:, :2]
+        n = points.shape[0]
+        edge = self._closest(points)
+        found = edge >= 0
+        arc = np.full(n, np.nan)
+        offset = np.full(n, np.nan)
+        heading_error = np.full(n, np.nan)
+        if found.any():
+            segments = edge[found]
+            _, t = self._distances(points[found], segments)
+            arc[found] = t * self._length[segments]
+            # cross product between the direction of the edge and the vector to the point
+            length = np.maximum(self._length[segments], np.finfo(float).tiny)
+            d = self._d[segments] / length[:, None]
+            v = points[found] - self._a[segments]
+            offset[found] = d[:, 0] * v[:, 1] - d[:, 1] * v[:, 0]
+            if poses.shape[1] > 2:
+                error = poses[found, 2] - self._heading[segments]
+                heading_error[found] = (error + np.pi) % (2 * np.pi) - np.pi
+        return LaneProjection(edge, arc, offset, heading_error)
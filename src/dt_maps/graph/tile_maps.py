@@ -1,38 +1,40 @@
-from typing import Optional, Iterable
+from typing import Iterable, List, Optional
 
 import networkx as nx
-import numpy as np
 
 from dt_maps import Map
 from dt_maps.exceptions import EntityNotFound
-from dt_maps.graph.tiles import get_tile_graph
-from dt_maps.graph.utils import densify_graph
+from dt_maps.graph.tiles import add_tile_graph, get_tile_graph_template, place_tile_graphs
+from dt_maps.graph.utils import GraphBuilder, densify_graph, stitch_graph
 from dt_maps.types.tile_maps import TileMap
 from dt_maps.types.tiles import TileCoordinates, Tile
 from dt_maps.utils.tiles import get_tile
 
 
-def get_tile_map_graph(m: Map, tile_map: TileMap, subdivision_steps: int = 0) -> nx.DiGraph:
-    # create empty graph
-    G = nx.DiGraph()
-    # populate graph
+def populate_tile_map_graph(g: GraphBuilder, m: Map, tile_map: TileMap):
+    tiles: List[Tile] = []
     for i, j in get_tile_map_tiles(m, tile_map.key):
-        tile: Optional[Tile] = get_tile(m, i, j)
+        tile: Optional[Tile] = get_tile(m, i, j, tile_map.key)
         if tile is None:
             raise EntityNotFound("tiles", i=i, j=j)
-        # get tile graph
-        tile_G = get_tile_graph(tile, tile_map)
-        # move tile graph
-        for _, node in tile_G.nodes.data():
-            tx, ty, tz = node["position"]
-            pose = tile.frame.pose
-            node["position"] = [
-                (tx * np.cos(pose.yaw) - ty * np.sin(pose.yaw)) + tile.frame.pose.x,
-                (tx * np.sin(pose.yaw) + ty * np.cos(pose.yaw)) + tile.frame.pose.y,
-                tz + tile.frame.pose.z,
-            ]
-        # add tile graph to tile_map graph
-        G = nx.compose(G, tile_G)
+        tiles.append(tile)
+    # get tile graphs
+    tile_size = tile_map.tile_size
+    templates = [get_tile_graph_template(tile["type"], tile_size) for tile in tiles]
+    # move tile graphs
+    poses = m.transforms.local_poses([tile.key for tile in tiles]).reshape((-1, 6))
+    placed = place_tile_graphs(templates, poses)
+    # populate graph
+    for tile, template, positions, pose in zip(tiles, templates, placed, poses):
+        add_tile_graph(g, tile, tile_map, template, positions, pose)
+
+
+def get_tile_map_graph(m: Map, tile_map: TileMap, subdivision_steps: int = 0) -> nx.DiGraph:
+    g = GraphBuilder()
+    populate_tile_map_graph(g, m, tile_map)
+    G = g.build()
+    # merge the lane endpoints shared by adjacent tiles
+    stitch_graph(G)
     # subdivide graph
     densify_graph(G, subdivision_steps)
     # ---
@@ -40,6 +42,7 @@ def get_tile_map_graph(m: Map, tile_map: TileMap, subdivision_steps: int = 0) ->
 
 
 def get_tile_map_tiles(m: Map, tile_map: str) -> Iterable[TileCoordinates]:
-    for tile_key, tile in m.layers.tiles.items():
-        if tile_key.startswith(tile_map):
-            yield tile["i"], tile["j"]
+    tiles = m.layers.tiles
+    for tile_key in tiles.descendants(tile_map):
+        tile = tiles[tile_key]
+        yield tile["i"], tile["j"]
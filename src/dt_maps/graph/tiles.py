@@ -1,53 +1,80 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import networkx as nx
 import numpy as np
 
 from dt_maps.constants import YELLOW_TAPE, CENTER_OF_LANE_NORMALIZED
-from dt_maps.graph.utils import find_nodes, node_id, node_attributes
+from dt_maps.graph.geometry import CircularArc, LaneGeometry, LineSegment
+from dt_maps.graph.utils import GraphBuilder, local_node_id, node_attributes, tile_node_id
 from dt_maps.types.tile_maps import TileSize, TileMap
 from dt_maps.types.tiles import Tile, TileType
 
 
-def _populate_tile_straight(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
-    tile_size: TileSize = tile_map.tile_size
+def _rotate_nodes(nodes: List[Tuple[str, dict]], alpha: float):
+    # rotates the positions of the given nodes by alpha degrees about the center of the tile
+    c, s = np.cos(np.deg2rad(alpha)), np.sin(np.deg2rad(alpha))
+    for _, node in nodes:
+        tx, ty, tz = node["position"]
+        node["position"] = [tx * c - ty * s, tx * s + ty * c, tz]
+
+
+def _rotate_edges(edges: List[Tuple[str, str, dict]], alpha: float):
+    # rotates the geometries of the given edges by alpha degrees about the center of the tile
+    for _, _, edge in edges:
+        edge["geometry"] = edge["geometry"].transformed(0.0, 0.0, 0.0, np.deg2rad(alpha))
+
+
+def _lane_centers(tile_size: TileSize) -> Tuple[float, float]:
     # get tapes and points of interest
     half_yellow = YELLOW_TAPE.width / 2.0
     distance_to_lane_center = half_yellow + CENTER_OF_LANE_NORMALIZED * tile_size.x
     half_tile = tile_size.x / 2.0
+    return half_tile, distance_to_lane_center
+
+
+def _curve_right_geometries(g: GraphBuilder, tile_size: TileSize, start: int):
+    # the lanes of a curve are arcs centered at the bottom-right corner of the tile
+    half_tile, distance_to_lane_center = _lane_centers(tile_size)
+    center = [half_tile, -half_tile, 0.0]
+    (_, _, left), (_, _, right) = g.edges[start:start + 2]
+    # left lane (direction: east to south)
+    left["geometry"] = CircularArc(center, half_tile + distance_to_lane_center,
+                                   np.pi / 2, np.pi)
+    # right lane (direction: south to east)
+    right["geometry"] = CircularArc(center, half_tile - distance_to_lane_center,
+                                    np.pi, np.pi / 2)
+
+
+def _populate_tile_straight(g: GraphBuilder, tile_size: TileSize,
+                            variant: Optional[str] = None):
+    # nodes of different variants of the same tile (e.g., in 3-way tiles) need different IDs
+    args = [variant] if variant else []
+    half_tile, distance_to_lane_center = _lane_centers(tile_size)
     # left lane (direction: north to south)
-    left_top_id = node_id(tile.key, "left", "in")
-    left_top = node_attributes(
+    left_top_id = local_node_id("left", *args, "in")
+    left_top = dict(
         position=[-distance_to_lane_center, half_tile, 0.0],
         lane="left",
-        direction="in",
-        tile=tile,
-        tile_map=tile_map
+        direction="in"
     )
-    left_bottom_id = node_id(tile.key, "left", "out")
-    left_bottom = node_attributes(
+    left_bottom_id = local_node_id("left", *args, "out")
+    left_bottom = dict(
         position=[-distance_to_lane_center, -half_tile, 0.0],
         lane="left",
-        direction="out",
-        tile=tile,
-        tile_map=tile_map
+        direction="out"
     )
     # right lane (direction: south to north)
-    right_bottom_id = node_id(tile.key, "right", "in")
-    right_bottom = node_attributes(
+    right_bottom_id = local_node_id("right", *args, "in")
+    right_bottom = dict(
         position=[distance_to_lane_center, -half_tile, 0.0],
         lane="right",
-        direction="in",
-        tile=tile,
-        tile_map=tile_map
+        direction="in"
     )
-    right_top_id = node_id(tile.key, "right", "out")
-    right_top = node_attributes(
+    right_top_id = local_node_id("right", *args, "out")
+    right_top = dict(
         position=[distance_to_lane_center, half_tile, 0.0],
         lane="right",
-        direction="out",
-        tile=tile,
-        tile_map=tile_map
+        direction="out"
     )
     # add nodes
     g.add_node(left_top_id, **left_top)
@@ -55,90 +82,70 @@ def _populate_tile_straight(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
     g.add_node(right_bottom_id, **right_bottom)
     g.add_node(right_top_id, **right_top)
     # add edges
-    g.add_edge(left_top_id, left_bottom_id)
-    g.add_edge(right_bottom_id, right_top_id)
+    g.add_edge(left_top_id, left_bottom_id,
+               geometry=LineSegment(left_top["position"], left_bottom["position"]))
+    g.add_edge(right_bottom_id, right_top_id,
+               geometry=LineSegment(right_bottom["position"], right_top["position"]))
 
 
 # TODO: need to remove it
-def _populate_tile_curve_right(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
-    _populate_tile_straight(g, tile, tile_map)
+def _populate_tile_curve_right(g: GraphBuilder, tile_size: TileSize,
+                               variant: Optional[str] = None):
+    start, start_edge = len(g.nodes), len(g.edges)
+    _populate_tile_straight(g, tile_size, variant)
     # get 'left in' node, aka top-left node
-    left_in_id = find_nodes(g, direction="in", lane="left")[0]
-    left_in = g.nodes[left_in_id]
+    left_in = g.find_nodes(start, direction="in", lane="left")[0]
     # get 'right out' node, aka bottom-right node
-    right_out_id = find_nodes(g, direction="out", lane="right")[0]
-    right_out = g.nodes[right_out_id]
+    right_out = g.find_nodes(start, direction="out", lane="right")[0]
     # rotate nodes
-    for node in [left_in, right_out]:
-        tx, ty, tz = node["position"]
-        node["position"] = [
-            (tx * np.cos(np.deg2rad(-90)) - ty * np.sin(np.deg2rad(-90))),
-            (tx * np.sin(np.deg2rad(-90)) + ty * np.cos(np.deg2rad(-90))),
-            tz
-        ]
+    _rotate_nodes([left_in, right_out], -90)
+    _curve_right_geometries(g, tile_size, start_edge)
 
 
 # TODO: need to remove it
-def _populate_tile_curve_left(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
-    _populate_tile_curve_right(g, tile, tile_map)
+def _populate_tile_curve_left(g: GraphBuilder, tile_size: TileSize,
+                              variant: Optional[str] = None):
+    start, start_edge = len(g.nodes), len(g.edges)
+    _populate_tile_curve_right(g, tile_size, variant)
     # rotate nodes
-    alpha = 180
-    for _, node in g.nodes(data=True):
-        tx, ty, tz = node["position"]
-        node["position"] = [
-            (tx * np.cos(np.deg2rad(alpha)) - ty * np.sin(np.deg2rad(alpha))),
-            (tx * np.sin(np.deg2rad(alpha)) + ty * np.cos(np.deg2rad(alpha))),
-            tz
-        ]
+    _rotate_nodes(g.nodes[start:], 180)
+    _rotate_edges(g.edges[start_edge:], 180)
 
 
-def _populate_tile_3way(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
+def _populate_tile_3way(g: GraphBuilder, tile_size: TileSize):
     graphs = [
-        (_populate_tile_straight, 0),
-        (_populate_tile_curve_right, 0),
-        (_populate_tile_curve_right, 90),
+        (_populate_tile_straight, 0, "straight"),
+        (_populate_tile_curve_right, 0, "turn_0"),
+        (_populate_tile_curve_right, 90, "turn_90"),
     ]
-    # make graphs
-    for populate, alpha in graphs:
-        g1 = nx.DiGraph()
-        populate(g1, tile, tile_map)
+    # make graphs, the lane endpoints shared by the variants are merged by stitch_graph
+    for populate, alpha, variant in graphs:
+        start, start_edge = len(g.nodes), len(g.edges)
+        populate(g, tile_size, variant)
         # rotate nodes
-        for _, node in g1.nodes(data=True):
-            tx, ty, tz = node["position"]
-            node["position"] = [
-                (tx * np.cos(np.deg2rad(alpha)) - ty * np.sin(np.deg2rad(alpha))),
-                (tx * np.sin(np.deg2rad(alpha)) + ty * np.cos(np.deg2rad(alpha))),
-                tz
-            ]
-        # copy g1 into g
-        g.add_edges_from(g1.edges(data=True))
-        g.add_nodes_from(g1.nodes(data=True))
+        _rotate_nodes(g.nodes[start:], alpha)
+        _rotate_edges(g.edges[start_edge:], alpha)
 
 
 # It's the copy of fun "_populate_tile_curve_right"
-def _populate_tile_curve(g: nx.DiGraph, tile: Tile, tile_map: TileMap):
-    _populate_tile_straight(g, tile, tile_map)
+def _populate_tile_curve(g: GraphBuilder, tile_size: TileSize,
+                         variant: Optional[str] = None):
+    start, start_edge = len(g.nodes), len(g.edges)
+    _populate_tile_straight(g, tile_size, variant)
     # get 'left in' node, aka top-left node
-    left_in_id = find_nodes(g, direction="in", lane="left")[0]
-    left_in = g.nodes[left_in_id]
+    left_in = g.find_nodes(start, direction="in", lane="left")[0]
     # get 'right out' node, aka bottom-right node
-    right_out_id = find_nodes(g, direction="out", lane="right")[0]
-    right_out = g.nodes[right_out_id]
+    right_out = g.find_nodes(start, direction="out", lane="right")[0]
     # rotate nodes
-    for node in [left_in, right_out]:
-        tx, ty, tz = node["position"]
-        node["position"] = [
-            (tx * np.cos(np.deg2rad(-90)) - ty * np.sin(np.deg2rad(-90))),
-            (tx * np.sin(np.deg2rad(-90)) + ty * np.cos(np.deg2rad(-90))),
-            tz
-        ]
+    _rotate_nodes([left_in, right_out], -90)
+    _curve_right_geometries(g, tile_size, start_edge)
 
 
-def _populate_tile_no_graph(_: nx.DiGraph, __: Tile, ___: TileMap):
+def _populate_tile_no_graph(_: GraphBuilder, __: TileSize):
     pass
 
 
-tile_type_to_populate_fcn: Dict[TileType, Callable[[nx.DiGraph, Tile, TileMap], None]] = {
+tile_type_to_populate_fcn: Dict[TileType, Callable[[GraphBuilder, TileSize], None]] = {
     TileType.STRAIGHT: _populate_tile_straight,
     TileType.CURVE: _populate_tile_curve,
     TileType.FLOOR: _populate_tile_no_graph,
@@ -148,18 +155,129 @@ tile_type_to_populate_fcn: Dict[TileType, Callable[[nx.DiGraph, Tile, TileMap],
 }
 
 
+class TileGraphTemplate(NamedTuple):
+    """
+    Graph of a type of tile in the frame of the tile, see :py:func:`get_tile_graph_template`.
+    """
+    # IDs of the nodes within the tile, see dt_maps.graph.utils.local_node_id
+    nodes: List[str]
+    lanes: List[str]
+    directions: List[Optional[str]]
+    # Nx3 array of positions of the nodes
+    positions: np.ndarray
+    # Ex2 array of indices of the nodes linked by each edge
+    edges: np.ndarray
+    # centerline of each edge
+    geometries: List[LaneGeometry]
+
+
+_templates: Dict[Tuple[TileType, Tuple[float, float]], TileGraphTemplate] = {}
+
+
+def get_tile_graph_template(tile_type: TileType, tile_size: TileSize) -> TileGraphTemplate:
+    """
+    Graph of a type of tile, templates are built once for each pair ``(tile_type, tile_size)``.
+
+    Args:
+        tile_type (:obj:`dt_maps.types.tiles.TileType`):        type of tile
+        tile_size (:obj:`dt_maps.types.tile_maps.TileSize`):    size of the tiles
+
+    Returns:
+        :obj:`TileGraphTemplate`:                               the template
+    """
+    key = (tile_type, (float(tile_size.x), float(tile_size.y)))
+    template = _templates.get(key, None)
+    if template is None:
+        # get function to populate the graph
+        populate = tile_type_to_populate_fcn.get(tile_type, None)
+        if populate is None:
+            raise NotImplementedError("Function 'get_tile_graph' is not implemented for tile "
+                                      f"of type {tile_type}")
+        g = GraphBuilder()
+        populate(g, tile_size)
+        index = {node: i for i, (node, _) in enumerate(g.nodes)}
+        template = TileGraphTemplate(
+            nodes=[node for node, _ in g.nodes],
+            lanes=[data["lane"] for _, data in g.nodes],
+            directions=[data["direction"] for _, data in g.nodes],
+            positions=np.array([data["position"] for _, data in g.nodes], dtype=float)
+                .reshape((-1, 3)),
+            edges=np.array([(index[u], index[v]) for u, v, _ in g.edges], dtype=np.int64)
+                .reshape((-1, 2)),
+            geometries=[data["geometry"] for _, _, data in g.edges],
+        )
+        # templates are shared by all the tiles of the same type
+        template.positions.setflags(write=False)
+        template.edges.setflags(write=False)
+        _templates[key] = template
+    return template
+
+
+def place_tile_graphs(templates: List[TileGraphTemplate], poses: np.ndarray) -> List[np.ndarray]:
+    """
+    Moves the nodes of many tile graphs from the frames of their tiles to the frame of the
+    tile map, all the tiles sharing the same template are moved at once.
+
+    Args:
+        templates (:obj:`list`):            template of each tile
+        poses (:obj:`numpy.ndarray`):       Nx6 array of poses ``(x, y, z, roll, pitch, yaw)``
+                                            of the tiles, only ``x``, ``y``, ``z`` and ``yaw``
+                                            are used
+
+    Returns:
+        :obj:`list`:                        Mx3 array of positions of the nodes of each tile
+    """
+    placed: List[Optional[np.ndarray]] = [None] * len(templates)
+    groups: Dict[int, List[int]] = {}
+    for i, template in enumerate(templates):
+        groups.setdefault(id(template), []).append(i)
+    for tiles in groups.values():
+        local = templates[tiles[0]].positions
+        pose = poses[tiles]
+        c, s = np.cos(pose[:, 5])[:, None], np.sin(pose[:, 5])[:, None]
+        tx, ty, tz = local[None, :, 0], local[None, :, 1], local[None, :, 2]
+        positions = np.stack([
+            (tx * c - ty * s) + pose[:, 0, None],
+            (tx * s + ty * c) + pose[:, 1, None],
+            tz + pose[:, 2, None],
+        ], axis=2)
+        for i, tile_positions in zip(tiles, positions):
+            placed[i] = tile_positions
+    return placed
+
+
+def add_tile_graph(g: GraphBuilder, tile: Tile, tile_map: TileMap,
+                   template: TileGraphTemplate, positions: np.ndarray,
+                   pose: Optional[np.ndarray] = None):
+    """
+    Adds the graph of a tile to a builder.
+
+    Args:
+        g (:obj:`dt_maps.graph.utils.GraphBuilder`):        builder
+        tile (:obj:`dt_maps.types.tiles.Tile`):             tile
+        tile_map (:obj:`dt_maps.types.tile_maps.TileMap`):  tile map the tile belongs to
+        template (:obj:`TileGraphTemplate`):                template of the tile
+        positions (:obj:`numpy.ndarray`):                   Nx3 array of positions of the nodes
+        pose (:obj:`numpy.ndarray`):                        pose ``(x, y, z, roll, pitch, yaw)``
+                                                            of the tile used to place the
+                                                            geometries of the edges, they are
+                                                            left in the frame of the tile
+                                                            if ``None``
+    """
+    ids = [tile_node_id(tile.key, node) for node in template.nodes]
+    for i, position in enumerate(positions.tolist()):
+        g.add_node(ids[i], **node_attributes(tile, tile_map, position, template.lanes[i],
+                                             template.directions[i]))
+    geometries = template.geometries
+    if pose is not None:
+        x, y, z, _, _, yaw = (float(v) for v in pose)
+        geometries = [geometry.transformed(x, y, z, yaw) for geometry in geometries]
+    for (u, v), geometry in zip(template.edges.tolist(), geometries):
+        g.add_edge(ids[u], ids[v], geometry=geometry)
+
+
 def get_tile_graph(tile: Tile, tile_map: TileMap) -> nx.DiGraph:
-    # get tile
-    tile_type = tile["type"]
-    # create empty graph
-    G = nx.DiGraph()
-    # get function to populate the graph
-    populate = tile_type_to_populate_fcn.get(tile_type, None)
-    if populate is None:
-        raise NotImplementedError("Function 'get_tile_graph' is not implemented for tile "
-                                  f"of type {tile_type}")
-    else:
-        # populate graph
-        populate(G, tile, tile_map)
-    # ---
-    return G
+    template = get_tile_graph_template(tile["type"], tile_map.tile_size)
+    g = GraphBuilder()
+    add_tile_graph(g, tile, tile_map, template, template.positions)
+    return g.build()
@@ -1,6 +1,5 @@
-import os
-import uuid
-from typing import List, Optional
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import networkx as nx
 import numpy as np
@@ -9,11 +8,38 @@ from dt_maps.types.tile_maps import TileMap
 from dt_maps.types.tiles import Tile, TileType
 
 
-def node_id(tile_key: str, lane: str, *args) -> str:
-    # TODO: fix this
-    return str(uuid.uuid4())
+# nodes closer than this (in meters) are considered coincident when stitching graphs
+STITCH_TOLERANCE = 1e-4
+
+
+def local_node_id(lane: str, *args) -> str:
+    """
+    ID of a node within its tile, e.g., ``lane_left__in``.
+    """
     args = list(map(str, args))
-    return os.path.join(tile_key, f"lane_{lane}", *args).replace("/", "__")
+    return "/".join([f"lane_{lane}"] + args).replace("/", "__")
+
+
+def tile_node_id(tile_key: str, local_id: str) -> str:
+    """
+    ID of the node ``local_id`` (see :py:func:`local_node_id`) of the tile ``tile_key``.
+    """
+    return f"{tile_key.replace('/', '__')}__{local_id}"
+
+
+def node_id(tile_key: str, lane: str, *args) -> str:
+    """
+    Deterministic ID of a node, e.g., ``map_0__tile_0_0__lane_left__in``.
+    """
+    return tile_node_id(tile_key, local_node_id(lane, *args))
+
+
+def midpoint_node_id(tile_key: str, lane: str, node_u_id: str, node_v_id: str) -> str:
+    """
+    Deterministic ID of the node added in the middle of the edge ``(u, v)``.
+    """
+    digest = hashlib.sha1(f"{node_u_id}|{node_v_id}".encode("utf-8")).hexdigest()[:12]
+    return node_id(tile_key, lane, f"mid_{digest}")
 
 
 def node_attributes(tile: Tile, tile_map: TileMap, position: list, lane: str,
@@ -27,6 +53,42 @@ def node_attributes(tile: Tile, tile_map: TileMap, position: list, lane: str,
     }
 
 
+class GraphBuilder:
+    """
+    Collects the nodes and edges of a lane graph into flat lists and creates the
+    :py:class:`networkx.DiGraph` once, see :py:meth:`build`.
+
+    Nodes and edges added more than once are merged as in :py:func:`networkx.compose`, i.e.,
+    the attributes added last win.
+    """
+
+    def __init__(self):
+        self.nodes: List[Tuple[str, dict]] = []
+        self.edges: List[Tuple[str, str, dict]] = []
+
+    def add_node(self, node: str, **attrs) -> dict:
+        self.nodes.append((node, attrs))
+        return attrs
+
+    def add_edge(self, u: str, v: str, **attrs):
+        self.edges.append((u, v, attrs))
+
+    def find_nodes(self, start: int = 0, **attrs) -> List[Tuple[str, dict]]:
+        """
+        Nodes added after the first ``start`` ones whose attributes match ``attrs``.
+        """
+        return [
+            (node, data) for node, data in self.nodes[start:]
+            if all(k in data and data[k] == v for k, v in attrs.items())
+        ]
+
+    def build(self) -> nx.DiGraph:
+        g = nx.DiGraph()
+        g.add_nodes_from(self.nodes)
+        g.add_edges_from(self.edges)
+        return g
+
+
 def find_nodes(g: nx.DiGraph, **attrs):
     result: List[str] = []
     for node_id, node_data in g.nodes.data():
@@ -43,54 +105,132 @@ def find_nodes(g: nx.DiGraph, **attrs):
     return result
 
 
-def densify_graph(g: nx.DiGraph, steps: int):
-    node_prefix = []
+def stitch_graph(g: nx.DiGraph, tolerance: float = STITCH_TOLERANCE,
+                 nodes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Merges the nodes of a graph that lie at the same position (e.g., the lane endpoints
+    shared by two adjacent tiles). Positions are hashed into a grid of cells of side
+    ``tolerance``, each group of coincident nodes is replaced by the node with the smallest ID,
+    which inherits the edges of the others.
+
+    Args:
+        g (:obj:`networkx.DiGraph`):    graph to stitch, modified in place
+        tolerance (:obj:`float`):       maximum distance between coincident nodes
+        nodes (:obj:`list`):            only stitch these nodes (e.g., the nodes of one tile
+                                        map), all the nodes if ``None``
+
+    Returns:
+        :obj:`dict`:                    ID of the merged nodes -> ID of the node they were
+                                        merged into
+    """
+    cells: Dict[Tuple[int, ...], List[Tuple[str, np.ndarray]]] = {}
+    merged: Dict[str, str] = {}
+    for node in sorted(g.nodes if nodes is None else nodes):
+        position = np.asarray(g.nodes[node]["position"], dtype=float)
+        cell = tuple(np.floor(position / tolerance).astype(int).tolist())
+        # coincident nodes can fall into neighboring cells
+        keep = None
+        for offset in np.ndindex(*((3,) * len(cell))):
+            neighbor = tuple(c + o - 1 for c, o in zip(cell, offset))
+            for other, other_position in cells.get(neighbor, ()):
+                if np.linalg.norm(position - other_position) <= tolerance:
+                    keep = other
+                    break
+            if keep is not None:
+                break
+        if keep is None:
+            cells.setdefault(cell, []).append((node, position))
+        else:
+            merged[node] = keep
+    # move the edges of the merged nodes to the nodes they were merged into
+    edges = []
+    for node in merged:
+        edges.extend(g.out_edges(node, data=True))
+        edges.extend(g.in_edges(node, data=True))
+    g.remove_nodes_from(merged)
+    for u, v, data in edges:
+        u, v = merged.get(u, u), merged.get(v, v)
+        # edges between coincident nodes disappear
+        if u != v:
+            g.add_edge(u, v, **data)
+    return merged
+
+
+def densify_graph(g: nx.DiGraph, steps: int, on_geometry: bool = False):
+    """
+    Subdivides every edge of a graph ``steps`` times. Each step adds a node in the middle of
+    every edge, moved orthogonally to the edge (a bump) if the edge is not axis-aligned, so that
+    curves get smoother at each step. All the edges of a step are processed at once.
+
+    The ``geometry`` of an edge (see :py:mod:`dt_maps.graph.geometry`) is split between the
+    two new edges at the point closest to the new node. With ``on_geometry``, the new node is
+    placed halfway along the geometry instead, so that the endpoints of the geometries of all
+    the edges match the positions of their nodes.
+
+    Args:
+        g (:obj:`networkx.DiGraph`):    graph to densify, modified in place
+        steps (:obj:`int`):             number of subdivision steps
+        on_geometry (:obj:`bool`):      place the new nodes on the geometry of the edges
+    """
     for step in range(steps):
-        node_prefix.append(step)
         edges = list(g.edges)
-        for node_u_id, node_v_id in edges:
-            # get nodes
-            node_u = g.nodes[node_u_id]
-            node_v = g.nodes[node_v_id]
-            # get nodes' position
-            ux, uy, uz = node_u["position"]
-            vx, vy, vz = node_v["position"]
-            tile_map, tile, lane = node_u["tile_map"], node_u["tile"], node_u["lane"]
-            # direction of the bump as a function of the current lane
-            lane_mirror = 0 if lane == "right" else 180
-            # find angle of the bump
-            yaw = np.arctan2(vy - uy, vx - ux) + np.deg2rad(lane_mirror)
-            # direction of the bump
-            dr = np.array([-np.sin(yaw), np.cos(yaw), 0])
-            # distance between nodes
-            d = np.linalg.norm([ux - vx, uy - vy, uz - vz]) / 2.0
-            # apply a bump only to segments that are not straight
-            bump_enabler = 0.0 if np.allclose([ux], [vx]) or np.allclose([uy], [vy]) else 1.0
-            # smooth the bump as we keep subdividing
-            bump_smooth = 1.0 / float(step + 1)
-            # compute by how much we have to move orthogonally to the line (u, v)
-            bump_magnitude = d * 0.5 * bump_enabler * bump_smooth
-            # compute the midpoint along the line (u, v)
-            cx = (ux + vx) / 2
-            cy = (uy + vy) / 2
-            cz = (uz + vz) / 2
-            c = np.array([cx, cy, cz])
-            # find new node position
-            p = c + bump_magnitude * dr
-            # make attributes for the new node
-            mid_node_attrs = node_attributes(
-                position=p.tolist(),
-                lane=lane,
-                direction=None,
-                tile=tile,
-                tile_map=tile_map
-            )
-            # get an ID for the new node
-            mid_node_id = node_id(tile.key, lane, *node_prefix)
-            # add new node
-            g.add_node(mid_node_id, **mid_node_attrs)
-            # link (u, mid), and (mid, v)
-            g.add_edge(node_u_id, mid_node_id)
-            g.add_edge(mid_node_id, node_v_id)
-            # unlink (u, v)
-            g.remove_edge(node_u_id, node_v_id)
+        if not edges:
+            return
+        nodes = g.nodes
+        # get nodes' position
+        u = np.array([nodes[node_u_id]["position"] for node_u_id, _ in edges], dtype=float)
+        v = np.array([nodes[node_v_id]["position"] for _, node_v_id in edges], dtype=float)
+        lanes = [nodes[node_u_id]["lane"] for node_u_id, _ in edges]
+        # direction of the bump as a function of the current lane
+        lane_mirror = np.where(np.array(lanes) == "right", 0.0, np.deg2rad(180))
+        # find angle of the bump
+        yaw = np.arctan2(v[:, 1] - u[:, 1], v[:, 0] - u[:, 0]) + lane_mirror
+        # direction of the bump
+        dr = np.stack([-np.sin(yaw), np.cos(yaw), np.zeros_like(yaw)], axis=1)
+        # distance between nodes
+        d = np.linalg.norm(u - v, axis=1) / 2.0
+        # apply a bump only to segments that are not straight
+        bump_enabler = ~(np.isclose(u[:, 0], v[:, 0]) | np.isclose(u[:, 1], v[:, 1]))
+        # smooth the bump as we keep subdividing
+        bump_smooth = 1.0 / float(step + 1)
+        # compute by how much we have to move orthogonally to the line (u, v)
+        bump_magnitude = d * 0.5 * bump_enabler * bump_smooth
+        # find new nodes' position, from the midpoint along the line (u, v)
+        p = (u + v) / 2 + bump_magnitude[:, None] * dr
+        # split the geometries where the new nodes are (or place the new nodes on them)
+        halves = []
+        for i, (node_u_id, node_v_id) in enumerate(edges):
+            geometry = g.edges[node_u_id, node_v_id].get("geometry", None)
+            if geometry is None:
+                halves.append(({}, {}))
+                continue
+            s = geometry.length / 2.0 if on_geometry else geometry.project(p[i])
+            first, second = geometry.split(s)
+            halves.append(({"geometry": first}, {"geometry": second}))
+            if on_geometry:
+                p[i] = first.end
+        # make the new nodes
+        mid_nodes = []
+        for (node_u_id, node_v_id), lane, position in zip(edges, lanes, p.tolist()):
+            node_u = nodes[node_u_id]
+            tile_map, tile = node_u["tile_map"], node_u["tile"]
+            mid_nodes.append((
+                midpoint_node_id(tile.key, lane, node_u_id, node_v_id),
+                node_attributes(
+                    position=position,
+                    lane=lane,
+                    direction=None,
+                    tile=tile,
+                    tile_map=tile_map
+                )
+            ))
+        # the halves of (u, v) inherit the two halves of its geometry
+        new_edges = []
+        for (node_u_id, node_v_id), (mid_node_id, _), (first, second) in \
+                zip(edges, mid_nodes, halves):
+            new_edges.append((node_u_id, mid_node_id, first))
+            new_edges.append((mid_node_id, node_v_id, second))
+        # replace (u, v) with (u, mid) and (mid, v)
+        g.remove_edges_from(edges)
+        g.add_nodes_from(mid_nodes)
+        g.add_edges_from(new_edges)
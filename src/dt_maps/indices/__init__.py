@@ -0,0 +1,76 @@
+from typing import Any, Iterable, Optional, Tuple
+
+
+class LayerIndex:
+    """
+    Base class for the indices maintained by a :py:class:`dt_maps.MapLayer`.
+
+    An index is attached to a layer using :py:meth:`dt_maps.MapLayer.add_index`, it is then
+    built from the content of the layer and kept up-to-date by the layer through the
+    ``on_*`` hooks. Indices only see raw entities (i.e., dictionaries), never entity helpers.
+    """
+
+    # name of the index, used to retrieve it using :py:meth:`dt_maps.MapLayer.index`
+    name: str = None
+
+    def __init__(self):
+        self._layer = None
+
+    @property
+    def layer(self):
+        """
+        Layer this index is attached to.
+        """
+        return self._layer
+
+    def attach(self, layer):
+        """
+        Attaches the index to a layer and builds it from the content of the layer.
+
+        Args:
+            layer (:obj:`dt_maps.MapLayer`):    layer to index
+        """
+        self._layer = layer
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Builds the index from scratch.
+        """
+        self.clear()
+        for key, raw in self._layer.raw_items():
+            self.on_insert(key, raw)
+
+    def clear(self):
+        """
+        Empties the index.
+        """
+
+    def on_insert(self, key: str, raw: Any):
+        """
+        Called when the entity ``key`` is added to the layer.
+        """
+
+    def on_remove(self, key: str, raw: Any):
+        """
+        Called when the entity ``key`` is removed from the layer.
+        """
+
+    def on_update(self, key: str, field_path: Tuple[str, ...], old: Any, new: Any):
+        """
+        Called when the field ``field_path`` of the entity ``key`` changes from ``old`` to
+        ``new``. ``old`` is ``None`` if the field did not exist before.
+        """
+
+
+def raw_field(raw: Any, field_path: Iterable[str], default: Optional[Any] = None) -> Any:
+    """
+    Reads a (nested) field from a raw entity, returns ``default`` if the field does not exist.
+    """
+    value = raw
+    for field in field_path:
+        try:
+            value = value[field]
+        except (KeyError, TypeError, IndexError):
+            return default
+    return value
@@ -0,0 +1,175 @@
+from collections import deque
+from typing import Any, Container, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import LayerIndex, raw_field
+from ..exceptions import EntityNotFound, InvalidMapLayer
+
+
+class FrameTree(LayerIndex):
+    """
+    Index of the ``frames`` layer holding two hierarchies:
+
+    - the key hierarchy, where the parent of a frame is its closest existing ancestor key
+      (e.g., ``map_0`` for ``map_0/tile_0_0``), see :py:meth:`parent` and :py:meth:`children`;
+    - the ``relative_to`` hierarchy used to resolve poses, see :py:meth:`relative_to`,
+      :py:meth:`dependents` and :py:meth:`topological_order`.
+    """
+
+    name = "frame_tree"
+
+    def __init__(self):
+        super(FrameTree, self).__init__()
+        # key hierarchy, top-level frames are children of None
+        self._parent: Dict[str, Optional[str]] = {}
+        self._children: Dict[Optional[str], Dict[str, None]] = {None: {}}
+        # relative_to hierarchy
+        self._relative_to: Dict[str, Optional[str]] = {}
+        self._dependents: Dict[str, Dict[str, None]] = {}
+
+    # key hierarchy ==>
+
+    def parent(self, key: str) -> Optional[str]:
+        """
+        Key of the closest existing ancestor of the frame ``key``, ``None`` if there is none.
+        """
+        try:
+            return self._parent[key]
+        except KeyError:
+            raise EntityNotFound(self._layer.name, key=key)
+
+    def children(self, key: Optional[str] = None) -> List[str]:
+        """
+        Keys of the frames whose parent is ``key``, or of the top-level frames if ``key``
+        is ``None``.
+        """
+        return list(self._children.get(key, ()))
+
+    def dfs(self, key: Optional[str] = None) -> Iterator[str]:
+        """
+        Iterates over the subtree of ``key`` (including ``key``) in depth-first pre-order,
+        over the whole tree if ``key`` is ``None``.
+        """
+        stack = [key] if key is not None else list(reversed(self.children(None)))
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(self.children(current)))
+
+    def bfs(self, key: Optional[str] = None) -> Iterator[str]:
+        """
+        Iterates over the subtree of ``key`` (including ``key``) in breadth-first order,
+        over the whole tree if ``key`` is ``None``.
+        """
+        queue = deque([key] if key is not None else self.children(None))
+        while queue:
+            current = queue.popleft()
+            yield current
+            queue.extend(self.children(current))
+
+    # key hierarchy <==
+
+    # relative_to hierarchy ==>
+
+    def relative_to(self, key: str) -> Optional[str]:
+        """
+        Key of the frame the frame ``key`` is relative to.
+        """
+        try:
+            return self._relative_to[key]
+        except KeyError:
+            raise EntityNotFound(self._layer.name, key=key)
+
+    def dependents(self, key: str) -> List[str]:
+        """
+        Keys of the frames that are relative to the frame ``key``.
+        """
+        return list(self._dependents.get(key, ()))
+
+    def topological_order(self, keys: Optional[Sequence[str]] = None,
+                          resolved: Container[str] = ()) -> List[str]:
+        """
+        Frames in an order in which every frame comes after the frame it is relative to, i.e.,
+        an order in which poses can be resolved.
+
+        Args:
+            keys (:obj:`list`):     frames to resolve, all the frames if ``None``. The frames
+                                    they are (transitively) relative to are included as well.
+            resolved (:obj:`set`):  frames that are already resolved, they and the frames they
+                                    are relative to are left out
+
+        Returns:
+            :obj:`list`:            keys of the frames
+        """
+        keys = list(self._relative_to.keys()) if keys is None else keys
+        order: List[str] = []
+        visited: Dict[str, None] = {}
+        for key in keys:
+            chain: List[str] = []
+            in_chain: Dict[str, None] = {}
+            current = key
+            while current is not None and current not in visited and current not in resolved:
+                if current in in_chain:
+                    raise InvalidMapLayer(self._layer.name, f"The frames {sorted(chain)} form a "
+                                                            f"cycle through 'relative_to'")
+                chain.append(current)
+                in_chain[current] = None
+                current = self.relative_to(current)
+            order.extend(reversed(chain))
+            visited.update(in_chain)
+        return order
+
+    # relative_to hierarchy <==
+
+    def clear(self):
+        self._parent.clear()
+        self._children = {None: {}}
+        self._relative_to.clear()
+        self._dependents.clear()
+
+    def _link(self, key: str, relative_to: Optional[str]):
+        self._unlink(key)
+        self._relative_to[key] = relative_to
+        if relative_to is not None:
+            self._dependents.setdefault(relative_to, {})[key] = None
+
+    def _unlink(self, key: str):
+        relative_to = self._relative_to.pop(key, None)
+        if relative_to is not None:
+            dependents = self._dependents.get(relative_to, {})
+            dependents.pop(key, None)
+            if not dependents:
+                self._dependents.pop(relative_to, None)
+
+    def on_insert(self, key: str, raw: Any):
+        self._link(key, raw_field(raw, ("relative_to",), None))
+        if key in self._parent:
+            return
+        ancestors = self._layer.ancestors(key)
+        parent = ancestors[-1] if ancestors else None
+        # when rebuilding, the key index already holds frames that come later in the layer,
+        # so the parent might not be in the tree yet
+        siblings = self._children.setdefault(parent, {})
+        # frames below the new one that were attached to its parent move under it
+        prefix = key + "/"
+        adopted = [child for child in siblings if child.startswith(prefix)]
+        children = self._children.setdefault(key, {})
+        for child in adopted:
+            del siblings[child]
+            children[child] = None
+            self._parent[child] = key
+        siblings[key] = None
+        self._parent[key] = parent
+
+    def on_remove(self, key: str, raw: Any):
+        self._unlink(key)
+        parent = self._parent.pop(key, None)
+        siblings = self._children[parent]
+        siblings.pop(key, None)
+        # children of the removed frame move to its parent
+        for child in self._children.pop(key, {}):
+            siblings[child] = None
+            self._parent[child] = parent
+
+    def on_update(self, key: str, field_path: Tuple[str, ...], old: Any, new: Any):
+        if field_path and field_path[0] == "relative_to":
+            self._link(key, raw_field(self._layer._get_raw(key), ("relative_to",), None))
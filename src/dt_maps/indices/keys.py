@@ -0,0 +1,147 @@
+import fnmatch
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import LayerIndex
+
+KEY_SEPARATOR = "/"
+
+
+class _TrieNode:
+    __slots__ = ("children", "key")
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        # key of the entity stored at this node (if any)
+        self.key: Optional[str] = None
+
+
+def _is_pattern(segment: str) -> bool:
+    return any(c in segment for c in "*?[")
+
+
+class KeyTrie(LayerIndex):
+    """
+    Hierarchical index over the ``/``-separated keys of a layer.
+
+    For example, the key ``map_0/tile_0_0`` is a child of ``map_0``. Queries run in time
+    proportional to the depth of the key and the size of the result, not to the size of the
+    layer. Intermediate keys do not need to exist as entities.
+    """
+
+    name = "keys"
+
+    def __init__(self):
+        super(KeyTrie, self).__init__()
+        self._root = _TrieNode()
+
+    def _find(self, key: str) -> Optional[_TrieNode]:
+        node = self._root
+        if not key:
+            return node
+        for segment in key.split(KEY_SEPARATOR):
+            node = node.children.get(segment, None)
+            if node is None:
+                return None
+        return node
+
+    @staticmethod
+    def _walk(node: _TrieNode) -> Iterator[str]:
+        stack = list(reversed(list(node.children.values())))
+        while stack:
+            node = stack.pop()
+            if node.key is not None:
+                yield node.key
+            stack.extend(reversed(list(node.children.values())))
+
+    def children(self, key: str) -> List[str]:
+        """
+        Keys of the entities exactly one level below ``key``
+        (e.g., ``map_0/tile_0_0`` for ``map_0``).
+
+        Args:
+            key (:obj:`str`):   parent key, use an empty string for the top level
+        """
+        node = self._find(key.rstrip(KEY_SEPARATOR))
+        if node is None:
+            return []
+        return [child.key for child in node.children.values() if child.key is not None]
+
+    def descendants(self, key: str) -> List[str]:
+        """
+        Keys of all the entities below ``key``, in depth-first order.
+
+        Args:
+            key (:obj:`str`):   parent key, use an empty string for the whole layer
+        """
+        node = self._find(key.rstrip(KEY_SEPARATOR))
+        if node is None:
+            return []
+        return list(self._walk(node))
+
+    def ancestors(self, key: str) -> List[str]:
+        """
+        Keys of the entities above ``key``, from the top-most to the closest one.
+
+        Args:
+            key (:obj:`str`):   key of the entity
+        """
+        result = []
+        node = self._root
+        for segment in key.split(KEY_SEPARATOR)[:-1]:
+            node = node.children.get(segment, None)
+            if node is None:
+                break
+            if node.key is not None:
+                result.append(node.key)
+        return result
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        Keys matching a glob pattern, wildcards (``*``, ``?``, ``[...]``) match within a single
+        level, e.g., ``map_0/tile_*`` matches ``map_0/tile_0_0`` but not ``map_0/tile_0_0/x``.
+
+        Args:
+            pattern (:obj:`str`):   glob pattern
+        """
+        nodes = [self._root]
+        for segment in pattern.split(KEY_SEPARATOR):
+            matches = []
+            for node in nodes:
+                if not _is_pattern(segment):
+                    child = node.children.get(segment, None)
+                    if child is not None:
+                        matches.append(child)
+                    continue
+                matches.extend(
+                    child for name, child in node.children.items()
+                    if fnmatch.fnmatchcase(name, segment)
+                )
+            nodes = matches
+        return [node.key for node in nodes if node.key is not None]
+
+    def clear(self):
+        self._root = _TrieNode()
+
+    def on_insert(self, key: str, raw: Any):
+        node = self._root
+        for segment in key.split(KEY_SEPARATOR):
+            child = node.children.get(segment, None)
+            if child is None:
+                child = node.children[segment] = _TrieNode()
+            node = child
+        node.key = key
+
+    def on_remove(self, key: str, raw: Any):
+        path = [self._root]
+        segments = key.split(KEY_SEPARATOR)
+        for segment in segments:
+            node = path[-1].children.get(segment, None)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].key = None
+        # prune branches that do not lead to any entity
+        for segment, node, parent in zip(reversed(segments), reversed(path[1:]), reversed(path[:-1])):
+            if node.key is not None or node.children:
+                break
+            del parent.children[segment]
@@ -0,0 +1,117 @@
+from enum import Enum
+from typing import Any, Dict, Hashable, List, Tuple
+
+from . import LayerIndex, raw_field
+from ..constants import NOTSET
+
+
+def property_index_name(field: str) -> str:
+    """
+    Name of the :py:class:`PropertyIndex` on the given field, e.g., ``by_type``.
+    """
+    return f"by_{field}"
+
+
+def normalize_value(value: Any) -> Any:
+    """
+    Value as stored in the raw entities, i.e., enums are replaced by their values.
+    """
+    return value.value if isinstance(value, Enum) else value
+
+
+class PropertyIndex(LayerIndex):
+    """
+    Hash index mapping the values of a field to the keys of the entities having that value.
+
+    Only hashable (i.e., scalar) values are hashed, entities whose field holds an unhashable
+    value (e.g., a list) are compared one by one at lookup time.
+
+    Args:
+        field (:obj:`str`):     name of the field to index, nested fields are separated by dots
+                                (e.g., ``pose.x``)
+    """
+
+    def __init__(self, field: str):
+        super(PropertyIndex, self).__init__()
+        self.name = property_index_name(field)
+        self._field: str = field
+        self._path: Tuple[str, ...] = tuple(field.split("."))
+        # value -> keys, dictionaries are used as insertion-ordered sets
+        self._buckets: Dict[Hashable, Dict[str, None]] = {}
+        self._unhashable: Dict[str, Any] = {}
+        self._values: Dict[str, Any] = {}
+
+    @property
+    def field(self) -> str:
+        return self._field
+
+    def lookup(self, value: Any) -> List[str]:
+        """
+        Keys of the entities whose field is equal to ``value``.
+
+        Args:
+            value (:obj:`any`):     value to look for, enums are compared by value
+
+        Returns:
+            :obj:`list`:            keys of the matching entities
+        """
+        value = normalize_value(value)
+        try:
+            keys = list(self._buckets.get(value, ()))
+        except TypeError:
+            keys = []
+        if self._unhashable:
+            keys.extend(k for k, v in self._unhashable.items() if v == value)
+        return keys
+
+    def values(self) -> List[Any]:
+        """
+        Distinct hashable values of the field.
+        """
+        return list(self._buckets.keys())
+
+    def count(self, value: Any) -> int:
+        """
+        Number of entities whose field is equal to ``value``.
+        """
+        return len(self.lookup(value))
+
+    def clear(self):
+        self._buckets.clear()
+        self._unhashable.clear()
+        self._values.clear()
+
+    def _add(self, key: str, value: Any):
+        self._values[key] = value
+        try:
+            self._buckets.setdefault(value, {})[key] = None
+        except TypeError:
+            self._unhashable[key] = value
+
+    def _discard(self, key: str):
+        if key not in self._values:
+            return
+        value = self._values.pop(key)
+        if self._unhashable.pop(key, NOTSET) is not NOTSET:
+            return
+        bucket = self._buckets[value]
+        bucket.pop(key, None)
+        if not bucket:
+            del self._buckets[value]
+
+    def on_insert(self, key: str, raw: Any):
+        value = raw_field(raw, self._path, NOTSET)
+        if value is not NOTSET:
+            self._add(key, value)
+
+    def on_remove(self, key: str, raw: Any):
+        self._discard(key)
+
+    def on_update(self, key: str, field_path: Tuple[str, ...], old: Any, new: Any):
+        # only changes on the indexed field, one of its parents or one of its children matter
+        n = min(len(field_path), len(self._path))
+        if field_path[:n] != self._path[:n]:
+            return
+        self._discard(key)
+        self.on_insert(key, self._layer._get_raw(key))
+
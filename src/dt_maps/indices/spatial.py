@@ -0,0 +1,382 @@
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import LayerIndex
+from ..exceptions import EntityNotFound
+
+Cell = Tuple[int, int]
+
+# number of (query, entity) distances computed at once by the batched queries
+_BATCH_SIZE = 2 ** 20
+
+
+class SpatialIndex(LayerIndex):
+    """
+    Index of the world positions of the entities of a layer (e.g., ``watchtowers``), the
+    position of an entity is the origin of the frame with the same key.
+
+    Positions are hashed into a uniform grid of square cells on the ``xy`` plane and all
+    distances are measured on that plane. Positions are resolved through
+    :py:attr:`dt_maps.Map.transforms` the first time the index is queried and are refreshed
+    only for the entities whose frame (or any frame it is relative to) changed since.
+
+    Args:
+        cell_size (:obj:`float`):   side of the cells of the grid, in meters
+    """
+
+    name = "spatial"
+
+    DEFAULT_CELL_SIZE: float = 1.0
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        super(SpatialIndex, self).__init__()
+        self._cell_size: float = cell_size
+        self._cells: Dict[Cell, Dict[str, None]] = {}
+        self._cell_of: Dict[str, Cell] = {}
+        self._positions: Dict[str, np.ndarray] = {}
+        # bounding box of the occupied cells, it only grows
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+        # entities of the layer, and entities whose position needs to be resolved again
+        self._keys: Dict[str, None] = {}
+        self._stale: Dict[str, None] = {}
+        # transform cache the index is subscribed to
+        self._transforms = None
+        # positions packed into an array for the batched queries, with the row of each key
+        self._packed: Optional[Tuple[List[str], np.ndarray, Dict[str, int]]] = None
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    # maintenance ==>
+
+    def clear(self):
+        self._cells.clear()
+        self._cell_of.clear()
+        self._positions.clear()
+        self._extent = None
+        self._keys.clear()
+        self._stale.clear()
+        self._packed = None
+
+    def on_insert(self, key: str, raw: Any):
+        self._keys[key] = None
+        self._stale[key] = None
+
+    def on_remove(self, key: str, raw: Any):
+        self._keys.pop(key, None)
+        self._stale.pop(key, None)
+        self._unplace(key)
+
+    def _on_frame_changed(self, key: Optional[str]):
+        if key is None:
+            self._stale = dict.fromkeys(self._keys)
+        elif key in self._keys:
+            self._stale[key] = None
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return int(math.floor(x / self._cell_size)), int(math.floor(y / self._cell_size))
+
+    def _place(self, key: str, position: np.ndarray):
+        cell = self._cell(position[0], position[1])
+        self._positions[key] = position
+        self._cell_of[key] = cell
+        self._cells.setdefault(cell, {})[key] = None
+        if self._extent is None:
+            self._extent = (cell[0], cell[1], cell[0], cell[1])
+        else:
+            x0, y0, x1, y1 = self._extent
+            self._extent = (min(x0, cell[0]), min(y0, cell[1]), max(x1, cell[0]), max(y1, cell[1]))
+
+    def _unplace(self, key: str):
+        self._positions.pop(key, None)
+        cell = self._cell_of.pop(key, None)
+        if cell is not None:
+            keys = self._cells[cell]
+            keys.pop(key, None)
+            if not keys:
+                del self._cells[cell]
+            self._packed = None
+
+    def refresh(self):
+        """
+        Resolves the positions of the entities whose frame changed. Queries call this method
+        automatically.
+        """
+        transforms = self._layer._map.transforms.cache
+        if transforms is not self._transforms:
+            # first use, or the frames layer was replaced
+            if self._transforms is not None:
+                self._transforms.unsubscribe(self._on_frame_changed)
+            transforms.subscribe(self._on_frame_changed)
+            self._transforms = transforms
+            self._stale = dict.fromkeys(self._keys)
+        if not self._stale:
+            return
+        frames = transforms.layer
+        stale = list(self._stale)
+        self._stale = {}
+        for key in stale:
+            self._unplace(key)
+        # entities without a frame are not indexed until their frame is added
+        stale = [key for key in stale if key in frames]
+        try:
+            positions = transforms.world_many(stale)[:, :3, 3]
+        except EntityNotFound:
+            # some frames are relative to frames that do not exist, resolve one by one
+            positions = []
+            for key in list(stale):
+                try:
+                    positions.append(transforms.world(key)[:3, 3])
+                except EntityNotFound:
+                    stale.remove(key)
+        for key, position in zip(stale, positions):
+            self._place(key, np.array(position))
+        self._packed = None
+
+    # maintenance <==
+
+    def position(self, key: str) -> Optional[np.ndarray]:
+        """
+        World position of the entity ``key``, ``None`` if the entity has no frame.
+        """
+        self.refresh()
+        position = self._positions.get(key, None)
+        return None if position is None else position.copy()
+
+    def _rings(self, cx: int, cy: int) -> Tuple[int, int]:
+        # the rings around (cx, cy) that overlap with the extent, the others are empty
+        x0, y0, x1, y1 = self._extent
+        first_ring = max(0, x0 - cx, cx - x1, y0 - cy, cy - y1)
+        last_ring = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        return first_ring, last_ring
+
+    def _ring(self, cx: int, cy: int, r: int) -> Iterator[Cell]:
+        # cells at distance r from (cx, cy), clipped to the extent
+        x0, y0, x1, y1 = self._extent
+        if r == 0:
+            if x0 <= cx <= x1 and y0 <= cy <= y1:
+                yield cx, cy
+            return
+        for y in (cy - r, cy + r):
+            if y0 <= y <= y1:
+                for x in range(max(cx - r, x0), min(cx + r, x1) + 1):
+                    yield x, y
+        for x in (cx - r, cx + r):
+            if x0 <= x <= x1:
+                for y in range(max(cy - r + 1, y0), min(cy + r - 1, y1) + 1):
+                    yield x, y
+
+    def _distance(self, key: str, x: float, y: float) -> float:
+        position = self._positions[key]
+        return math.hypot(position[0] - x, position[1] - y)
+
+    def nearest(self, point: Sequence[float], k: int = 1) -> List[Tuple[str, float]]:
+        """
+        The ``k`` entities closest to a point.
+
+        Args:
+            point (:obj:`list`):    world point ``(x, y)``, further coordinates are ignored
+            k (:obj:`int`):         number of entities to return
+
+        Returns:
+            :obj:`list`:            pairs ``(key, distance)`` sorted by distance
+        """
+        self.refresh()
+        if not self._positions or k <= 0:
+            return []
+        x, y = float(point[0]), float(point[1])
+        cx, cy = self._cell(x, y)
+        first_ring, last_ring = self._rings(cx, cy)
+        found: List[Tuple[float, str]] = []
+        for r in range(first_ring, last_ring + 1):
+            for cell in self._ring(cx, cy, r):
+                for key in self._cells.get(cell, ()):
+                    found.append((self._distance(key, x, y), key))
+            # entities in the next rings are at least r cells away from the point
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= r * self._cell_size:
+                    break
+        found.sort()
+        return [(key, distance) for distance, key in found[:k]]
+
+    def _cells_in(self, x0: float, y0: float, x1: float, y1: float) -> Iterator[Dict[str, None]]:
+        (cx0, cy0), (cx1, cy1) = self._cell(x0, y0), self._cell(x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # the range covers more cells than the occupied ones
+            for (cx, cy), keys in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    yield keys
+            return
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                keys = self._cells.get((cx, cy), None)
+                if keys:
+                    yield keys
+
+    def within(self, point: Sequence[float], radius: float) -> List[Tuple[str, float]]:
+        """
+        Entities within ``radius`` meters from a point.
+
+        Args:
+            point (:obj:`list`):    world point ``(x, y)``, further coordinates are ignored
+            radius (:obj:`float`):  radius in meters
+
+        Returns:
+            :obj:`list`:            pairs ``(key, distance)`` sorted by distance
+        """
+        self.refresh()
+        x, y = float(point[0]), float(point[1])
+        found = []
+        for keys in self._cells_in(x - radius, y - radius, x + radius, y + radius):
+            for key in keys:
+                distance = self._distance(key, x, y)
+                if distance <= radius:
+                    found.append((distance, key))
+        found.sort()
+        return [(key, distance) for distance, key in found]
+
+    def in_bbox(self, low: Sequence[float], high: Sequence[float]) -> List[str]:
+        """
+        Entities inside an axis-aligned box.
+
+        Args:
+            low (:obj:`list`):      corner ``(x_min, y_min)`` of the box
+            high (:obj:`list`):     corner ``(x_max, y_max)`` of the box
+
+        Returns:
+            :obj:`list`:            keys of the entities
+        """
+        self.refresh()
+        x0, y0, x1, y1 = float(low[0]), float(low[1]), float(high[0]), float(high[1])
+        found = []
+        for keys in self._cells_in(x0, y0, x1, y1):
+            for key in keys:
+                position = self._positions[key]
+                if x0 <= position[0] <= x1 and y0 <= position[1] <= y1:
+                    found.append(key)
+        return found
+
+    def _packed_positions(self) -> Tuple[List[str], np.ndarray, Dict[str, int]]:
+        self.refresh()
+        if self._packed is None:
+            keys = list(self._positions.keys())
+            positions = np.array([self._positions[key][:2] for key in keys]).reshape((-1, 2))
+            self._packed = keys, positions, {key: i for i, key in enumerate(keys)}
+        return self._packed
+
+    def _query_cells(self, points: np.ndarray) -> Iterator[Tuple[Cell, np.ndarray]]:
+        # groups the query points by the cell of the grid they fall in
+        cells = np.floor(points / self._cell_size).astype(np.int64)
+        unique, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(unique.shape[0] + 1))
+        for i, (cx, cy) in enumerate(unique):
+            yield (int(cx), int(cy)), order[bounds[i]:bounds[i + 1]]
+
+    def _batches(self, points: np.ndarray, candidates: np.ndarray) \
+            -> Iterator[Tuple[slice, np.ndarray]]:
+        # distances between the points and the candidate entities, a chunk of points at a time
+        positions = self._packed[1][candidates]
+        size = max(1, _BATCH_SIZE // max(1, len(candidates)))
+        for start in range(0, points.shape[0], size):
+            chunk = slice(start, start + size)
+            diff = points[chunk, None, :] - positions[None, :, :]
+            yield chunk, np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+    @staticmethod
+    def _smallest(distances: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        # columns and values of the n smallest distances of each row, sorted
+        closest = np.argpartition(distances, n - 1, axis=1)[:, :n] \
+            if n < distances.shape[1] else np.tile(np.arange(n), (distances.shape[0], 1))
+        closest_distances = np.take_along_axis(distances, closest, axis=1)
+        order = np.argsort(closest_distances, axis=1, kind="stable")
+        return np.take_along_axis(closest, order, axis=1), \
+            np.take_along_axis(closest_distances, order, axis=1)
+
+    def nearest_many(self, points: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of :py:meth:`nearest`.
+
+        Points are grouped by the cell of the grid they fall in, the rings of cells around each
+        group are searched until they contain ``k`` entities close enough to every point of the
+        group, and only those entities are compared with the points.
+
+        Args:
+            points (:obj:`numpy.ndarray`):  Nx2 (or Nx3) array of world points
+            k (:obj:`int`):                 number of entities to return for each point
+
+        Returns:
+            :obj:`tuple`:   an NxK array of keys and an NxK array of distances, sorted by
+                            distance. If the layer has less than ``k`` entities, the missing
+                            keys are ``None`` and the missing distances are ``inf``.
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, np.shape(points)[-1]))[:, :2]
+        keys, _, rows = self._packed_positions()
+        out_keys = np.full((points.shape[0], k), None, dtype=object)
+        out_distances = np.full((points.shape[0], k), np.inf)
+        n = min(k, len(keys))
+        if n == 0:
+            return out_keys, out_distances
+        keys = np.array(keys, dtype=object)
+        for (cx, cy), members in self._query_cells(points):
+            group = points[members]
+            r, last_ring = self._rings(cx, cy)
+            candidates: List[int] = []
+            while len(candidates) < n:
+                for cell in self._ring(cx, cy, r):
+                    candidates.extend(rows[key] for key in self._cells.get(cell, ()))
+                r += 1
+            # entities beyond ring R are at least R cells away from all the points of the group,
+            # they cannot be closer than the n-th candidate found so far
+            farthest = 0.0
+            for _, distances in self._batches(group, np.array(candidates)):
+                farthest = max(farthest, np.partition(distances, n - 1, axis=1)[:, n - 1].max())
+            last_ring = min(last_ring, int(math.ceil(farthest / self._cell_size)))
+            for ring in range(r, last_ring + 1):
+                for cell in self._ring(cx, cy, ring):
+                    candidates.extend(rows[key] for key in self._cells.get(cell, ()))
+            candidates = np.sort(candidates)
+            for chunk, distances in self._batches(group, candidates):
+                closest, closest_distances = self._smallest(distances, n)
+                out_keys[members[chunk], :n] = keys[candidates[closest]]
+                out_distances[members[chunk], :n] = closest_distances
+        return out_keys, out_distances
+
+    def within_many(self, points: np.ndarray, radius: float) -> List[List[str]]:
+        """
+        Vectorized version of :py:meth:`within`.
+
+        Points are grouped by the cell of the grid they fall in, each group is only compared
+        with the entities in the cells within ``radius`` from its cell.
+
+        Args:
+            points (:obj:`numpy.ndarray`):  Nx2 (or Nx3) array of world points
+            radius (:obj:`float`):          radius in meters
+
+        Returns:
+            :obj:`list`:    for each point, the keys of the entities within ``radius``
+                            sorted by distance
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, np.shape(points)[-1]))[:, :2]
+        keys, _, rows = self._packed_positions()
+        result: List[List[str]] = [[] for _ in range(points.shape[0])]
+        if not keys:
+            return result
+        for (cx, cy), members in self._query_cells(points):
+            x0, y0 = cx * self._cell_size - radius, cy * self._cell_size - radius
+            x1, y1 = (cx + 1) * self._cell_size + radius, (cy + 1) * self._cell_size + radius
+            candidates = np.sort([rows[key] for cell in self._cells_in(x0, y0, x1, y1)
+                                  for key in cell]).astype(np.int64)
+            if candidates.size == 0:
+                continue
+            for chunk, distances in self._batches(points[members], candidates):
+                for i, row in zip(members[chunk], distances):
+                    inside = np.flatnonzero(row <= radius)
+                    inside = inside[np.argsort(row[inside], kind="stable")]
+                    result[i] = [keys[j] for j in candidates[inside]]
+        return result
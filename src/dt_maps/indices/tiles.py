@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import LayerIndex, raw_field
+
+GridCell = Tuple[Optional[str], int, int]
+
+
+def tile_map_of(key: str) -> Optional[str]:
+    """
+    Key of the tile map a tile belongs to, i.e., ``map_0`` for the tile ``map_0/tile_0_0``.
+    """
+    return key.rsplit("/", 1)[0] if "/" in key else None
+
+
+class TileGridIndex(LayerIndex):
+    """
+    Index of the ``tiles`` layer mapping the cells ``(tile_map, i, j)`` to tile keys.
+    When more than one tile has the same coordinates, the one added last is returned.
+    """
+
+    name = "tiles_grid"
+
+    def __init__(self):
+        super(TileGridIndex, self).__init__()
+        # keys of the tiles in each cell, tiles can overlap
+        self._cells: Dict[GridCell, List[str]] = {}
+        self._tiles: Dict[str, Tuple[GridCell, Any]] = {}
+        self._ij: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        self._grids: Dict[Optional[str], np.ndarray] = {}
+        self._key_grids: Dict[Optional[str], np.ndarray] = {}
+
+    def get(self, i: int, j: int, tile_map: Optional[str] = None) -> Optional[str]:
+        """
+        Key of the tile at ``(i, j)``.
+
+        Args:
+            i (:obj:`int`):         tile coordinate ``i``
+            j (:obj:`int`):         tile coordinate ``j``
+            tile_map (:obj:`str`):  key of the tile map, if omitted, the first tile found at
+                                    ``(i, j)`` in any tile map is returned
+
+        Returns:
+            :obj:`str`:     key of the tile, ``None`` if there is no tile at ``(i, j)``
+        """
+        if tile_map is not None:
+            keys = self._cells.get((tile_map, i, j), None)
+            return keys[-1] if keys else None
+        keys = self._ij.get((i, j), None)
+        return keys[0] if keys else None
+
+    def tiles(self, tile_map: str) -> List[str]:
+        """
+        Keys of all the tiles in the given tile map.
+        """
+        return [key for key, (cell, _) in self._tiles.items() if cell[0] == tile_map]
+
+    def shape(self, tile_map: str) -> Tuple[int, int]:
+        """
+        Shape of the grid of the given tile map, i.e., ``(max(i) + 1, max(j) + 1)``.
+        """
+        cells = [cell for cell, _ in self._tiles.values() if cell[0] == tile_map]
+        if not cells:
+            return 0, 0
+        return max(c[1] for c in cells) + 1, max(c[2] for c in cells) + 1
+
+    def grid(self, tile_map: str) -> np.ndarray:
+        """
+        Dense grid of tile types for the given tile map. The cell ``[i, j]`` contains the type
+        of the tile at ``(i, j)`` (e.g., ``"straight"``) or an empty string if there is none.
+        The returned array is read-only and shared until the tiles change.
+
+        Args:
+            tile_map (:obj:`str`):  key of the tile map
+
+        Returns:
+            :obj:`numpy.ndarray`:   array of strings of shape :py:meth:`shape`
+        """
+        grid = self._grids.get(tile_map, None)
+        if grid is None:
+            grid = np.full(self.shape(tile_map), "", dtype=object)
+            for (tm, i, j), tile_type in self._tiles.values():
+                if tm == tile_map and i >= 0 and j >= 0:
+                    grid[i, j] = tile_type
+            grid = grid.astype(str)
+            grid.setflags(write=False)
+            self._grids[tile_map] = grid
+        return grid
+
+    def key_grid(self, tile_map: str) -> np.ndarray:
+        """
+        Dense grid of tile keys for the given tile map. The cell ``[i, j]`` contains the key
+        of the tile at ``(i, j)`` or ``None`` if there is none.
+        The returned array is read-only and shared until the tiles change.
+
+        Args:
+            tile_map (:obj:`str`):  key of the tile map
+
+        Returns:
+            :obj:`numpy.ndarray`:   array of objects of shape :py:meth:`shape`
+        """
+        grid = self._key_grids.get(tile_map, None)
+        if grid is None:
+            grid = np.full(self.shape(tile_map), None, dtype=object)
+            for (tm, i, j), keys in self._cells.items():
+                if tm == tile_map and i >= 0 and j >= 0:
+                    grid[i, j] = keys[-1]
+            grid.setflags(write=False)
+            self._key_grids[tile_map] = grid
+        return grid
+
+    def _invalidate_grids(self, tile_map: Optional[str]):
+        self._grids.pop(tile_map, None)
+        self._key_grids.pop(tile_map, None)
+
+    def clear(self):
+        self._cells.clear()
+        self._tiles.clear()
+        self._ij.clear()
+        self._grids.clear()
+        self._key_grids.clear()
+
+    def on_insert(self, key: str, raw: Any):
+        i, j = raw_field(raw, ["i"]), raw_field(raw, ["j"])
+        if not isinstance(i, int) or not isinstance(j, int):
+            return
+        cell = (tile_map_of(key), i, j)
+        self._tiles[key] = (cell, raw_field(raw, ["type"]))
+        self._cells.setdefault(cell, []).append(key)
+        self._ij[(i, j)].append(key)
+        self._invalidate_grids(cell[0])
+
+    def on_remove(self, key: str, raw: Any):
+        entry = self._tiles.pop(key, None)
+        if entry is None:
+            return
+        cell = entry[0]
+        keys = self._cells[cell]
+        keys.remove(key)
+        if not keys:
+            del self._cells[cell]
+        keys = self._ij[cell[1:]]
+        keys.remove(key)
+        if not keys:
+            del self._ij[cell[1:]]
+        self._invalidate_grids(cell[0])
+
+    def on_update(self, key: str, field_path: Tuple[str, ...], old: Any, new: Any):
+        if field_path[0] not in ("i", "j", "type"):
+            return
+        raw = self._layer._get_raw(key)
+        self.on_remove(key, raw)
+        self.on_insert(key, raw)
@@ -0,0 +1,292 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .constants import NOTSET
+from .indices import raw_field
+from .indices.properties import normalize_value, property_index_name
+
+
+class _Predicate(ABC):
+
+    def __init__(self, field: str):
+        self.field: str = field
+        self.path: Tuple[str, ...] = tuple(field.split("."))
+
+    @abstractmethod
+    def test(self, value: Any) -> bool:
+        pass
+
+    def lookup(self, index) -> Optional[List[str]]:
+        # keys matching the predicate according to a PropertyIndex, None if not supported
+        return None
+
+
+class _Equal(_Predicate):
+
+    def __init__(self, field: str, value: Any):
+        super(_Equal, self).__init__(field)
+        self.value = normalize_value(value)
+
+    def test(self, value: Any) -> bool:
+        return normalize_value(value) == self.value
+
+    def lookup(self, index) -> Optional[List[str]]:
+        return index.lookup(self.value)
+
+    def __repr__(self):
+        return f"{self.field} == {self.value!r}"
+
+
+class _In(_Predicate):
+
+    def __init__(self, field: str, values: Iterable[Any]):
+        super(_In, self).__init__(field)
+        self.values = [normalize_value(v) for v in values]
+
+    def test(self, value: Any) -> bool:
+        return normalize_value(value) in self.values
+
+    def lookup(self, index) -> Optional[List[str]]:
+        keys = {}
+        for value in self.values:
+            keys.update(dict.fromkeys(index.lookup(value)))
+        return list(keys)
+
+    def __repr__(self):
+        return f"{self.field} in {self.values!r}"
+
+
+class _Range(_Predicate):
+
+    def __init__(self, field: str, low: Any = None, high: Any = None, inclusive: bool = True):
+        super(_Range, self).__init__(field)
+        self.low = low
+        self.high = high
+        self.inclusive = inclusive
+
+    def test(self, value: Any) -> bool:
+        if value is NOTSET or value is None:
+            return False
+        try:
+            if self.low is not None and (value < self.low if self.inclusive else value <= self.low):
+                return False
+            if self.high is not None and \
+                    (value > self.high if self.inclusive else value >= self.high):
+                return False
+        except TypeError:
+            # values that cannot be compared never match
+            return False
+        return True
+
+    def __repr__(self):
+        lo, hi = ("[", "]") if self.inclusive else ("(", ")")
+        return f"{self.field} in {lo}{self.low}, {self.high}{hi}"
+
+
+class _Custom(_Predicate):
+
+    def __init__(self, field: str, function: Callable[[Any], bool]):
+        super(_Custom, self).__init__(field)
+        self.function = function
+
+    def test(self, value: Any) -> bool:
+        return value is not NOTSET and bool(self.function(value))
+
+    def __repr__(self):
+        name = getattr(self.function, "__name__", repr(self.function))
+        return f"{name}({self.field})"
+
+
+class LayerQuery:
+    """
+    Lazy query over the entities of a :py:class:`dt_maps.MapLayer`, see
+    :py:meth:`dt_maps.MapLayer.query`.
+
+    Predicates are combined with a logical AND and evaluated on the raw entities, fields are
+    given as dot-separated paths (e.g., ``pose.x``). When the query runs, the planner uses the
+    key index (for :py:meth:`below`) or the hash indices of the layer (for equality and ``in``
+    predicates) to get the smallest set of candidates, the other predicates are checked on the
+    candidates only.
+
+    Iterating over the query yields pairs ``(key, entity)``, or tuples ``(key, *values)`` if
+    the query has a projection (see :py:meth:`select`), in which case no entity helpers
+    are created.
+
+    .. code-block:: python
+
+        stops = map.layers.traffic_signs.query().where(type="stop").select("id")
+        for key, tag_id in stops:
+            ...
+
+    Args:
+        layer (:obj:`dt_maps.MapLayer`):    layer to query
+    """
+
+    def __init__(self, layer):
+        self._layer = layer
+        self._parent: Optional[str] = None
+        self._predicates: List[_Predicate] = []
+        self._fields: Optional[List[Tuple[str, ...]]] = None
+        self._order: List[Tuple[Tuple[str, ...], bool]] = []
+        self._limit: Optional[int] = None
+
+    # builder ==>
+
+    def below(self, parent: str) -> 'LayerQuery':
+        """
+        Only matches entities whose key is below ``parent`` (e.g., ``map_0``).
+        """
+        self._parent = parent
+        return self
+
+    def where(self, **kwargs) -> 'LayerQuery':
+        """
+        Adds equality predicates on top-level fields, e.g., ``where(type="stop")``.
+        Use :py:meth:`equal` for nested fields.
+        """
+        for field, value in kwargs.items():
+            self._predicates.append(_Equal(field, value))
+        return self
+
+    def equal(self, field: str, value: Any) -> 'LayerQuery':
+        """
+        Only matches entities whose field ``field`` is equal to ``value``.
+        Enums are compared by value.
+        """
+        self._predicates.append(_Equal(field, value))
+        return self
+
+    def isin(self, field: str, values: Iterable[Any]) -> 'LayerQuery':
+        """
+        Only matches entities whose field ``field`` is one of ``values``.
+        """
+        self._predicates.append(_In(field, values))
+        return self
+
+    def between(self, field: str, low: Any = None, high: Any = None,
+                inclusive: bool = True) -> 'LayerQuery':
+        """
+        Only matches entities whose field ``field`` is within ``[low, high]`` (or
+        ``(low, high)`` if ``inclusive`` is ``False``). Either bound can be ``None``.
+        """
+        self._predicates.append(_Range(field, low, high, inclusive))
+        return self
+
+    def filter(self, field: str, function: Callable[[Any], bool]) -> 'LayerQuery':
+        """
+        Only matches entities for which ``function`` returns ``True`` when called on the raw
+        value of the field ``field``.
+        """
+        self._predicates.append(_Custom(field, function))
+        return self
+
+    def select(self, *fields: str) -> 'LayerQuery':
+        """
+        Projects the results on the raw values of the given fields, missing fields are
+        returned as ``None``.
+        """
+        self._fields = [tuple(field.split(".")) for field in fields]
+        return self
+
+    def order_by(self, field: str, reverse: bool = False) -> 'LayerQuery':
+        """
+        Sorts the results by the given field, entities without the field come last.
+        Calling this method more than once sorts by multiple fields, in order.
+        """
+        self._order.append((tuple(field.split(".")), reverse))
+        return self
+
+    def limit(self, n: int) -> 'LayerQuery':
+        """
+        Returns at most ``n`` results.
+        """
+        self._limit = n
+        return self
+
+    # builder <==
+
+    def _plan(self) -> Tuple[str, Optional[List[str]], List[_Predicate]]:
+        layer = self._layer
+        candidates = []
+        if self._parent is not None:
+            candidates.append(("keys", layer.descendants(self._parent), None))
+        for predicate in self._predicates:
+            index = layer.index(property_index_name(predicate.field))
+            if index is None:
+                continue
+            keys = predicate.lookup(index)
+            if keys is not None:
+                candidates.append((index.name, keys, predicate))
+        if not candidates:
+            return "scan", None, list(self._predicates)
+        name, keys, covered = min(candidates, key=lambda c: len(c[1]))
+        remaining = [p for p in self._predicates if p is not covered]
+        if name != "keys" and self._parent is not None:
+            # the key index was not picked, check the parent on each candidate
+            prefix = self._parent.rstrip("/") + "/"
+            keys = [key for key in keys if key.startswith(prefix)]
+        return name, keys, remaining
+
+    def explain(self) -> dict:
+        """
+        Describes how the query would run.
+
+        Returns:
+            :obj:`dict`:    the name of the index used to get the candidates (``scan`` if none),
+                            the number of candidates and the predicates checked on each of them
+        """
+        name, keys, remaining = self._plan()
+        return {
+            "index": name,
+            "candidates": len(self._layer) if keys is None else len(keys),
+            "filters": [repr(p) for p in remaining],
+        }
+
+    def _matches(self) -> Iterator[Tuple[str, Any]]:
+        layer = self._layer
+        _, keys, remaining = self._plan()
+        pool = layer.raw_items() if keys is None else ((k, layer._get_raw(k)) for k in keys)
+        for key, raw in pool:
+            if all(p.test(raw_field(raw, p.path, NOTSET)) for p in remaining):
+                yield key, raw
+
+    def _results(self, fields: Optional[List[Tuple[str, ...]]]) -> Iterator[tuple]:
+        matches = self._matches()
+        if self._order:
+            matches = list(matches)
+            # stable sorts, from the least to the most significant field
+            for path, reverse in reversed(self._order):
+                present = [m for m in matches if raw_field(m[1], path, None) is not None]
+                missing = [m for m in matches if raw_field(m[1], path, None) is None]
+                present.sort(key=lambda m: normalize_value(raw_field(m[1], path)),
+                             reverse=reverse)
+                matches = present + missing
+            matches = iter(matches)
+        for n, (key, raw) in enumerate(matches):
+            if self._limit is not None and n >= self._limit:
+                return
+            if fields is None:
+                yield key, self._layer[key]
+            else:
+                yield (key,) + tuple(raw_field(raw, path, None) for path in fields)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return self._results(self._fields)
+
+    def keys(self) -> List[str]:
+        """
+        Keys of the matching entities.
+        """
+        return [result[0] for result in self._results([])]
+
+    def first(self) -> Optional[tuple]:
+        """
+        First result of the query, ``None`` if nothing matches.
+        """
+        return next(iter(self), None)
+
+    def count(self) -> int:
+        """
+        Number of results of the query.
+        """
+        return sum(1 for _ in self._results([]))
@@ -0,0 +1,273 @@
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+import numpy as np
+
+from .exceptions import EntityNotFound, FieldNotFound, InvalidMapLayer
+from .types.map import MapLayer, DEFAULT_LAYER_VERSION
+
+logger = logging.getLogger(__name__)
+
+POSE_FIELDS = ("x", "y", "z", "roll", "pitch", "yaw")
+FRAME_FIELDS = ("relative_to", "pose")
+
+# relative_to index used for frames that are not relative to any other frame
+NO_PARENT = -1
+# relative_to index used for frames relative to a frame that is not part of the snapshot
+EXTERNAL_PARENT = -2
+
+
+def frames_snapshot_dtype(key_length: int) -> np.dtype:
+    return np.dtype(
+        [("key", f"<U{max(key_length, 1)}")] +
+        [(field, "<f8") for field in POSE_FIELDS] +
+        [("relative_to", "<i8")]
+    )
+
+
+def export_frames_snapshot(layer: MapLayer, fpath: str):
+    """
+    Writes all the frames of a ``frames`` layer to a columnar ``.npy`` snapshot.
+
+    Each row of the snapshot contains the key of a frame, its pose and the index of the row
+    of the frame it is relative to (``-1`` if none). Missing pose fields are stored as ``0.0``,
+    any other field is not stored and a warning lists the fields that were dropped.
+
+    Args:
+        layer (:obj:`dt_maps.MapLayer`):    ``frames`` layer to export
+        fpath (:obj:`str`):                 path to the ``.npy`` file to create
+    """
+    raw = layer.as_raw_dict()
+    keys = list(raw.keys())
+    rows = {key: i for i, key in enumerate(keys)}
+    data = np.zeros(len(keys), dtype=frames_snapshot_dtype(max(map(len, keys), default=1)))
+    dropped: Dict[str, List[str]] = {}
+    for i, key in enumerate(keys):
+        frame = raw[key] or {}
+        pose = frame.get("pose", None) or {}
+        for field in frame:
+            if field not in FRAME_FIELDS:
+                dropped.setdefault(field, []).append(key)
+        for field in pose:
+            if field not in POSE_FIELDS:
+                dropped.setdefault(f"pose.{field}", []).append(key)
+        data[i]["key"] = key
+        for field in POSE_FIELDS:
+            data[i][field] = float(pose.get(field, 0.0))
+        relative_to = frame.get("relative_to", None)
+        if relative_to is None:
+            data[i]["relative_to"] = NO_PARENT
+        elif relative_to in rows:
+            data[i]["relative_to"] = rows[relative_to]
+        else:
+            raise InvalidMapLayer(layer.name, f"Frame '{key}' is relative to the frame "
+                                              f"'{relative_to}' which does not exist")
+    if dropped:
+        logger.warning(f"Fields not stored in the frames snapshot '{fpath}': " + ", ".join(
+            f"'{field}' (in {len(frames)} frames, e.g., '{frames[0]}')"
+            for field, frames in sorted(dropped.items())
+        ))
+    np.save(fpath, data, allow_pickle=False)
+
+
+def load_frames_snapshot(m, fpath: str, mmap_mode: Optional[str] = "c",
+                         version: str = DEFAULT_LAYER_VERSION) -> 'FramesSnapshotLayer':
+    """
+    Opens a snapshot created with :py:func:`export_frames_snapshot` as a ``frames`` layer.
+
+    With the default ``mmap_mode="c"`` (copy-on-write), the snapshot is memory-mapped and
+    processes opening the same file share the same physical memory until they write to it.
+
+    Args:
+        m (:obj:`dt_maps.Map`):     map the layer belongs to
+        fpath (:obj:`str`):         path to the ``.npy`` snapshot
+        mmap_mode (:obj:`str`):     memory-mapping mode as in :py:func:`numpy.load`
+        version (:obj:`str`):       version of the layer
+
+    Returns:
+        :obj:`FramesSnapshotLayer`: layer backed by the snapshot
+    """
+    data = np.load(fpath, mmap_mode=mmap_mode, allow_pickle=False)
+    expected = set(POSE_FIELDS) | {"key", "relative_to"}
+    if data.dtype.names is None or set(data.dtype.names) != expected:
+        raise InvalidMapLayer("frames", f"File '{fpath}' is not a valid frames snapshot")
+    return FramesSnapshotLayer(m, data, version=version)
+
+
+class _SnapshotPose(Mapping):
+
+    def __init__(self, layer: 'FramesSnapshotLayer', row: int):
+        self._layer = layer
+        self._row = row
+
+    def __getitem__(self, field: str) -> float:
+        if field not in POSE_FIELDS:
+            raise KeyError(field)
+        return float(self._layer._columns[field][self._row])
+
+    def __setitem__(self, field: str, value: float):
+        if field not in POSE_FIELDS:
+            raise KeyError(field)
+        self._layer.write(self._layer._key(self._row), ("pose", field), value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(POSE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(POSE_FIELDS)
+
+
+class _SnapshotFrame(Mapping):
+
+    def __init__(self, layer: 'FramesSnapshotLayer', row: int):
+        self._layer = layer
+        self._row = row
+
+    def __getitem__(self, field: str) -> Any:
+        if field == "pose":
+            return _SnapshotPose(self._layer, self._row)
+        if field == "relative_to":
+            return self._layer._get_relative_to(self._row)
+        raise KeyError(field)
+
+    def __setitem__(self, field: str, value: Any):
+        if field == "relative_to":
+            self._layer.write(self._layer._key(self._row), ("relative_to",), value)
+        elif field == "pose":
+            for k, v in value.items():
+                _SnapshotPose(self._layer, self._row)[k] = v
+        else:
+            raise KeyError(field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FRAME_FIELDS)
+
+    def __len__(self) -> int:
+        return 2
+
+
+class FramesSnapshotLayer(MapLayer):
+    """
+    A ``frames`` layer backed by a (memory-mapped) columnar snapshot.
+
+    Poses are read from and written to the snapshot arrays directly, no per-frame
+    dictionaries are created. The set of frames in a snapshot layer is fixed, adding, replacing
+    or removing frames raises a :py:class:`TypeError`.
+
+    Args:
+        m (:obj:`dt_maps.Map`):         map the layer belongs to
+        data (:obj:`numpy.ndarray`):    structured array as created by
+                                        :py:func:`export_frames_snapshot`
+    """
+
+    def __init__(self, m, data: np.ndarray, version: str = DEFAULT_LAYER_VERSION):
+        super(FramesSnapshotLayer, self).__init__(m, "frames", version)
+        self._data = data
+        # views on the columns of the snapshot, avoids creating new views at each access
+        self._columns: Dict[str, np.ndarray] = {
+            field: data[field] for field in POSE_FIELDS + ("key", "relative_to")
+        }
+        # frames relative to frames that are not part of the snapshot
+        self._external: Dict[int, str] = {}
+        # the underlying dictionary maps frame keys to rows in the snapshot
+        dict.update(self, ((str(key), row) for row, key in enumerate(self._columns["key"])))
+        for index in self._indices.values():
+            index.rebuild()
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        Structured array holding the frames.
+        """
+        return self._data
+
+    def _row(self, key: str) -> int:
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            raise EntityNotFound(self._name, key=key)
+
+    def _key(self, row: int) -> str:
+        return str(self._columns["key"][row])
+
+    def _get_raw(self, key: str) -> Mapping:
+        return _SnapshotFrame(self, self._row(key))
+
+    def _get_relative_to(self, row: int) -> Optional[str]:
+        parent = int(self._columns["relative_to"][row])
+        if parent == NO_PARENT:
+            return None
+        if parent == EXTERNAL_PARENT:
+            return self._external[row]
+        return self._key(parent)
+
+    def _set_relative_to(self, row: int, value: Optional[str]):
+        self._dirty = True
+        self._external.pop(row, None)
+        if value is None:
+            self._columns["relative_to"][row] = NO_PARENT
+        elif value in self:
+            self._columns["relative_to"][row] = dict.__getitem__(self, value)
+        else:
+            self._columns["relative_to"][row] = EXTERNAL_PARENT
+            self._external[row] = value
+
+    def read(self, key: str, field_path: Union[str, Iterable[str]]):
+        field_path = field_path if isinstance(field_path, (list, tuple)) else [field_path]
+        row = self._row(key)
+        # fast path: read straight from the arrays
+        if len(field_path) == 2 and field_path[0] == "pose" and field_path[1] in POSE_FIELDS:
+            return float(self._columns[field_path[1]][row])
+        if len(field_path) == 1 and field_path[0] == "relative_to":
+            return self._get_relative_to(row)
+        return super(FramesSnapshotLayer, self).read(key, field_path)
+
+    def write(self, key: str, field_path: Union[str, Iterable[str]], value: Any):
+        field_path = field_path if isinstance(field_path, (list, tuple)) else [field_path]
+        row = self._row(key)
+        if len(field_path) == 2 and field_path[0] == "pose" and field_path[1] in POSE_FIELDS:
+            old = float(self._columns[field_path[1]][row])
+            self._columns[field_path[1]][row] = value
+            self._dirty = True
+            self._notify_update(key, field_path, old, value)
+            return
+        if len(field_path) == 1 and field_path[0] == "relative_to":
+            old = self._get_relative_to(row)
+            self._set_relative_to(row, value)
+            self._notify_update(key, field_path, old, value)
+            return
+        raise FieldNotFound(key, self._name, '.'.join(field_path))
+
+    def _read_only(self) -> TypeError:
+        return TypeError(f"The set of frames of the snapshot layer '{self._name}' is "
+                         f"read-only, frames cannot be added, replaced or removed. Only the "
+                         f"fields 'pose' and 'relative_to' of existing frames can be changed.")
+
+    def __setitem__(self, key: str, value: Any):
+        raise self._read_only()
+
+    def __delitem__(self, key: str):
+        raise self._read_only()
+
+    def pop(self, key: str, *args) -> Any:
+        raise self._read_only()
+
+    def popitem(self):
+        raise self._read_only()
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        raise self._read_only()
+
+    def update(self, *args, **kwargs):
+        raise self._read_only()
+
+    def clear(self):
+        raise self._read_only()
+
+    def as_raw_dict(self):
+        return {
+            key: {
+                "relative_to": self._get_relative_to(row),
+                "pose": {field: float(self._columns[field][row]) for field in POSE_FIELDS}
+            } for key, row in dict.items(self)
+        }
@@ -0,0 +1,406 @@
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .indices import LayerIndex, raw_field
+from .indices.frames import FrameTree
+from .snapshots import POSE_FIELDS, FramesSnapshotLayer
+
+IDENTITY = np.eye(4)
+IDENTITY.flags.writeable = False
+
+
+def pose_to_matrix(x: float = 0.0, y: float = 0.0, z: float = 0.0,
+                   roll: float = 0.0, pitch: float = 0.0, yaw: float = 0.0) -> np.ndarray:
+    """
+    Homogeneous transformation matrix of a pose, the rotation is ``Rz(yaw) Ry(pitch) Rx(roll)``.
+
+    Returns:
+        :obj:`numpy.ndarray`:   4x4 matrix
+    """
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    return np.array([
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr, x],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr, y],
+        [-sp, cp * sr, cp * cr, z],
+        [0.0, 0.0, 0.0, 1.0],
+    ])
+
+
+def poses_to_matrices(poses: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of :py:func:`pose_to_matrix`.
+
+    Args:
+        poses (:obj:`numpy.ndarray`):   Nx6 array of poses ``(x, y, z, roll, pitch, yaw)``
+
+    Returns:
+        :obj:`numpy.ndarray`:           Nx4x4 array of matrices
+    """
+    poses = np.asarray(poses, dtype=float).reshape((-1, 6))
+    cr, sr = np.cos(poses[:, 3]), np.sin(poses[:, 3])
+    cp, sp = np.cos(poses[:, 4]), np.sin(poses[:, 4])
+    cy, sy = np.cos(poses[:, 5]), np.sin(poses[:, 5])
+    T = np.zeros((poses.shape[0], 4, 4))
+    T[:, 0, 0] = cy * cp
+    T[:, 0, 1] = cy * sp * sr - sy * cr
+    T[:, 0, 2] = cy * sp * cr + sy * sr
+    T[:, 1, 0] = sy * cp
+    T[:, 1, 1] = sy * sp * sr + cy * cr
+    T[:, 1, 2] = sy * sp * cr - cy * sr
+    T[:, 2, 0] = -sp
+    T[:, 2, 1] = cp * sr
+    T[:, 2, 2] = cp * cr
+    T[:, :3, 3] = poses[:, :3]
+    T[:, 3, 3] = 1.0
+    return T
+
+
+def matrix_to_pose(T: np.ndarray) -> Dict[str, float]:
+    """
+    Pose (i.e., ``x``, ``y``, ``z``, ``roll``, ``pitch``, ``yaw``) of a homogeneous
+    transformation matrix, inverse of :py:func:`pose_to_matrix`.
+    """
+    return {
+        "x": float(T[0, 3]),
+        "y": float(T[1, 3]),
+        "z": float(T[2, 3]),
+        "roll": math.atan2(T[2, 1], T[2, 2]),
+        "pitch": math.atan2(-T[2, 0], math.hypot(T[2, 1], T[2, 2])),
+        "yaw": math.atan2(T[1, 0], T[0, 0]),
+    }
+
+
+def invert_transform(T: np.ndarray) -> np.ndarray:
+    """
+    Inverse of a rigid-body transformation matrix.
+    """
+    inv = np.eye(4)
+    R = T[:3, :3].T
+    inv[:3, :3] = R
+    inv[:3, 3] = -R @ T[:3, 3]
+    return inv
+
+
+def raw_pose(raw: Any) -> Tuple[float, ...]:
+    """
+    Pose of a raw frame as a tuple ``(x, y, z, roll, pitch, yaw)``, missing fields are ``0.0``.
+    """
+    pose = raw_field(raw, ("pose",), None) or {}
+    return tuple(float(pose.get(field, None) or 0.0) for field in POSE_FIELDS)
+
+
+def local_poses(layer, keys: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Local poses of the frames of a ``frames`` layer, missing fields are ``0.0``.
+    Poses of snapshot layers are read straight from the columns of the snapshot.
+
+    Args:
+        layer (:obj:`dt_maps.MapLayer`):    ``frames`` layer
+        keys (:obj:`list`):                 keys of the frames, all the frames if ``None``
+
+    Returns:
+        :obj:`numpy.ndarray`:               Nx6 array of poses ``(x, y, z, roll, pitch, yaw)``
+    """
+    if isinstance(layer, FramesSnapshotLayer):
+        columns = layer._columns
+        if keys is None:
+            return np.stack([columns[field] for field in POSE_FIELDS], axis=1).astype(float)
+        rows = np.fromiter((layer._row(key) for key in keys), dtype=np.int64, count=len(keys))
+        return np.stack([columns[field][rows] for field in POSE_FIELDS], axis=1).astype(float)
+    if keys is None:
+        keys = list(layer.keys())
+    poses = np.zeros((len(keys), 6))
+    for i, key in enumerate(keys):
+        poses[i] = raw_pose(layer._get_raw(key))
+    return poses
+
+
+class FrameTransformsCache(LayerIndex):
+    """
+    Index of the ``frames`` layer caching the world transforms of the frames.
+
+    A cached transform is dropped as soon as the pose or the ``relative_to`` field of the
+    frame or of any frame it is (transitively) relative to changes. The ``relative_to``
+    hierarchy is read from the :py:class:`dt_maps.indices.frames.FrameTree` of the layer.
+    """
+
+    name = "transforms"
+
+    def __init__(self):
+        super(FrameTransformsCache, self).__init__()
+        self._tree: Optional[FrameTree] = None
+        # frame -> world transform
+        self._world: Dict[str, np.ndarray] = {}
+        # frame -> inverse of the world transform
+        self._world_inv: Dict[str, np.ndarray] = {}
+        # functions called with the key of each frame whose transform is dropped
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._world)
+
+    def attach(self, layer):
+        tree = layer.index(FrameTree.name)
+        if tree is None:
+            tree = FrameTree()
+            layer.add_index(tree)
+        self._tree = tree
+        super(FrameTransformsCache, self).attach(layer)
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]):
+        """
+        Registers a function called with the key of every frame whose world transform is
+        dropped from the cache, or with ``None`` when the whole cache is dropped.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Optional[str]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _base(self, frame: str) -> np.ndarray:
+        # world transform of the frame the given frame is relative to
+        relative_to = self._tree.relative_to(frame)
+        return IDENTITY if relative_to is None else self._world[relative_to]
+
+    def world(self, key: str) -> np.ndarray:
+        T = self._world.get(key, None)
+        if T is not None:
+            return T
+        # the frames on the way to the world (or to a cached frame) are cached as well
+        order = self._tree.topological_order([key], resolved=self._world)
+        T = self._base(order[0])
+        for frame in order:
+            T = T @ pose_to_matrix(*raw_pose(self._layer._get_raw(frame)))
+            T.flags.writeable = False
+            self._world[frame] = T
+        return T
+
+    def world_many(self, keys: Sequence[str]) -> np.ndarray:
+        """
+        Vectorized version of :py:meth:`world`. The frames that are not cached are resolved
+        level by level, all the frames at the same distance from a cached frame (or from the
+        world) are composed in a single batched matrix product.
+        """
+        order = self._tree.topological_order(keys, resolved=self._world)
+        if order:
+            position = {frame: i for i, frame in enumerate(order)}
+            parents = [position.get(self._tree.relative_to(frame), -1) for frame in order]
+            depth = np.zeros(len(order), dtype=np.int64)
+            for i, parent in enumerate(parents):
+                depth[i] = depth[parent] + 1 if parent >= 0 else 0
+            L = poses_to_matrices(local_poses(self._layer, order))
+            W = np.empty_like(L)
+            # frames relative to the world or to a cached frame
+            roots = np.flatnonzero(depth == 0)
+            W[roots] = np.stack([self._base(order[i]) for i in roots]) @ L[roots]
+            for level in range(1, int(depth.max()) + 1):
+                rows = np.flatnonzero(depth == level)
+                W[rows] = W[[parents[i] for i in rows]] @ L[rows]
+            W.flags.writeable = False
+            for i, frame in enumerate(order):
+                self._world[frame] = W[i]
+        if len(keys) == 0:
+            return np.zeros((0, 4, 4))
+        return np.stack([self._world[key] for key in keys])
+
+    def world_inv(self, key: str) -> np.ndarray:
+        T = self._world_inv.get(key, None)
+        if T is None:
+            T = invert_transform(self.world(key))
+            T.flags.writeable = False
+            self._world_inv[key] = T
+        return T
+
+    def invalidate(self, key: str):
+        """
+        Drops the cached transforms of ``key`` and of all the frames relative to it.
+        """
+        stack = [key]
+        while stack:
+            frame = stack.pop()
+            self._world_inv.pop(frame, None)
+            # frames are cached together with their whole chain, if a frame is not cached,
+            # none of the frames relative to it are
+            if self._world.pop(frame, None) is None and frame != key:
+                continue
+            for listener in self._listeners:
+                listener(frame)
+            stack.extend(self._tree.dependents(frame))
+
+    def clear(self):
+        self._world.clear()
+        self._world_inv.clear()
+        for listener in self._listeners:
+            listener(None)
+
+    def on_insert(self, key: str, raw: Any):
+        self.invalidate(key)
+
+    def on_remove(self, key: str, raw: Any):
+        self.invalidate(key)
+
+    def on_update(self, key: str, field_path: Tuple[str, ...], old: Any, new: Any):
+        if field_path and field_path[0] in ("pose", "relative_to"):
+            self.invalidate(key)
+
+
+class TransformEngine:
+    """
+    Resolves the poses of the frames of a map in the world frame.
+
+    Frames are chained through their ``relative_to`` field, a frame that is not relative to
+    any other frame is relative to the world. World transforms are cached and the cache is
+    invalidated when the pose or ``relative_to`` of a frame changes through the map API.
+    Use :py:attr:`dt_maps.Map.transforms` to get the engine of a map.
+
+    Args:
+        m (:obj:`dt_maps.Map`):     map whose frames are resolved
+    """
+
+    def __init__(self, m):
+        self._map = m
+
+    @property
+    def cache(self) -> FrameTransformsCache:
+        """
+        Cache of the world transforms, attached to the current ``frames`` layer.
+        """
+        frames = self._map.layers.frames
+        cache = frames.index(FrameTransformsCache.name)
+        if cache is None:
+            cache = FrameTransformsCache()
+            frames.add_index(cache)
+        return cache
+
+    def local(self, frame: str) -> np.ndarray:
+        """
+        Transform of a frame relative to the frame it is relative to.
+
+        Args:
+            frame (:obj:`str`):     key of the frame
+
+        Returns:
+            :obj:`numpy.ndarray`:   4x4 homogeneous transformation matrix
+        """
+        return pose_to_matrix(*raw_pose(self._map.layers.frames._get_raw(frame)))
+
+    def world(self, frame: str) -> np.ndarray:
+        """
+        Transform from the given frame to the world frame, i.e., the pose of the frame in
+        the world frame.
+
+        Args:
+            frame (:obj:`str`):     key of the frame
+
+        Returns:
+            :obj:`numpy.ndarray`:   read-only 4x4 homogeneous transformation matrix
+        """
+        return self.cache.world(frame)
+
+    def world_pose(self, frame: str) -> Dict[str, float]:
+        """
+        Pose of the given frame in the world frame.
+
+        Args:
+            frame (:obj:`str`):     key of the frame
+
+        Returns:
+            :obj:`dict`:            ``x``, ``y``, ``z``, ``roll``, ``pitch`` and ``yaw``
+        """
+        return matrix_to_pose(self.cache.world(frame))
+
+    def transform(self, source: Optional[str], target: Optional[str]) -> np.ndarray:
+        """
+        Transform taking coordinates in the frame ``source`` to the frame ``target``.
+
+        Args:
+            source (:obj:`str`):    key of the source frame, ``None`` for the world frame
+            target (:obj:`str`):    key of the target frame, ``None`` for the world frame
+
+        Returns:
+            :obj:`numpy.ndarray`:   4x4 homogeneous transformation matrix
+        """
+        cache = self.cache
+        T_source = IDENTITY if source is None else cache.world(source)
+        if target is None:
+            return T_source.copy()
+        return cache.world_inv(target) @ T_source
+
+    def local_poses(self, frames: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Local poses of many frames at once.
+
+        Args:
+            frames (:obj:`list`):   keys of the frames, all the frames if ``None``
+
+        Returns:
+            :obj:`numpy.ndarray`:   Nx6 array of poses ``(x, y, z, roll, pitch, yaw)``
+        """
+        return local_poses(self._map.layers.frames, frames)
+
+    def world_matrices(self, frames: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        World transforms of many frames at once.
+
+        Args:
+            frames (:obj:`list`):   keys of the frames, all the frames if ``None``
+
+        Returns:
+            :obj:`numpy.ndarray`:   Nx4x4 array of homogeneous transformation matrices
+        """
+        if frames is None:
+            frames = list(self._map.layers.frames.keys())
+        return self.cache.world_many(frames)
+
+    def world_positions(self, frames: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Positions of many frames in the world frame.
+
+        Args:
+            frames (:obj:`list`):   keys of the frames, all the frames if ``None``
+
+        Returns:
+            :obj:`numpy.ndarray`:   Nx3 array of positions
+        """
+        return self.world_matrices(frames)[:, :3, 3]
+
+    def transform_points(self, points: np.ndarray, source: Optional[str],
+                         target: Optional[str]) -> np.ndarray:
+        """
+        Transforms points from the frame ``source`` to the frame ``target``.
+
+        Args:
+            points (:obj:`numpy.ndarray`):  Nx3 array of points, or Nx2 for points with ``z=0``
+            source (:obj:`str`):            key of the source frame, ``None`` for the world
+            target (:obj:`str`):            key of the target frame, ``None`` for the world
+
+        Returns:
+            :obj:`numpy.ndarray`:           array of transformed points, same shape as ``points``
+        """
+        points = np.asarray(points, dtype=float)
+        planar = points.shape[-1] == 2
+        if planar:
+            points = np.concatenate([points, np.zeros(points.shape[:-1] + (1,))], axis=-1)
+        T = self.transform(source, target)
+        result = points @ T[:3, :3].T + T[:3, 3]
+        return result[..., :2] if planar else result
+
+    def invalidate(self, frame: Optional[str] = None):
+        """
+        Drops the cached transforms of ``frame`` and of the frames relative to it, or all of
+        them if ``frame`` is ``None``. Only needed after editing the raw content of the frames
+        layer directly.
+
+        Args:
+            frame (:obj:`str`):     key of the frame
+        """
+        cache = self.cache
+        if frame is None:
+            cache.rebuild()
+        else:
+            cache.invalidate(frame)
@@ -1 +1 @@
-from .map import MapLayer, MapAsset
+from .map import MapLayer, MapAsset, MapAssetCache
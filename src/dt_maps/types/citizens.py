@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Union, Iterable, Optional, Any
 
+from dt_maps.indices.spatial import SpatialIndex
 from dt_maps.types.commons import EntityHelper, FieldPath
 from dt_maps.types.frames import Frame
 
@@ -16,6 +17,7 @@ class CitizenType(Enum):
 
 class Citizen(EntityHelper):
     LAYER_NAME: str = "citizens"
+    INDICES = (SpatialIndex,)
 
     def _get_property_values(self, name: str) -> Optional[Iterable[Any]]:
         return {
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Any, Iterable, Union, Optional, Dict, Tuple
+from typing import Any, Iterable, Union, Optional, Dict, Tuple, Callable
 
 from dt_maps.exceptions import FieldNotFound, assert_type
 
@@ -16,6 +16,10 @@ class EntityHelper(Dict):
     # instance for the same (map, layer, key) pair we simply retrieve the already existing object (if any).
     #   NOTE: lazy instantiation is needed
     _instances: Dict[Tuple[MapID, LayerName, EntityKey], 'EntityHelper'] = None
+    # factories of the indices (see dt_maps.indices) attached to layers using this helper
+    INDICES: Tuple[Callable[[], Any], ...] = ()
+    # fields with a hash index (see dt_maps.indices.properties) used by MapLayer.filter
+    INDEXED_FIELDS: Tuple[str, ...] = ()
 
     def __init__(self, map, layer: str, key: str, *_, **__):
         super().__init__()
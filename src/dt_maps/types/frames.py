@@ -1,12 +1,13 @@
-from typing import Optional, Any, Union, Iterable
+from typing import Optional, Any, Union, Iterable, List
 
-from dt_maps.exceptions import EntityNotFound
+from dt_maps.indices.frames import FrameTree
 from dt_maps.types.commons import EntityHelper
 from dt_maps.types.geometry import Pose3D
 
 
 class Frame(EntityHelper):
     LAYER_NAME: str = "frames"
+    INDICES = (FrameTree,)
 
     def _get_property_types(self, name: str) -> Union[type, Iterable[type]]:
         return {
@@ -25,18 +26,15 @@ class Frame(EntityHelper):
 
     @property
     def parent(self) -> 'Optional[Frame]':
-        parts = self.key.split('/')[:-1]
-        current = []
-        parent = None
-        for part in parts:
-            current += [part]
-            parent_key = '/'.join(current)
-            try:
-                parent = self._map.layers.frames[parent_key]
-            except EntityNotFound:
-                pass
-        # ---
-        return parent
+        frames = self._map.layers.frames
+        # the parent is the closest existing ancestor
+        parent = frames.index(FrameTree.name).parent(self.key)
+        return None if parent is None else frames[parent]
+
+    @property
+    def children(self) -> 'List[Frame]':
+        frames = self._map.layers.frames
+        return [frames[key] for key in frames.index(FrameTree.name).children(self.key)]
 
     @property
     def pose(self) -> Pose3D:
@@ -48,4 +46,4 @@ class Frame(EntityHelper):
 
     @relative_to.setter
     def relative_to(self, value: Optional[str]):
-        self._set_property("relative_to", (str, None), value)
+        self._set_property("relative_to", (str, type(None)), value)
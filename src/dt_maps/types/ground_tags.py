@@ -1,5 +1,6 @@
 from typing import Union, Iterable, Optional, Any
 
+from dt_maps.indices.spatial import SpatialIndex
 from dt_maps.types.commons import EntityHelper, FieldPath
 from dt_maps.types.frames import Frame
 
@@ -10,6 +11,8 @@ FAMILY = "family"
 
 class GroundTag(EntityHelper):
     LAYER_NAME: str = "ground_tags"
+    INDICES = (SpatialIndex,)
+    INDEXED_FIELDS = (ID,)
 
     def _get_property_values(self, name: str) -> Optional[Iterable[Any]]:
         return {
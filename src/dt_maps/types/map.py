@@ -1,5 +1,11 @@
+import asyncio
+import io
+import mmap
 import os
-
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor, Future
 from types import SimpleNamespace
 from typing import \
     TextIO,\
@@ -13,10 +19,16 @@ from typing import \
     Any,\
     Iterable,\
     ItemsView,\
-    ValuesView
+    ValuesView,\
+    Callable,\
+    List
 
 from ..constants import NOTSET
 from ..exceptions import EntityNotFound, FieldNotFound
+from ..indices import LayerIndex
+from ..indices.keys import KeyTrie
+from ..indices.properties import PropertyIndex, normalize_value, property_index_name
+from ..query import LayerQuery
 from .commons import EntityHelper
 from .frames import Frame
 from .tile_maps import TileMap
@@ -37,12 +49,19 @@ class MapAsset:
     """
     Class representing a map asset.
 
+    Assets created through :py:meth:`dt_maps.Map.asset` are backed by the map's
+    :py:class:`MapAssetCache`, their content is read from disk only once.
+
     Args:
-        fpath (:obj:`str`):     path to the asset
+        fpath (:obj:`str`):             path to the asset
+        cache (:obj:`MapAssetCache`):   cache serving the asset (if any)
+        key (:obj:`str`):               key of the asset in the cache
     """
 
-    def __init__(self, fpath: str):
+    def __init__(self, fpath: str, cache: Optional['MapAssetCache'] = None, key: Optional[str] = None):
         self._fpath = fpath
+        self._cache = cache
+        self._key = key
 
     @property
     def fpath(self) -> str:
@@ -55,6 +74,8 @@ class MapAsset:
         """
         Whether the asset exists on disk
         """
+        if self._cache is not None:
+            return self._cache.exists(self._key)
         return os.path.isfile(self._fpath)
 
     def read(self, mode: str) -> Union[str, bytes]:
@@ -67,9 +88,42 @@ class MapAsset:
         Returns:
             :obj:`str,bytes`:      asset file content
         """
+        if self._cache is not None and "r" in mode and "+" not in mode:
+            data = self._cache.read(self._key)
+            if "b" in mode:
+                return data
+            # decode as open() would do in text mode
+            return io.TextIOWrapper(io.BytesIO(data)).read()
         with open(self._fpath, mode) as fin:
             return fin.read()
 
+    async def read_async(self, mode: str, executor: Optional[Executor] = None) -> Union[str, bytes]:
+        """
+        Awaitable version of :py:meth:`read`, the file is read in ``executor`` (defaults to
+        the event loop's default executor).
+
+        Args:
+            mode (:obj:`str`):              reading mode as in :py:meth:`open`
+            executor (:obj:`Executor`):     executor used to read the file
+
+        Returns:
+            :obj:`str,bytes`:      asset file content
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.read, mode)
+
+    def buffer(self) -> memoryview:
+        """
+        Read-only, zero-copy view on the content of the asset. Large assets are memory-mapped.
+
+        Returns:
+            :obj:`memoryview`:      asset file content
+        """
+        if self._cache is not None:
+            return self._cache.buffer(self._key)
+        with open(self._fpath, "rb") as fin:
+            return memoryview(fin.read())
+
     def write(self, mode: str, data: Union[str, bytes]):
         """
         Writes the content of ``data`` to the asset file on disk.
@@ -79,8 +133,11 @@ class MapAsset:
             data (:obj:`str,bytes`):    asset content to write to disk
         """
         self.make_dirs()
-        with open(self._fpath, mode) as fout:
-            return fout.write(data)
+        try:
+            with open(self._fpath, mode) as fout:
+                return fout.write(data)
+        finally:
+            self._invalidate()
 
     def open(self, mode: str) -> TextIO:
         """
@@ -90,7 +147,10 @@ class MapAsset:
             mode (:obj:`str`):   mode as in :py:meth:`open`
         """
         self.make_dirs()
-        return open(self._fpath, mode)
+        f = open(self._fpath, mode)
+        if "r" not in mode or "+" in mode:
+            self._invalidate()
+        return f
 
     def make_dirs(self):
         """
@@ -98,6 +158,240 @@ class MapAsset:
         """
         os.makedirs(os.path.dirname(self._fpath), exist_ok=True)
 
+    def _invalidate(self):
+        if self._cache is not None:
+            self._cache.invalidate(self._key)
+
+
+class MapAssetCache:
+    """
+    In-memory cache for the assets of a map.
+
+    The content of the assets directory is indexed once, so that asset lookups do not hit the
+    filesystem. Asset contents are kept in memory up to ``budget`` bytes, the least recently
+    used ones are evicted first. Assets larger than ``mmap_threshold`` bytes are not copied
+    into the cache, they are memory-mapped instead.
+
+    Changes made through :py:class:`MapAsset` objects are tracked, use :py:meth:`refresh`
+    after changing the assets directory by other means.
+
+    Args:
+        assets_dir (:obj:`str`):    path to the assets directory
+        budget (:obj:`int`):        maximum number of bytes kept in memory
+        mmap_threshold (:obj:`int`): size (in bytes) above which assets are memory-mapped
+        workers (:obj:`int`):       number of threads used by :py:meth:`prefetch`
+    """
+
+    def __init__(self, assets_dir: str, budget: int = 64 * 1024 * 1024,
+                 mmap_threshold: int = 1024 * 1024, workers: int = 4):
+        self._assets_dir = assets_dir
+        self._budget = budget
+        self._mmap_threshold = mmap_threshold
+        self._workers = workers
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, int]] = None
+        self._assets: Dict[str, MapAsset] = {}
+        self._data: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._size: int = 0
+        self._mmaps: Dict[str, mmap.mmap] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_finalizer: Optional[weakref.finalize] = None
+
+    @property
+    def budget(self) -> int:
+        """
+        Maximum number of bytes kept in memory.
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int):
+        with self._lock:
+            self._budget = value
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """
+        Number of bytes currently kept in memory.
+        """
+        return self._size
+
+    def asset(self, key: str) -> MapAsset:
+        """
+        Returns the (unique) :py:class:`MapAsset` object for the asset with key ``key``.
+
+        Args:
+            key (:obj:`str`):   key of the asset
+
+        Returns:
+            :obj:`MapAsset`:    asset object
+        """
+        with self._lock:
+            asset = self._assets.get(key, None)
+            if asset is None:
+                asset = MapAsset(os.path.join(self._assets_dir, key), cache=self, key=key)
+                self._assets[key] = asset
+            return asset
+
+    def keys(self) -> List[str]:
+        """
+        Keys of all the assets in the assets directory.
+        """
+        return list(self._get_index().keys())
+
+    def exists(self, key: str) -> bool:
+        return key in self._get_index()
+
+    def read(self, key: str) -> bytes:
+        """
+        Content of the asset with key ``key``.
+
+        Args:
+            key (:obj:`str`):   key of the asset
+
+        Returns:
+            :obj:`bytes`:       asset file content
+        """
+        with self._lock:
+            data = self._data.get(key, None)
+            if data is not None:
+                self._data.move_to_end(key)
+                return data
+        if self._is_large(key):
+            return self._mmap(key)[:]
+        return self._load(key)
+
+    def buffer(self, key: str) -> memoryview:
+        """
+        Read-only view on the content of the asset with key ``key``.
+
+        Args:
+            key (:obj:`str`):   key of the asset
+
+        Returns:
+            :obj:`memoryview`:  asset file content
+        """
+        # views on read-only maps and on bytes are read-only
+        if self._is_large(key):
+            return memoryview(self._mmap(key))
+        return memoryview(self.read(key))
+
+    def prefetch(self, keys: Iterable[str]) -> List[Future]:
+        """
+        Loads the given assets in the background.
+
+        Args:
+            keys (:obj:`list`): keys of the assets to load
+
+        Returns:
+            :obj:`list`:        one :py:class:`concurrent.futures.Future` per asset
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers,
+                                                thread_name_prefix="MapAssetCache")
+                # the threads are released when the cache is closed or garbage collected
+                self._pool_finalizer = weakref.finalize(self, self._pool.shutdown, False)
+            return [self._pool.submit(self.buffer, key) for key in keys]
+
+    def close(self):
+        """
+        Stops the threads used by :py:meth:`prefetch` (waiting for the pending loads) and
+        drops all cached contents. The cache can still be used afterwards.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+            finalizer, self._pool_finalizer = self._pool_finalizer, None
+        if finalizer is not None:
+            finalizer.detach()
+        if pool is not None:
+            pool.shutdown(wait=True)
+        self.refresh()
+
+    def invalidate(self, key: str):
+        """
+        Drops the cached content of an asset and updates its index entry.
+
+        Args:
+            key (:obj:`str`):   key of the asset
+        """
+        with self._lock:
+            data = self._data.pop(key, None)
+            if data is not None:
+                self._size -= len(data)
+            mm = self._mmaps.pop(key, None)
+            if self._index is not None:
+                fpath = os.path.join(self._assets_dir, key)
+                if os.path.isfile(fpath):
+                    self._index[key] = os.path.getsize(fpath)
+                else:
+                    self._index.pop(key, None)
+        if mm is not None:
+            self._close_mmap(mm)
+
+    def refresh(self):
+        """
+        Drops all cached contents and indexes the assets directory again.
+        """
+        with self._lock:
+            self._index = None
+            self._data.clear()
+            self._size = 0
+            mmaps, self._mmaps = list(self._mmaps.values()), {}
+        for mm in mmaps:
+            self._close_mmap(mm)
+
+    @staticmethod
+    def _close_mmap(mm: mmap.mmap):
+        try:
+            mm.close()
+        except BufferError:
+            # views on the map are still alive, it will be released with the last of them
+            pass
+
+    def _get_index(self) -> Dict[str, int]:
+        with self._lock:
+            if self._index is None:
+                index = {}
+                for dirpath, _, filenames in os.walk(self._assets_dir):
+                    for filename in filenames:
+                        fpath = os.path.join(dirpath, filename)
+                        key = os.path.relpath(fpath, self._assets_dir).replace(os.sep, "/")
+                        index[key] = os.path.getsize(fpath)
+                self._index = index
+            return self._index
+
+    def _is_large(self, key: str) -> bool:
+        index = self._get_index()
+        if key not in index:
+            raise FileNotFoundError(f"Asset '{key}' not found in '{self._assets_dir}'")
+        return index[key] > self._mmap_threshold
+
+    def _mmap(self, key: str) -> mmap.mmap:
+        with self._lock:
+            mm = self._mmaps.get(key, None)
+            if mm is None:
+                with open(os.path.join(self._assets_dir, key), "rb") as fin:
+                    mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mmaps[key] = mm
+            return mm
+
+    def _load(self, key: str) -> bytes:
+        with open(os.path.join(self._assets_dir, key), "rb") as fin:
+            data = fin.read()
+        with self._lock:
+            if key not in self._data and len(data) <= self._budget:
+                self._data[key] = data
+                self._size += len(data)
+                self._evict()
+        return data
+
+    def _evict(self):
+        while self._size > self._budget and self._data:
+            _, data = self._data.popitem(last=False)
+            self._size -= len(data)
+
 
 class MapLayer(Dict[str, ET], Generic[ET]):
     """
@@ -122,7 +416,13 @@ class MapLayer(Dict[str, ET], Generic[ET]):
         self._version: str = version
         self._ET: Optional[type(ET)] = None
         self._cache: Dict[str, ET] = {}
+        # new layers need to be written to disk, layers loaded from disk are marked clean
+        self._dirty: bool = True
+        self._indices: Dict[str, LayerIndex] = {}
         super(MapLayer, self).__init__(**kwargs)
+        # every layer keeps a hierarchical index of its keys
+        self._keys: KeyTrie = KeyTrie()
+        self.add_index(self._keys)
 
     @property
     def name(self) -> str:
@@ -132,6 +432,28 @@ class MapLayer(Dict[str, ET], Generic[ET]):
     def version(self) -> str:
         return self._version
 
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Whether the layer was modified since it was last loaded from or saved to disk.
+        """
+        return self._dirty
+
+    def mark_dirty(self):
+        """
+        Marks the layer as modified.
+        Changes made through :py:meth:`write`, entity helpers and dictionary methods on the
+        layer itself are tracked automatically, changes made to raw nested dictionaries
+        (e.g., ``layer["key"]["field"] = value`` on layers without entity helpers) are not.
+        """
+        self._dirty = True
+
+    def mark_clean(self):
+        """
+        Marks the layer as in sync with its copy on disk.
+        """
+        self._dirty = False
+
     def _get_raw(self, key: str) -> dict:
         # get item from underlying dictionary
         try:
@@ -167,7 +489,129 @@ class MapLayer(Dict[str, ET], Generic[ET]):
     def write(self, key: str, field_path: Union[str, Iterable[str]], value: Any):
         field_path = field_path if isinstance(field_path, (list, tuple)) else [field_path]
         field_parent = self.read(key, field_path[:-1])
+        old = field_parent.get(field_path[-1], None) if self._indices else None
         field_parent[field_path[-1]] = value
+        self._dirty = True
+        self._notify_update(key, field_path, old, value)
+
+    def raw_items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterates over the raw entities (i.e., not wrapped by entity helpers) in the layer.
+
+        Return:
+            :obj:`iterator`     pairs ``(key, raw entity)``
+        """
+        for key in self.keys():
+            yield key, self._get_raw(key)
+
+    def add_index(self, index: LayerIndex):
+        """
+        Attaches an index to the layer. The index is built right away and kept up-to-date
+        as the layer changes.
+
+        Args:
+            index (:obj:`dt_maps.indices.LayerIndex`):  index to attach
+        """
+        index.attach(self)
+        self._indices[index.name] = index
+
+    def index(self, name: str) -> Optional[LayerIndex]:
+        """
+        Returns the index with the given name, ``None`` if the layer has no such index.
+
+        Args:
+            name (:obj:`str`):  name of the index
+        """
+        return self._indices.get(name, None)
+
+    def children(self, key: str) -> List[str]:
+        """
+        Keys of the entities exactly one level below ``key`` (e.g., ``map_0/tile_0_0`` is a
+        child of ``map_0``).
+
+        Args:
+            key (:obj:`str`):   parent key, use an empty string for the top level
+        """
+        return self._keys.children(key)
+
+    def descendants(self, key: str) -> List[str]:
+        """
+        Keys of all the entities below ``key``.
+
+        Args:
+            key (:obj:`str`):   parent key
+        """
+        return self._keys.descendants(key)
+
+    def ancestors(self, key: str) -> List[str]:
+        """
+        Keys of the existing entities above ``key``, from the top-most to the closest one.
+
+        Args:
+            key (:obj:`str`):   key of the entity
+        """
+        return self._keys.ancestors(key)
+
+    def glob(self, pattern: str) -> List[str]:
+        """
+        Keys matching a glob pattern (e.g., ``map_0/tile_*``), wildcards match within a
+        single level of the key.
+
+        Args:
+            pattern (:obj:`str`):   glob pattern
+        """
+        return self._keys.glob(pattern)
+
+    def _notify_update(self, key: str, field_path: Iterable[str], old: Any, new: Any):
+        for index in self._indices.values():
+            index.on_update(key, tuple(field_path), old, new)
+
+    def _notify_set(self, key: str, old: Any, new: Any):
+        self._cache.pop(key, None)
+        self._dirty = True
+        for index in self._indices.values():
+            if old is not NOTSET:
+                index.on_remove(key, old)
+            if new is not NOTSET:
+                index.on_insert(key, new)
+
+    def __setitem__(self, key: str, value: Any):
+        old = super(MapLayer, self).get(key, NOTSET)
+        super(MapLayer, self).__setitem__(key, value)
+        self._notify_set(key, old, value)
+
+    def __delitem__(self, key: str):
+        old = super(MapLayer, self).__getitem__(key)
+        super(MapLayer, self).__delitem__(key)
+        self._notify_set(key, old, NOTSET)
+
+    def pop(self, key: str, *args) -> Any:
+        if key not in self:
+            return super(MapLayer, self).pop(key, *args)
+        value = super(MapLayer, self).pop(key)
+        self._notify_set(key, value, NOTSET)
+        return value
+
+    def popitem(self) -> Tuple[str, Any]:
+        key, value = super(MapLayer, self).popitem()
+        self._notify_set(key, value, NOTSET)
+        return key, value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self.__setitem__(key, default)
+        return super(MapLayer, self).__getitem__(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self.__setitem__(key, value)
+
+    def clear(self):
+        super(MapLayer, self).clear()
+        self._cache.clear()
+        self._dirty = True
+        for index in self._indices.values():
+            index.clear()
 
     def register_entity_helper(self, helper_type: type(ET)):
         """
@@ -187,10 +631,20 @@ class MapLayer(Dict[str, ET], Generic[ET]):
 
             map.layers.frames["frame_0"]["pose"]["x"] = 12.0
 
+        Indices declared by the helper class (see ``EntityHelper.INDICES``) and hash indices
+        on the fields listed in ``EntityHelper.INDEXED_FIELDS`` are attached to the layer.
+
         Args:
             helper_type (:obj:`type`):  class to use to wrap entities in this layer
         """
         self._ET = helper_type
+        for index_factory in helper_type.INDICES:
+            index = index_factory()
+            if index.name not in self._indices:
+                self.add_index(index)
+        for field in helper_type.INDEXED_FIELDS:
+            if property_index_name(field) not in self._indices:
+                self.add_index(PropertyIndex(field))
 
     def get(self, key: str, default: Any = NOTSET) -> Optional[ET]:
         try:
@@ -209,26 +663,63 @@ class MapLayer(Dict[str, ET], Generic[ET]):
             yield self.__getitem__(key)
 
     def filter(self, parent: Optional[str] = None, **kwargs):
-        matches = {}
-        filtered = False
-        # filter by parent
+        """
+        Entities below the key ``parent`` (if given) whose properties match the given values.
+        Properties with a hash index (see :py:class:`dt_maps.indices.properties.PropertyIndex`)
+        are looked up in the index, the others are checked entity by entity.
+        Enums are compared by value. Without ``parent`` and properties, nothing matches.
+
+        Args:
+            parent (:obj:`str`):    key of the parent entity
+            kwargs:                 ``property=value`` pairs to match
+
+        Return:
+            :obj:`dict`             matching entities by key
+        """
+        if parent is None and not kwargs:
+            return {}
+        # candidate sets given by the indices
+        candidates: List[List[str]] = []
         if parent is not None:
-            filtered = True
-            for key, item in self.items():
-                if key.startswith(f"{parent.rstrip('/')}/"):
-                    matches[key] = item
-        # filter by prop=value pairs
-        kmatches = matches
+            candidates.append(self._keys.descendants(parent))
+        scans = {}
         for prop, value in kwargs.items():
-            matches = {}
-            pool = kmatches if filtered else self
-            filtered = True
-            for key, item in pool.items():
-                if prop in item and item[prop] == value:
-                    matches[key] = item
-            kmatches = matches
+            value = normalize_value(value)
+            index = self._indices.get(property_index_name(prop), None)
+            if index is None:
+                scans[prop] = value
+            else:
+                candidates.append(index.lookup(value))
+        # intersect starting from the smallest set
+        if candidates:
+            candidates.sort(key=len)
+            others = [set(keys) for keys in candidates[1:]]
+            pool = [key for key in candidates[0] if all(key in keys for keys in others)]
+        else:
+            pool = self.keys()
+        # filter by the remaining prop=value pairs
+        matches = {}
+        for key in pool:
+            item = self.__getitem__(key)
+            if all(prop in item and normalize_value(item[prop]) == value
+                   for prop, value in scans.items()):
+                matches[key] = item
         # ---
-        return kmatches
+        return matches
+
+    def query(self) -> LayerQuery:
+        """
+        Creates a lazy query over the entities of this layer, see
+        :py:class:`dt_maps.query.LayerQuery`.
+
+        .. code-block:: python
+
+            map.layers.frames.query().between("pose.x", 0.0, 1.0).order_by("pose.y").limit(10)
+
+        Return:
+            :obj:`dt_maps.query.LayerQuery`     empty query matching all the entities
+        """
+        return LayerQuery(self)
 
     def as_raw_dict(self):
         """
@@ -241,20 +732,67 @@ class MapLayer(Dict[str, ET], Generic[ET]):
 
 
 class MapLayerNamespace(SimpleNamespace):
+    """
+    Namespace holding the layers of a map.
+
+    Layers can be registered as deferred using :py:meth:`defer`, in which case they are
+    materialized (i.e., loaded) only the first time they are accessed.
+    """
+    # deferred layers live outside of __dict__ so that they do not show up as attributes
+    __slots__ = ("_loaders",)
 
     def __init__(self, **kwargs):
         super(MapLayerNamespace, self).__init__(**kwargs)
+        self._loaders: Dict[str, Callable[[], MapLayer]] = {}
 
     def set(self, name: str, layer: MapLayer):
+        self._loaders.pop(name, None)
         self.__dict__[name] = layer
 
+    def defer(self, name: str, loader: Callable[[], MapLayer]):
+        """
+        Registers a layer that will be materialized by calling ``loader`` on first access.
+
+        Args:
+            name (:obj:`str`):          name of the layer
+            loader (:obj:`callable`):   function returning the :py:class:`MapLayer` object
+        """
+        self.__dict__.pop(name, None)
+        self._loaders[name] = loader
+
+    def _materialize(self, name: str) -> Optional[MapLayer]:
+        loader = self._loaders.get(name, None)
+        if loader is None:
+            return self.__dict__.get(name)
+        layer = loader()
+        self.set(name, layer)
+        return layer
+
+    @property
+    def loaded(self) -> List[str]:
+        """
+        Names of the layers that were materialized.
+        """
+        return list(self.__dict__.keys())
+
+    @property
+    def deferred(self) -> List[str]:
+        """
+        Names of the layers that were not materialized yet.
+        """
+        return list(self._loaders.keys())
+
     def get(self, name: str) -> MapLayer:
+        if name in self._loaders:
+            return self._materialize(name)
         return self.__dict__.get(name)
 
     def has(self, name: str) -> bool:
-        return self.__dict__.get(name, None) is not None
+        return name in self._loaders or self.__dict__.get(name, None) is not None
 
     def items(self) -> Iterator[Tuple[str, MapLayer]]:
+        for name in list(self._loaders.keys()):
+            self._materialize(name)
         return iter([(k, v) for k, v in self.__dict__.items()])
 
     # known layers ==>
@@ -294,12 +832,20 @@ class MapLayerNamespace(SimpleNamespace):
     # known layers <==
 
     def __getitem__(self, layer: str) -> MapLayer:
+        if layer in self._loaders:
+            return self._materialize(layer)
         if layer in self.__dict__:
             return self.__dict__[layer]
         raise KeyError(f"Map has no layer '{layer}'")
 
+    def __getattr__(self, layer: str) -> MapLayer:
+        # only called when regular attribute lookup fails, e.g., deferred custom layers
+        if not layer.startswith("_") and layer in self._loaders:
+            return self._materialize(layer)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{layer}'")
+
     def __iter__(self) -> Iterator[str]:
-        return iter(self.__dict__.keys())
+        return iter(list(self.__dict__.keys()) + list(self._loaders.keys()))
 
     def __len__(self) -> int:
-        return len(self.__dict__)
+        return len(self.__dict__) + len(self._loaders)
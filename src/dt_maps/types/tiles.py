@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Tuple, Union, Iterable, Any, Optional
 
+from dt_maps.indices.tiles import TileGridIndex
 from dt_maps.types.commons import EntityHelper, FieldPath
 from dt_maps.types.frames import Frame
 
@@ -19,6 +20,8 @@ class TileType(Enum):
 
 class Tile(EntityHelper):
     LAYER_NAME: str = "tiles"
+    INDICES = (TileGridIndex,)
+    INDEXED_FIELDS = ("type",)
 
     def _get_layer_name(self) -> str:
         return self.LAYER_NAME
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Union, Iterable, Optional, Any
 
+from dt_maps.indices.spatial import SpatialIndex
 from dt_maps.types.commons import EntityHelper, FieldPath
 from dt_maps.types.frames import Frame
 
@@ -29,6 +30,8 @@ class TrafficSignType(Enum):
 
 class TrafficSign(EntityHelper):
     LAYER_NAME: str = "traffic_signs"
+    INDICES = (SpatialIndex,)
+    INDEXED_FIELDS = (TYPE,)
 
     def _get_property_values(self, name: str) -> Optional[Iterable[Any]]:
         return {
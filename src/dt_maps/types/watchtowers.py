@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Union, Iterable, Optional, Any
 
+from dt_maps.indices.spatial import SpatialIndex
 from dt_maps.types.commons import EntityHelper, FieldPath
 from dt_maps.types.frames import Frame
 
@@ -14,6 +15,8 @@ class WatchtowerType(Enum):
 
 
 class Watchtower(EntityHelper):
+    INDICES = (SpatialIndex,)
+    INDEXED_FIELDS = (CONFIGURATION,)
 
     def _get_property_values(self, name: str) -> Optional[Iterable[Any]]:
         return {
@@ -0,0 +1,45 @@
+import os
+import stat
+import uuid
+from contextlib import contextmanager
+from typing import IO, Iterator, Tuple
+
+
+def _create_tmp_file(dirname: str, basename: str) -> Tuple[int, str]:
+    # NOTE: unlike mkstemp, the kernel applies the umask to the mode of the new file, the umask
+    #       itself is never read as doing so means changing it for the whole process
+    while True:
+        tmp_fpath = os.path.join(dirname, f".{basename}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            return os.open(tmp_fpath, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), tmp_fpath
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_open(fpath: str, mode: str = "wb") -> Iterator[IO]:
+    """
+    Opens a temporary file next to ``fpath`` for writing and atomically replaces ``fpath``
+    with it when the context exits without errors. Readers never see a partially written file.
+    The permissions of an existing ``fpath`` are kept, new files get the default permissions
+    (``0o666`` minus the umask) as with :py:meth:`open`.
+
+    Args:
+        fpath (:obj:`str`):     path to the file to (over)write
+        mode (:obj:`str`):      write mode as in :py:meth:`open`
+    """
+    dirname, basename = os.path.split(os.path.abspath(fpath))
+    fd, tmp_fpath = _create_tmp_file(dirname, basename)
+    try:
+        with os.fdopen(fd, mode) as fout:
+            yield fout
+            fout.flush()
+            os.fsync(fout.fileno())
+        # keep the permissions of the file being replaced
+        if os.path.isfile(fpath):
+            os.chmod(tmp_fpath, stat.S_IMODE(os.stat(fpath).st_mode))
+        os.replace(tmp_fpath, fpath)
+    except BaseException:
+        if os.path.exists(tmp_fpath):
+            os.remove(tmp_fpath)
+        raise
@@ -1,11 +1,185 @@
-from typing import Optional, cast
+from typing import NamedTuple, Optional, cast
+
+import numpy as np
 
 from dt_maps import Map
+from dt_maps.indices.tiles import TileGridIndex
 from dt_maps.types.tiles import Tile
 
 
-def get_tile(m: Map, i: int, j: int) -> Optional[Tile]:
-    for t in m.layers.tiles.values():
+def get_tile(m: Map, i: int, j: int, tile_map: Optional[str] = None) -> Optional[Tile]:
+    """
+    Returns the tile at ``(i, j)``.
+
+    Args:
+        m (:obj:`dt_maps.Map`):     map to look into
+        i (:obj:`int`):             tile coordinate ``i``
+        j (:obj:`int`):             tile coordinate ``j``
+        tile_map (:obj:`str`):      key of the tile map, if omitted, the first tile found at
+                                    ``(i, j)`` in any tile map is returned
+
+    Returns:
+        :obj:`dt_maps.types.tiles.Tile`:    the tile, ``None`` if there is no tile at ``(i, j)``
+    """
+    tiles = m.layers.tiles
+    index: Optional[TileGridIndex] = tiles.index(TileGridIndex.name)
+    if index is not None:
+        key = index.get(i, j, tile_map)
+        return cast(Tile, tiles[key]) if key is not None else None
+    # no index, scan the layer
+    for key, t in tiles.items():
+        if tile_map is not None and not key.startswith(f"{tile_map}/"):
+            continue
         if t["i"] == i and t["j"] == j:
             return cast(Tile, t)
     return None
+
+
+class TileLookup(NamedTuple):
+    """
+    Result of :py:func:`tiles_at`, one row per point.
+    """
+    # keys of the tiles containing the points, None for points outside of any tile
+    keys: np.ndarray
+    # Nx2 tile coordinates (i, j), -1 for points outside of any tile
+    ij: np.ndarray
+    # Nx2 coordinates of the points in the frame of their tile, NaN outside of any tile
+    local: np.ndarray
+
+
+def _tile_index(m: Map) -> TileGridIndex:
+    tiles = m.layers.tiles
+    index: Optional[TileGridIndex] = tiles.index(TileGridIndex.name)
+    if index is None:
+        index = TileGridIndex()
+        tiles.add_index(index)
+    return index
+
+
+def _tile_size(m: Map, tile_map: str) -> np.ndarray:
+    tile_maps = m.layers.tile_maps
+    return np.array([
+        float(tile_maps.read(tile_map, ("tile_size", "x"))),
+        float(tile_maps.read(tile_map, ("tile_size", "y")))
+    ])
+
+
+def _tile_map_transform(m: Map, tile_map: str, inverse: bool) -> np.ndarray:
+    # transform between the world and the frame of the tile map (identity if it has no frame)
+    if tile_map not in m.layers.frames:
+        return np.eye(4)
+    return m.transforms.transform(None, tile_map) if inverse else \
+        m.transforms.transform(tile_map, None)
+
+
+def _apply_2d(T: np.ndarray, points: np.ndarray) -> np.ndarray:
+    # points on the plane z=0
+    return points @ T[:2, :2].T + T[:2, 3]
+
+
+def _the_tile_map(m: Map, tile_map: Optional[str]) -> str:
+    if tile_map is not None:
+        return tile_map
+    keys = list(m.layers.tile_maps.keys())
+    if len(keys) != 1:
+        raise ValueError(f"The map has {len(keys)} tile maps, the argument 'tile_map' "
+                         f"is required.")
+    return keys[0]
+
+
+def tiles_at(m: Map, points: np.ndarray, tile_map: Optional[str] = None) -> TileLookup:
+    """
+    Finds the tiles containing the given world points.
+
+    Points are mapped to the frame of the tile map and divided by its tile size, the
+    coordinates of the points in the frame of their tile (i.e., relative to the center of
+    the tile and rotated with it) are computed in a single batched operation.
+
+    Args:
+        m (:obj:`dt_maps.Map`):             map to look into
+        points (:obj:`numpy.ndarray`):      Nx2 array of world points ``(x, y)``
+        tile_map (:obj:`str`):              key of the tile map, if omitted, each point is
+                                            assigned to the first tile map with a tile at
+                                            that location
+
+    Returns:
+        :obj:`TileLookup`:                  keys, tile coordinates and tile-local coordinates
+    """
+    points = np.asarray(points, dtype=float).reshape((-1, 2))
+    n = points.shape[0]
+    keys = np.full(n, None, dtype=object)
+    ij = np.full((n, 2), -1, dtype=np.int64)
+    local = np.full((n, 2), np.nan)
+    index = _tile_index(m)
+    tile_maps = [tile_map] if tile_map is not None else list(m.layers.tile_maps.keys())
+    pending = np.arange(n)
+    for tm in tile_maps:
+        if pending.size == 0:
+            break
+        size = _tile_size(m, tm)
+        map_points = _apply_2d(_tile_map_transform(m, tm, inverse=True), points[pending])
+        cells = np.floor(map_points / size).astype(np.int64)
+        grid = index.key_grid(tm)
+        inside = np.all(cells >= 0, axis=1) & \
+            (cells[:, 0] < grid.shape[0]) & (cells[:, 1] < grid.shape[1])
+        found = np.full(pending.size, None, dtype=object)
+        found[inside] = grid[cells[inside, 0], cells[inside, 1]]
+        hit = np.array([key is not None for key in found], dtype=bool)
+        rows = pending[hit]
+        keys[rows] = found[hit]
+        ij[rows] = cells[hit]
+        # tiles without a frame are aligned with the tile map
+        local[rows] = map_points[hit] - (cells[hit] + 0.5) * size
+        pending = pending[~hit]
+    # tiles with a frame
+    frames = m.layers.frames
+    rows = np.array([i for i in range(n) if keys[i] is not None and keys[i] in frames],
+                    dtype=np.int64)
+    if rows.size > 0:
+        unique, inverse = np.unique(keys[rows].astype(str), return_inverse=True)
+        W = m.transforms.world_matrices(list(unique))[inverse]
+        offsets = points[rows] - W[:, :2, 3]
+        # R^T (p - t), the points lie on the plane z=0
+        offsets = np.concatenate([offsets, -W[:, 2:3, 3]], axis=1)
+        local[rows] = np.einsum("nji,nj->ni", W[:, :3, :3], offsets)[:, :2]
+    return TileLookup(keys, ij, local)
+
+
+def tile_to_world(m: Map, ij: np.ndarray, tile_map: Optional[str] = None,
+                  local: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Inverse of :py:func:`tiles_at`, computes the world points at the given tile coordinates.
+
+    Args:
+        m (:obj:`dt_maps.Map`):             map to look into
+        ij (:obj:`numpy.ndarray`):          Nx2 array of tile coordinates ``(i, j)``
+        tile_map (:obj:`str`):              key of the tile map, can be omitted if the map has
+                                            only one
+        local (:obj:`numpy.ndarray`):       Nx2 array of coordinates in the frame of the tiles,
+                                            the centers of the tiles are used if omitted
+
+    Returns:
+        :obj:`numpy.ndarray`:               Nx2 array of world points
+    """
+    tile_map = _the_tile_map(m, tile_map)
+    ij = np.asarray(ij, dtype=np.int64).reshape((-1, 2))
+    size = _tile_size(m, tile_map)
+    map_points = (ij + 0.5) * size
+    if local is None:
+        return _apply_2d(_tile_map_transform(m, tile_map, inverse=False), map_points)
+    local = np.asarray(local, dtype=float).reshape((-1, 2))
+    # tiles without a frame are aligned with the tile map
+    points = _apply_2d(_tile_map_transform(m, tile_map, inverse=False), map_points + local)
+    grid = _tile_index(m).key_grid(tile_map)
+    frames = m.layers.frames
+    rows, tile_keys = [], []
+    for row, (i, j) in enumerate(ij):
+        if 0 <= i < grid.shape[0] and 0 <= j < grid.shape[1]:
+            key = grid[i, j]
+            if key is not None and key in frames:
+                rows.append(row)
+                tile_keys.append(key)
+    if rows:
+        W = m.transforms.world_matrices(tile_keys)
+        points[rows] = np.einsum("nij,nj->ni", W[:, :2, :2], local[rows]) + W[:, :2, 3]
+    return points
@@ -1,5 +1,6 @@
 import os
 import logging
+import shutil
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -14,3 +15,13 @@ def get_test_assets_dir():
 
 def get_asset_path(asset: str) -> str:
     return os.path.abspath(os.path.join(get_test_assets_dir(), asset))
+
+
+def copy_map(name: str, dst_dir: str) -> str:
+    """
+    Copies the test map ``maps/<name>`` into ``dst_dir`` (e.g., a temporary directory) and
+    returns the path to the copy.
+    """
+    map_dir = os.path.join(str(dst_dir), name)
+    shutil.copytree(get_asset_path(f"maps/{name}"), map_dir)
+    return map_dir
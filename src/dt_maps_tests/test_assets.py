@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+from dt_maps import Map
+
+from . import get_asset_path
+
+
+def _load_map_copy(tmp_dir: str) -> Map:
+    map_dir = tmp_dir
+    m = Map("loop", map_dir)
+    m.asset("textures/small.png").write("wb", b"small" * 10)
+    m.asset("textures/large.png").write("wb", b"L" * 4096)
+    m.asset("readme.txt").write("wt", "hello\n")
+    return Map.from_disk("loop", map_dir)
+
+
+def test_assets_index():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        assert sorted(m.assets.keys()) == ["readme.txt", "textures/large.png", "textures/small.png"]
+        assert m.asset("readme.txt").exists()
+        assert not m.asset("missing.png").exists()
+        assert m.asset("readme.txt") is m.asset("readme.txt")
+
+
+def test_assets_read_cached():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        assert m.asset("readme.txt").read("rt") == "hello\n"
+        assert m.asset("textures/small.png").read("rb") == b"small" * 10
+        # the second read does not touch the disk
+        os.remove(m.asset("textures/small.png").fpath)
+        assert m.asset("textures/small.png").read("rb") == b"small" * 10
+
+
+def test_assets_lru_budget():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.assets.budget = 60
+        m.asset("textures/small.png").read("rb")
+        m.asset("readme.txt").read("rb")
+        assert m.assets.size == 50 + 6
+        m.assets.budget = 10
+        assert m.assets.size == 6
+
+
+def test_assets_mmap():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.assets._mmap_threshold = 1024
+        buffer = m.asset("textures/large.png").buffer()
+        assert buffer.readonly and len(buffer) == 4096
+        assert m.asset("textures/large.png").read("rb") == b"L" * 4096
+        assert m.assets.size == 0
+
+
+def test_assets_write_invalidates():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        asset = m.asset("readme.txt")
+        assert asset.read("rt") == "hello\n"
+        asset.write("wt", "bye\n")
+        assert asset.read("rt") == "bye\n"
+        m.asset("new/file.txt").write("wt", "new")
+        assert "new/file.txt" in m.assets.keys()
+
+
+def test_assets_prefetch():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        futures = m.assets.prefetch(["textures/small.png", "readme.txt"])
+        assert [bytes(f.result()) for f in futures] == [b"small" * 10, b"hello\n"]
+        assert all(f.result().readonly for f in futures)
+        assert m.assets.size == 56
+        pool = m.assets._pool
+        m.assets.close()
+        assert m.assets.size == 0
+        assert all(not thread.is_alive() for thread in pool._threads)
+        # the cache can still be used
+        futures = m.assets.prefetch(["readme.txt"])
+        assert bytes(futures[0].result()) == b"hello\n"
+        m.assets.close()
+
+
+def test_assets_no_assets_dir():
+    m = Map.from_disk("loop", get_asset_path("maps/loop"))
+    assert m.assets.keys() == []
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import tempfile
+import threading
+import zipfile
+from unittest import mock
+
+from dt_maps import Map
+
+from . import copy_map, get_asset_path
+
+
+def test_async_from_disk():
+    map_dir = get_asset_path("maps/minimal_autolab")
+    m = asyncio.run(Map.from_disk_async("minimal_autolab", map_dir))
+    expected = Map.from_disk("minimal_autolab", map_dir)
+    assert sorted(m.layers) == sorted(expected.layers)
+    for name, layer in expected.layers.items():
+        assert m.layers[name].as_raw_dict() == layer.as_raw_dict()
+    assert m.layers.vehicles["map_0/duckiebot1"].color.value == "green"
+
+
+def test_async_from_disk_off_loop():
+    map_dir = get_asset_path("maps/minimal_autolab")
+    threads = set()
+    make_layer = Map._make_layer
+
+    def _make_layer(self, *args):
+        threads.add(threading.get_ident())
+        return make_layer(self, *args)
+
+    async def load():
+        m = await Map.from_disk_async("minimal_autolab", map_dir)
+        return m, threading.get_ident()
+
+    with mock.patch.object(Map, "_make_layer", _make_layer):
+        m, loop_thread = asyncio.run(load())
+    # layers are built in the executor, not on the event loop
+    assert len(m.layers.loaded) > 0
+    assert threads and loop_thread not in threads
+
+
+def test_async_from_disk_lazy():
+    map_dir = get_asset_path("maps/minimal_autolab")
+    m = asyncio.run(Map.from_disk_async("minimal_autolab", map_dir, lazy=True))
+    assert m.layers.loaded == []
+    assert len(m.layers.tiles) == 9
+
+
+def test_async_many_maps():
+    map_dir = get_asset_path("maps/loop")
+
+    async def load_all():
+        return await asyncio.gather(*[Map.from_disk_async(f"loop{i}", map_dir) for i in range(8)])
+
+    maps = asyncio.run(load_all())
+    assert [len(m.layers.tiles) for m in maps] == [9] * 8
+
+
+def test_async_to_disk_and_context():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("minimal_autolab", tmp_dir)
+
+        async def edit():
+            m = await Map.from_disk_async("minimal_autolab", map_dir)
+            m.layers.vehicles["map_0/duckiebot1"].color = "red"
+            await m.to_disk_async()
+            m.asset("notes.txt").write("wt", "hello")
+            content = await m.asset("notes.txt").read_async("rt")
+            fpath, content_hash = await m.make_context_async(return_hash=True)
+            return content, fpath, content_hash
+
+        content, fpath, content_hash = asyncio.run(edit())
+        assert content == "hello"
+        assert Map.from_disk("m", map_dir).layers.vehicles["map_0/duckiebot1"].color.value == "red"
+        assert "assets/notes.txt" in zipfile.ZipFile(fpath).namelist()
+        assert len(content_hash) == 64
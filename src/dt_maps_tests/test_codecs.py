@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from dt_maps import Map
+import dt_maps.codecs
+from dt_maps.codecs import get_codec, YAMLLoader, JSONCodec
+from dt_maps.exceptions import InvalidMapLayer
+
+from . import copy_map, get_asset_path
+
+
+def test_codecs_yaml_fast_path():
+    if yaml.__with_libyaml__:
+        assert YAMLLoader is yaml.CSafeLoader
+
+
+def test_codecs_json_roundtrip():
+    codec = get_codec(".json")
+    assert isinstance(codec, JSONCodec)
+    content = {"version": "1.0", "frames": {"map_0": {"relative_to": None}}}
+    assert codec.loads(codec.dumps(content)) == content
+
+
+def test_codecs_mixed_formats():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("loop", tmp_dir)
+        m = Map.from_disk("loop", map_dir)
+        expected = m.layers.frames.as_raw_dict()
+        m.set_layer_format("frames", ".json")
+        m.to_disk()
+        assert os.path.isfile(os.path.join(map_dir, "frames.json"))
+        assert not os.path.isfile(os.path.join(map_dir, "frames.yaml"))
+        with open(os.path.join(map_dir, "layer_formats.yaml"), "rt") as fin:
+            assert yaml.safe_load(fin)["layer_formats"] == {"frames": ".json"}
+        # load mixed map
+        m = Map.from_disk("loop", map_dir)
+        assert m.layer_format("frames") == ".json"
+        assert m.layer_format("tiles") == ".yaml"
+        assert m.layers.frames.as_raw_dict() == expected
+        assert m.layers.frames["map_0/tile_0_1"].pose.x == 0.2925
+        # back to the default format
+        m.set_layer_format("frames", ".yaml")
+        m.to_disk()
+        assert not os.path.isfile(os.path.join(map_dir, "frames.json"))
+        assert not os.path.isfile(os.path.join(map_dir, "layer_formats.yaml"))
+        assert Map.from_disk("loop", map_dir).layers.frames.as_raw_dict() == expected
+
+
+def test_codecs_msgpack():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            get_codec(".msgpack")
+        except ValueError:
+            raise unittest.SkipTest("msgpack is not installed")
+        map_dir = copy_map("loop", tmp_dir)
+        m = Map.from_disk("loop", map_dir)
+        expected = m.layers.tiles.as_raw_dict()
+        m.set_layer_format("tiles", ".msgpack")
+        m.to_disk()
+        m = Map.from_disk("loop", map_dir)
+        assert m.layers.tiles.as_raw_dict() == expected
+
+
+def test_codecs_msgpack_missing():
+    with mock.patch.dict(dt_maps.codecs._CODECS):
+        dt_maps.codecs._CODECS.pop(".msgpack", None)
+        try:
+            get_codec(".msgpack")
+            assert False
+        except ValueError as e:
+            assert "pip install dt-maps[msgpack]" in str(e)
+
+
+def test_codecs_unlisted_files():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("minimal", tmp_dir)
+        # files that are not in the default format are not layers unless listed
+        with open(os.path.join(map_dir, "package.json"), "wt") as fout:
+            fout.write('{"name": "minimal"}')
+        shutil.copyfile(os.path.join(map_dir, "frames.yaml"), os.path.join(map_dir, "frames.json"))
+        m = Map.from_disk("minimal", map_dir)
+        assert not m.layers.has("package")
+        assert m.layer_format("frames") == ".yaml"
+
+
+def test_codecs_duplicate_layer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("minimal", tmp_dir)
+        shutil.copyfile(os.path.join(map_dir, "frames.yaml"), os.path.join(map_dir, "frames.json"))
+        with open(os.path.join(map_dir, "layer_formats.yaml"), "wt") as fout:
+            yaml.safe_dump({"version": "1.0", "layer_formats": {"frames": ".json"}}, fout)
+        try:
+            Map.from_disk("minimal", map_dir)
+            assert False
+        except InvalidMapLayer:
+            pass
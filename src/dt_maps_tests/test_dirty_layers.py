@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+from dt_maps import Map, MapLayer
+
+from . import copy_map, get_asset_path
+
+
+def _load_map_copy(tmp_dir: str) -> Map:
+    map_dir = copy_map("minimal_autolab", tmp_dir)
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def _mtimes(m: Map) -> dict:
+    return {
+        f: os.stat(os.path.join(m._path, f)).st_mtime_ns for f in os.listdir(m._path)
+    }
+
+
+def test_dirty_clean_after_load():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        assert m.dirty_layers == []
+
+
+def test_dirty_helper_write():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.layers.frames["map_0/duckiebot1"].pose.x = 2.0
+        assert m.dirty_layers == ["frames"]
+
+
+def test_dirty_dict_mutation():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        del m.layers.citizens["map_0/duckie3"]
+        m.layers.vehicles["map_0/duckiebot3"] = {"configuration": "DB21M", "color": "red"}
+        assert sorted(m.dirty_layers) == ["citizens", "vehicles"]
+
+
+def test_dirty_incremental_to_disk():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        before = _mtimes(m)
+        m.layers.vehicles["map_0/duckiebot1"].configuration = "DB21M"
+        m.to_disk()
+        after = _mtimes(m)
+        changed = [f for f in before if before[f] != after[f]]
+        assert changed == ["vehicles.yaml"]
+        assert m.dirty_layers == []
+        m = Map.from_disk("minimal_autolab", m._path)
+        assert m.layers.vehicles["map_0/duckiebot1"]["configuration"].value == "DB21M"
+
+
+def test_dirty_new_layer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.layers.set("people", MapLayer(m, "people", person_0={"name": "John"}))
+        assert m.dirty_layers == ["people"]
+        m.to_disk()
+        assert os.path.isfile(os.path.join(m._path, "people.yaml"))
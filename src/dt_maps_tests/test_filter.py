@@ -35,3 +35,10 @@ def test_watchtower_configuration():
     all_watchtowers = m.layers.watchtowers.filter(configuration=WatchtowerType.WT18)
     assert len(all_watchtowers) == 2
 
+
+
+def test_filter_no_arguments():
+    m = _load_map_loop()
+    # nothing to match, as in earlier versions
+    assert m.layers.tiles.filter() == {}
+    assert len(m.layers.tiles.filter("map_0")) == 9
@@ -0,0 +1,99 @@
+from dt_maps import Map
+from dt_maps.exceptions import InvalidMapLayer
+from dt_maps.indices.frames import FrameTree
+from dt_maps.types import MapLayer
+from dt_maps.types.frames import Frame
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def test_frame_tree_hierarchy():
+    m = _load_map()
+    frames = m.layers.frames
+    tree = frames.index(FrameTree.name)
+    assert tree is not None
+    for key in frames.keys():
+        ancestors = frames.ancestors(key)
+        assert tree.parent(key) == (ancestors[-1] if ancestors else None)
+        for child in tree.children(key):
+            assert tree.parent(child) == key
+    assert frames["map_0/tile_0_0"].parent.key == "map_0"
+    assert "map_0/tile_0_0" in [f.key for f in frames["map_0"].children]
+
+
+def test_frame_tree_traversals():
+    m = _load_map()
+    frames = m.layers.frames
+    tree = frames.index(FrameTree.name)
+    assert sorted(tree.dfs()) == sorted(frames.keys())
+    assert sorted(tree.bfs()) == sorted(frames.keys())
+    subtree = list(tree.dfs("map_0"))
+    assert subtree[0] == "map_0"
+    assert sorted(subtree[1:]) == sorted(frames.descendants("map_0"))
+    # parents always come before their children
+    seen = set()
+    for key in tree.bfs():
+        assert tree.parent(key) is None or tree.parent(key) in seen
+        seen.add(key)
+
+
+def test_frame_tree_sync():
+    m = _load_map()
+    frames = m.layers.frames
+    tree = frames.index(FrameTree.name)
+    children = tree.children("map_0")
+    # inserting an intermediate frame adopts the frames below it
+    frames["map_0/tile_0_0/sign_0"] = {"relative_to": "map_0/tile_0_0", "pose": {}}
+    frames["map_0/group"] = {"relative_to": "map_0", "pose": {}}
+    frames["map_0/group/a"] = {"relative_to": "map_0/group", "pose": {}}
+    assert tree.parent("map_0/group/a") == "map_0/group"
+    assert tree.parent("map_0/tile_0_0/sign_0") == "map_0/tile_0_0"
+    del frames["map_0/tile_0_0"]
+    assert tree.parent("map_0/tile_0_0/sign_0") == "map_0"
+    assert "map_0/tile_0_0/sign_0" in tree.children("map_0")
+    frames["map_0/tile_0_0"] = {"relative_to": "map_0", "pose": {}}
+    assert tree.parent("map_0/tile_0_0/sign_0") == "map_0/tile_0_0"
+    assert sorted(tree.children("map_0")) == sorted(children + ["map_0/group"])
+
+
+def test_frame_tree_topological_order():
+    m = _load_map()
+    frames = m.layers.frames
+    tree = frames.index(FrameTree.name)
+    order = tree.topological_order()
+    assert sorted(order) == sorted(frames.keys())
+    position = {key: i for i, key in enumerate(order)}
+    for key in order:
+        relative_to = tree.relative_to(key)
+        assert relative_to is None or position[relative_to] < position[key]
+    # relative_to changes are tracked
+    frames["map_0"].relative_to = "map_0/tile_0_0"
+    assert "map_0" in tree.dependents("map_0/tile_0_0")
+    try:
+        tree.topological_order(["map_0"])
+        assert False, "cycle not detected"
+    except InvalidMapLayer:
+        pass
+
+
+def test_frame_tree_out_of_order():
+    m = _load_map()
+    # children stored before their parents
+    frames = MapLayer(m, "frames", **{
+        "a/b/c": {"relative_to": "a/b", "pose": {"x": 1.0}},
+        "a/b": {"relative_to": "a", "pose": {"x": 1.0}},
+        "a": {"relative_to": None, "pose": {"x": 1.0}},
+    })
+    frames.register_entity_helper(Frame)
+    tree = frames.index(FrameTree.name)
+    assert tree.parent("a/b/c") == "a/b"
+    assert tree.parent("a/b") == "a"
+    assert tree.parent("a") is None
+    assert tree.children(None) == ["a"]
+    assert list(tree.dfs()) == ["a", "a/b", "a/b/c"]
+    assert tree.topological_order() == ["a", "a/b", "a/b/c"]
@@ -0,0 +1,88 @@
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.snapshots import FramesSnapshotLayer
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def _snapshot_map(tmp_dir: str) -> Map:
+    m = _load_map()
+    fpath = os.path.join(tmp_dir, "frames.npy")
+    m.export_frames_snapshot(fpath)
+    m.load_frames_snapshot(fpath)
+    return m
+
+
+def test_snapshot_is_memory_mapped():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _snapshot_map(tmp_dir)
+        assert isinstance(m.layers.frames, FramesSnapshotLayer)
+        assert isinstance(m.layers.frames.data, np.memmap)
+
+
+def test_snapshot_reads():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        expected = _load_map()
+        m = _snapshot_map(tmp_dir)
+        assert len(m.layers.frames) == 10
+        for key, frame in expected.layers.frames.items():
+            snapshot = m.layers.frames[key]
+            for field in ["x", "y", "z", "roll", "pitch", "yaw"]:
+                assert getattr(snapshot.pose, field) == getattr(frame.pose, field)
+            assert snapshot.relative_to == frame.relative_to
+        assert m.layers.frames.as_raw_dict()["map_0"]["pose"]["x"] == 1.0
+
+
+def test_snapshot_writes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _snapshot_map(tmp_dir)
+        frame = "map_0/tile_0_1"
+        m.layers.frames[frame].pose.x = 3.0
+        m.layers.frames[frame].relative_to = None
+        assert m.layers.frames[frame].pose.x == 3.0
+        assert m.layers.frames[frame].relative_to is None
+        m.layers.frames[frame].relative_to = "map_99"
+        assert m.layers.frames[frame].relative_to == "map_99"
+
+
+def test_snapshot_read_only():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _snapshot_map(tmp_dir)
+        frames = m.layers.frames
+        mutations = [
+            lambda: frames.__setitem__("map_1", {"relative_to": None, "pose": {}}),
+            lambda: frames.__delitem__("map_0"),
+            lambda: frames.pop("map_0"),
+            lambda: frames.popitem(),
+            lambda: frames.setdefault("map_0"),
+            lambda: frames.update({"map_1": {}}),
+            lambda: frames.clear(),
+        ]
+        for mutation in mutations:
+            try:
+                mutation()
+                assert False
+            except TypeError as e:
+                assert "read-only" in str(e)
+        assert len(frames) == 10
+
+
+def test_snapshot_export_dropped_fields():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map()
+        m.layers.frames._get_raw("map_0")["notes"] = "origin"
+        fpath = os.path.join(tmp_dir, "frames.npy")
+        with unittest.TestCase().assertLogs("dt_maps.snapshots", logging.WARNING) as logs:
+            m.export_frames_snapshot(fpath)
+        assert "'notes' (in 1 frames, e.g., 'map_0')" in "\n".join(logs.output)
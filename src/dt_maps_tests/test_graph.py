@@ -0,0 +1,162 @@
+import networkx as nx
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.graph.tile_maps import get_tile_map_graph
+from dt_maps.graph.tiles import get_tile_graph, get_tile_graph_template, place_tile_graphs
+from dt_maps.graph.utils import densify_graph, find_nodes, stitch_graph
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def test_graph_deterministic_ids():
+    for steps in [0, 2]:
+        G1 = _load_map().graph(subdivision_steps=steps)
+        G2 = _load_map().graph(subdivision_steps=steps)
+        assert sorted(G1.nodes) == sorted(G2.nodes)
+        assert set(G1.edges) == set(G2.edges)
+        for node in G1.nodes:
+            assert node.startswith("map_0__tile_")
+            assert np.allclose(G1.nodes[node]["position"], G2.nodes[node]["position"])
+
+
+def _load_consistent_loop() -> Map:
+    # the loop map with the curves oriented so that their lanes meet those of the
+    # neighboring straight tiles
+    m = _load_map()
+    yaws = {
+        "map_0/tile_0_0": np.pi / 2,
+        "map_0/tile_0_2": 0.0,
+        "map_0/tile_2_0": np.pi,
+        "map_0/tile_2_2": -np.pi / 2,
+    }
+    for key, yaw in yaws.items():
+        m.layers.frames[key].pose.yaw = yaw
+    return m
+
+
+def test_graph_stitched():
+    G = _load_consistent_loop().graph()
+    positions = np.array([p for _, p in G.nodes(data="position")])
+    # no two nodes share the same position
+    distances = np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=2)
+    np.fill_diagonal(distances, np.inf)
+    assert distances.min() > 1e-4
+    # the two lanes of the loop are closed, they never meet as there are no intersections
+    assert nx.number_weakly_connected_components(G) == 2
+    assert sorted(len(c) for c in nx.strongly_connected_components(G)) == [8, 8]
+    for component in nx.strongly_connected_components(G):
+        # each lane is a cycle through all the road tiles
+        assert all(G.out_degree(node) == 1 for node in component)
+
+
+def test_stitch_graph():
+    G = nx.DiGraph()
+    G.add_node("a", position=[0.0, 0.0, 0.0])
+    G.add_node("b", position=[1.0, 0.0, 0.0])
+    G.add_node("c", position=[1.0, 0.00001, 0.0])
+    G.add_node("d", position=[2.0, 0.0, 0.0])
+    G.add_edge("a", "b", lane="right")
+    G.add_edge("c", "d", lane="right")
+    merged = stitch_graph(G)
+    assert merged == {"c": "b"}
+    assert set(G.nodes) == {"a", "b", "d"}
+    assert set(G.edges) == {("a", "b"), ("b", "d")}
+    assert G.edges["b", "d"]["lane"] == "right"
+
+
+def test_graph_3way_tile():
+    m = _load_map()
+    tile = m.layers.tiles["map_0/tile_1_0"]
+    tile["type"] = "3way"
+    G = get_tile_graph(tile, m.layers.tile_maps["map_0"])
+    # straight, right turn and left turn variants
+    assert G.number_of_edges() == 6
+    assert len(find_nodes(G, tile=tile)) == 12
+
+
+def test_graph_single_pass():
+    m = _load_map()
+    for steps in [0, 1]:
+        G = m.graph(subdivision_steps=steps)
+        G1 = get_tile_map_graph(m, m.layers.tile_maps["map_0"], subdivision_steps=steps)
+        assert set(G.nodes) == set(G1.nodes)
+        assert set(G.edges) == set(G1.edges)
+
+
+def test_graph_tile_templates():
+    m = _load_map()
+    tile_map = m.layers.tile_maps["map_0"]
+    tiles = [m.layers.tiles[key] for key in m.layers.tiles.descendants("map_0")]
+    templates = [get_tile_graph_template(tile["type"], tile_map.tile_size) for tile in tiles]
+    # one template per type of tile
+    assert len({id(t) for t in templates}) == len({tile["type"] for tile in tiles})
+    poses = m.transforms.local_poses([tile.key for tile in tiles])
+    for tile, positions in zip(tiles, place_tile_graphs(templates, poses)):
+        pose = tile.frame.pose
+        G = get_tile_graph(tile, tile_map)
+        for node, position in zip(G.nodes, positions):
+            tx, ty, tz = G.nodes[node]["position"]
+            assert np.allclose(position, [
+                tx * np.cos(pose.yaw) - ty * np.sin(pose.yaw) + pose.x,
+                tx * np.sin(pose.yaw) + ty * np.cos(pose.yaw) + pose.y,
+                tz + pose.z,
+            ])
+
+
+def test_densify_graph():
+    m = _load_map()
+    G = m.graph()
+    edges = list(G.edges(data="geometry"))
+    legacy = m.graph()
+    for _, _, data in legacy.edges(data=True):
+        del data["geometry"]
+    densify_graph(legacy, 1)
+    densify_graph(G, 1)
+    assert G.number_of_edges() == 2 * len(edges)
+    assert G.number_of_nodes() == m.graph().number_of_nodes() + len(edges)
+    for u, v, geometry in edges:
+        mid = [w for w in G.successors(u) if G.has_edge(w, v)]
+        assert len(mid) == 1
+        assert G.nodes[mid[0]]["lane"] == G.nodes[u]["lane"]
+        # the new node is where it is without geometries, the geometry is split next to it
+        position = G.nodes[mid[0]]["position"]
+        assert np.allclose(position, legacy.nodes[mid[0]]["position"])
+        first, second = G.edges[u, mid[0]]["geometry"], G.edges[mid[0], v]["geometry"]
+        assert np.isclose(first.length + second.length, geometry.length)
+        assert np.allclose(first.end, geometry.point(geometry.project(position)))
+        assert np.allclose(first.end, second.start)
+
+
+def test_densify_graph_on_geometry():
+    m = _load_map()
+    G = m.graph()
+    edges = list(G.edges(data="geometry"))
+    densify_graph(G, 1, on_geometry=True)
+    for u, v, geometry in edges:
+        mid = [w for w in G.successors(u) if G.has_edge(w, v)]
+        # the new node lies halfway along the geometry of the edge
+        assert np.allclose(G.nodes[mid[0]]["position"], geometry.point(geometry.length / 2))
+
+
+def test_densify_graph_without_geometry():
+    m = _load_map()
+    G = m.graph()
+    for _, _, data in G.edges(data=True):
+        del data["geometry"]
+    edges = list(G.edges)
+    densify_graph(G, 1)
+    for u, v in edges:
+        mid = [w for w in G.successors(u) if G.has_edge(w, v)]
+        pu, pv = np.array(G.nodes[u]["position"]), np.array(G.nodes[v]["position"])
+        pm = np.array(G.nodes[mid[0]]["position"])
+        # axis-aligned edges are split in half, the others get a bump of a quarter of their length
+        bump = np.linalg.norm(pm - (pu + pv) / 2)
+        straight = np.isclose(pu[0], pv[0]) or np.isclose(pu[1], pv[1])
+        expected = 0.0 if straight else np.linalg.norm(pu - pv) / 4
+        assert np.isclose(bump, expected)
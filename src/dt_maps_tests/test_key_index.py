@@ -0,0 +1,52 @@
+from dt_maps import Map
+from dt_maps_tests import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def test_key_index_children():
+    m = _load_map()
+    tiles = m.layers.tiles
+    expected = [key for key in tiles.keys() if key.startswith("map_0/")]
+    assert len(expected) > 0
+    assert sorted(tiles.children("map_0")) == sorted(expected)
+    assert sorted(tiles.descendants("map_0/")) == sorted(expected)
+    assert tiles.children("map_1") == []
+    assert tiles.descendants("map_1") == []
+
+
+def test_key_index_ancestors():
+    m = _load_map()
+    frames = m.layers.frames
+    frames["map_0/tile_0_0/sign_0"] = {"relative_to": None, "pose": {"x": 0.0}}
+    assert frames.ancestors("map_0/tile_0_0/sign_0") == ["map_0", "map_0/tile_0_0"]
+    assert frames["map_0/tile_0_0/sign_0"].parent.key == "map_0/tile_0_0"
+    assert frames["map_0"].parent is None
+    # intermediate keys do not need to exist
+    frames["map_0/nowhere/sign_1"] = {"relative_to": None, "pose": {"x": 0.0}}
+    assert frames["map_0/nowhere/sign_1"].parent.key == "map_0"
+
+
+def test_key_index_glob():
+    m = _load_map()
+    tiles = m.layers.tiles
+    assert sorted(tiles.glob("map_0/tile_*")) == sorted(tiles.keys())
+    assert tiles.glob("map_0/tile_0_0") == ["map_0/tile_0_0"]
+    assert tiles.glob("map_0/tile_0_?") == [k for k in tiles.keys() if k[:-1] == "map_0/tile_0_"]
+    assert tiles.glob("map_1/*") == []
+    assert tiles.glob("*") == []
+
+
+def test_key_index_sync():
+    m = _load_map()
+    tiles = m.layers.tiles
+    tiles["map_1/tile_0_0"] = {"i": 0, "j": 0, "type": "floor"}
+    assert tiles.children("map_1") == ["map_1/tile_0_0"]
+    del tiles["map_1/tile_0_0"]
+    assert tiles.children("map_1") == []
+    assert tiles.glob("map_1/*") == []
+    tiles.clear()
+    assert tiles.descendants("") == []
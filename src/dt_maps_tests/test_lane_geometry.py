@@ -0,0 +1,99 @@
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.graph.geometry import CircularArc, LaneGeometry, LineSegment
+from dt_maps.graph.utils import densify_graph
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def test_lane_geometry_abstract():
+    try:
+        LaneGeometry()
+        assert False
+    except TypeError:
+        pass
+
+
+def test_line_segment():
+    line = LineSegment([0.0, 0.0, 0.0], [3.0, 4.0, 0.0])
+    assert np.isclose(line.length, 5.0)
+    assert np.allclose(line.point(2.5), [1.5, 2.0, 0.0])
+    assert np.isclose(line.heading(1.0), np.arctan2(4.0, 3.0))
+    assert line.curvature(1.0) == 0.0
+    points = line.sample(6)
+    assert points.shape == (6, 3)
+    assert np.allclose(points[0], line.start) and np.allclose(points[-1], line.end)
+    first, second = line.split(2.5)
+    assert np.isclose(first.length + second.length, line.length)
+
+
+def test_circular_arc():
+    # quarter of circle, clockwise from (-1, 0) to (0, 1)
+    arc = CircularArc([0.0, 0.0, 0.0], 1.0, np.pi, np.pi / 2)
+    assert np.isclose(arc.length, np.pi / 2)
+    assert np.allclose(arc.start, [-1.0, 0.0, 0.0])
+    assert np.allclose(arc.end, [0.0, 1.0, 0.0])
+    assert np.isclose(arc.heading(0.0), np.pi / 2)
+    assert np.isclose(arc.heading(arc.length), 0.0)
+    assert np.isclose(arc.curvature(0.5), -1.0)
+    points = arc.sample(50)
+    assert np.allclose(np.linalg.norm(points[:, :2], axis=1), 1.0)
+    # vectorized queries
+    s = np.linspace(0.0, arc.length, 7)
+    assert arc.point(s).shape == (7, 3)
+    assert arc.heading(s).shape == (7,)
+    # placement
+    moved = arc.transformed(1.0, 2.0, 0.5, np.pi / 2)
+    assert np.allclose(moved.start, [1.0, 1.0, 0.5])
+    assert np.isclose(moved.heading(0.0), -np.pi)
+
+
+def test_lane_geometry_graph():
+    m = _load_map()
+    G = m.graph()
+    arcs = 0
+    for u, v, geometry in G.edges(data="geometry"):
+        assert np.allclose(geometry.start, G.nodes[u]["position"])
+        assert np.allclose(geometry.end, G.nodes[v]["position"])
+        arcs += isinstance(geometry, CircularArc)
+        # the heading is continuous across consecutive edges
+        for _, _, next_geometry in G.out_edges(v, data="geometry"):
+            error = next_geometry.heading(0.0) - geometry.heading(geometry.length)
+            assert np.isclose((error + np.pi) % (2 * np.pi) - np.pi, 0.0)
+    # two lanes on each of the four curves of the loop
+    assert arcs == 8
+
+
+def test_lane_geometry_densified():
+    m = _load_map()
+    G = m.graph()
+    D = m.graph(subdivision_steps=2)
+    length = sum(geometry.length for _, _, geometry in G.edges(data="geometry"))
+    assert np.isclose(sum(geometry.length for _, _, geometry in D.edges(data="geometry")), length)
+    # the geometries of consecutive edges are still continuous
+    for u, v, geometry in D.edges(data="geometry"):
+        for _, _, next_geometry in D.out_edges(v, data="geometry"):
+            assert np.allclose(geometry.end, next_geometry.start)
+    # nodes placed on the geometries match their endpoints
+    densify_graph(G, 2, on_geometry=True)
+    assert np.isclose(sum(geometry.length for _, _, geometry in G.edges(data="geometry")), length)
+    for u, v, geometry in G.edges(data="geometry"):
+        assert np.allclose(geometry.start, G.nodes[u]["position"])
+        assert np.allclose(geometry.end, G.nodes[v]["position"])
+
+
+def test_lane_geometry_project():
+    line = LineSegment([0.0, 0.0, 0.0], [4.0, 0.0, 0.0])
+    assert np.isclose(line.project([1.0, 3.0, 0.0]), 1.0)
+    assert line.project([-2.0, 1.0, 0.0]) == 0.0
+    assert np.isclose(line.project([9.0, 0.0, 0.0]), 4.0)
+    arc = CircularArc([0.0, 0.0, 0.0], 1.0, np.pi, np.pi / 2)
+    assert np.isclose(arc.project([-2.0, 2.0, 0.0]), np.pi / 4)
+    assert np.isclose(arc.project([-1.0, -0.1, 0.0]), 0.0)
+    assert np.isclose(arc.project([0.1, 1.0, 0.0]), arc.length)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.graph.projection import LaneProjector
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def _brute_force(G, edges, point):
+    best, best_distance = None, np.inf
+    for i, (u, v) in enumerate(edges):
+        a = np.array(G.nodes[u]["position"][:2])
+        b = np.array(G.nodes[v]["position"][:2])
+        d = b - a
+        t = np.clip(np.dot(point - a, d) / np.dot(d, d), 0.0, 1.0)
+        distance = np.linalg.norm(point - (a + t * d))
+        if distance < best_distance - 1e-12:
+            best, best_distance = i, distance
+    return best, best_distance
+
+
+def test_lane_projection_closest_edge():
+    m = _load_map()
+    G = m.graph(subdivision_steps=1)
+    projector = LaneProjector(G, cell_size=0.2)
+    positions = np.array([p[:2] for _, p in G.nodes(data="position")])
+    low, high = positions.min(axis=0) - 1.0, positions.max(axis=0) + 1.0
+    points = np.random.RandomState(0).uniform(low, high, (200, 2))
+    result = projector.project(points)
+    assert result.edge.shape == (200,)
+    for point, edge in zip(points, result.edge):
+        expected, expected_distance = _brute_force(G, projector.edges, point)
+        u, v = projector.edges[edge]
+        a = np.array(G.nodes[u]["position"][:2])
+        b = np.array(G.nodes[v]["position"][:2])
+        t = np.clip(np.dot(point - a, b - a) / np.dot(b - a, b - a), 0.0, 1.0)
+        assert np.isclose(np.linalg.norm(point - (a + t * (b - a))), expected_distance)
+    assert np.all(np.isnan(result.heading_error))
+
+
+def test_lane_projection_on_edge():
+    m = _load_map()
+    G = m.graph()
+    projector = LaneProjector(G)
+    u, v = projector.edges[0]
+    a = np.array(G.nodes[u]["position"][:2])
+    b = np.array(G.nodes[v]["position"][:2])
+    heading = np.arctan2(*(b - a)[::-1])
+    normal = np.array([-np.sin(heading), np.cos(heading)])
+    # a pose a bit to the left of the middle of the edge, rotated by 0.1 rad
+    point = (a + b) / 2 + 0.01 * normal
+    result = projector.project(np.array([[point[0], point[1], heading + 0.1]]))
+    assert result.edge[0] == 0
+    assert np.isclose(result.arc[0], np.linalg.norm(b - a) / 2)
+    assert np.isclose(result.offset[0], 0.01)
+    assert np.isclose(result.heading_error[0], 0.1)
+    # on the right
+    point = (a + b) / 2 - 0.01 * normal
+    result = projector.project(np.array([[point[0], point[1], heading - 0.1 + 2 * np.pi]]))
+    assert np.isclose(result.offset[0], -0.01)
+    assert np.isclose(result.heading_error[0], -0.1)
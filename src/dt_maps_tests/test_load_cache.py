@@ -0,0 +1,73 @@
+import os
+import tempfile
+from unittest import mock
+
+import dt_maps.cache
+from dt_maps import Map
+from dt_maps.cache import LayerCache, default_cache_dir
+
+from . import copy_map, get_asset_path
+
+
+def test_cache_cold_and_warm():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("loop", tmp_dir)
+        cache_home = os.path.join(tmp_dir, "cache")
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+            assert default_cache_dir() == os.path.join(cache_home, "dt-maps")
+            cold = Map.from_disk("loop", map_dir, cache=True)
+            warm = Map.from_disk("loop", map_dir, cache=True)
+        # the cache is kept out of the map
+        assert sorted(os.listdir(map_dir)) == sorted(os.listdir(get_asset_path("maps/loop")))
+        assert len(os.listdir(os.path.join(cache_home, "dt-maps"))) == 3
+        for name, layer in cold.layers.items():
+            assert warm.layers[name].as_raw_dict() == layer.as_raw_dict()
+
+
+def test_cache_warm_does_not_parse():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("loop", tmp_dir)
+        tiles_fpath = os.path.join(map_dir, "tiles.yaml")
+        cache = LayerCache(os.path.join(tmp_dir, "cache"))
+        cache.load(tiles_fpath)
+        # corrupt the cached content, a warm load must return it untouched
+        key = cache._read_key(tiles_fpath)
+        content = cache._read_content(tiles_fpath, key)
+        content["tiles"] = {}
+        cache._write_entry(tiles_fpath, key, content)
+        assert cache.load(tiles_fpath)["tiles"] == {}
+        # untouched files are not even read
+        opened = []
+
+        def _open(fpath, *args, **kwargs):
+            opened.append(fpath)
+            return open(fpath, *args, **kwargs)
+
+        with mock.patch.object(dt_maps.cache, "open", _open, create=True):
+            assert cache.load(tiles_fpath)["tiles"] == {}
+        assert opened and tiles_fpath not in opened
+
+
+def test_cache_header_checked_first():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("loop", tmp_dir)
+        tiles_fpath = os.path.join(map_dir, "tiles.yaml")
+        cache = LayerCache(os.path.join(tmp_dir, "cache"))
+        # an entry for another file is never unpickled
+        os.makedirs(cache.cache_dir)
+        with open(cache.entry_path(tiles_fpath), "wb") as fout:
+            fout.write(b'{"path": "/somewhere/else.yaml"}\n' + b"not a pickle")
+        assert "tiles" in cache.load(tiles_fpath)
+
+
+def test_cache_stale_layer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        map_dir = copy_map("loop", tmp_dir)
+        cache_dir = os.path.join(tmp_dir, "cache")
+        m = Map.from_disk("loop", map_dir, cache=cache_dir)
+        m.layers.tiles["map_0/tile_0_1"].i = 7
+        m.to_disk()
+        m = Map.from_disk("loop", map_dir, cache=cache_dir, workers=2)
+        assert m.layers.tiles["map_0/tile_0_1"].i == 7
+        m = Map.from_disk("loop", map_dir, cache=cache_dir)
+        assert m.layers.tiles["map_0/tile_0_1"].i == 7
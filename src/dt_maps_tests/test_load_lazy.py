@@ -0,0 +1,42 @@
+from dt_maps import Map
+from dt_maps.types.tiles import TileType
+
+from . import get_asset_path
+
+
+def _load_map(lazy: bool = True) -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir, lazy=lazy)
+
+
+def test_lazy_nothing_loaded():
+    m = _load_map()
+    assert m.layers.loaded == []
+    assert len(m.layers) == 8
+    assert m.layers.has("vehicles")
+    assert "vehicles" in m.layers
+
+
+def test_lazy_load_on_access():
+    m = _load_map()
+    assert m.layers.tiles["map_0/tile_0_1"].type == TileType.STRAIGHT
+    assert len(m.get_layer("frames")) == 20
+    assert sorted(m.layers.loaded) == ["frames", "tiles"]
+    assert "vehicles" in m.layers.deferred
+
+
+def test_lazy_same_as_eager():
+    lazy = _load_map()
+    eager = _load_map(lazy=False)
+    assert sorted(lazy.layers) == sorted(eager.layers)
+    for name, layer in eager.layers.items():
+        assert lazy.layers[name].as_raw_dict() == layer.as_raw_dict()
+    assert lazy.layers.deferred == []
+
+
+def test_lazy_custom_layer():
+    map_dir = get_asset_path("maps/custom_layers")
+    m = Map.from_disk("custom_layers", map_dir, lazy=True)
+    assert m.layers.loaded == []
+    assert len(m.layers.people) == 2
+    assert m.layers.loaded == ["people"]
@@ -0,0 +1,35 @@
+from dt_maps import Map
+
+from . import get_asset_path
+
+
+def _load_map(**kwargs) -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir, **kwargs)
+
+
+def _assert_same_map(m1: Map, m2: Map):
+    assert sorted(m1.layers) == sorted(m2.layers)
+    for name, layer in m1.layers.items():
+        assert m2.layers[name].as_raw_dict() == layer.as_raw_dict()
+
+
+def test_parallel_threads():
+    _assert_same_map(_load_map(), _load_map(workers=4))
+
+
+def test_parallel_processes():
+    _assert_same_map(_load_map(), _load_map(workers=2, processes=True))
+
+
+def test_parallel_helpers_registered():
+    m = _load_map(workers=4)
+    assert m.layers.ground_tags["map_0/tag1"].id == 1
+
+
+def test_parallel_invalid_workers():
+    try:
+        _load_map(workers=0)
+        assert False
+    except ValueError:
+        pass
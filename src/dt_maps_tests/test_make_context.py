@@ -0,0 +1,117 @@
+import os
+import tempfile
+import zipfile
+from unittest import mock
+
+import dt_maps.context
+from dt_maps import Map
+
+from . import copy_map, get_asset_path
+
+
+def _load_map_copy(tmp_dir: str) -> Map:
+    map_dir = copy_map("minimal_autolab", tmp_dir)
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def _check_archive(m: Map, fpath: str):
+    with zipfile.ZipFile(fpath) as zf:
+        assert zf.testzip() is None
+        assert len(zf.namelist()) == 9
+        for name in zf.namelist():
+            with open(os.path.join(m._path, name), "rb") as fin:
+                assert zf.read(name) == fin.read()
+
+
+def test_context_members():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.asset("textures/floor.png").write("wb", b"\x89PNG fake image")
+        with open(os.path.join(m._path, "renderer_authentication.json"), "wt") as fout:
+            fout.write("{}")
+        fpath = m.make_context()
+        with zipfile.ZipFile(fpath) as zf:
+            assert zf.testzip() is None
+            names = zf.namelist()
+            assert "tiles.yaml" in names
+            assert "renderer_authentication.json" not in names
+            assert zf.getinfo("assets/textures/floor.png").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("tiles.yaml").compress_type == zipfile.ZIP_DEFLATED
+            assert zf.read("tiles.yaml") == open(os.path.join(m._path, "tiles.yaml"), "rb").read()
+
+
+def test_context_hash():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        _, hash1 = m.make_context(return_hash=True)
+        _, hash2 = m.make_context(return_hash=True)
+        assert hash1 == hash2
+        m.layers.vehicles["map_0/duckiebot1"].color = "red"
+        m.to_disk()
+        _, hash3 = m.make_context(return_hash=True)
+        assert hash3 != hash1
+
+
+def test_context_incremental():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        fpath = os.path.join(tmp_dir, "context.zip")
+        m.make_context(fpath)
+        m.layers.vehicles["map_0/duckiebot1"].color = "red"
+        m.to_disk()
+        m.make_context(fpath)
+        with zipfile.ZipFile(fpath) as zf:
+            assert zf.testzip() is None
+            assert len(zf.namelist()) == 9
+            for name in zf.namelist():
+                assert zf.read(name) == open(os.path.join(m._path, name), "rb").read()
+
+
+def test_context_reuse_compresslevel():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        fpath = os.path.join(tmp_dir, "context.zip")
+        copied = []
+        copy_raw_member = dt_maps.context._copy_raw_member
+
+        def _copy_raw_member(fin, zout, info):
+            copied.append(info.filename)
+            copy_raw_member(fin, zout, info)
+
+        with mock.patch.object(dt_maps.context, "_copy_raw_member", _copy_raw_member):
+            m.make_context(fpath, compresslevel=1)
+            assert copied == []
+            # same level, unchanged members are copied
+            m.make_context(fpath, compresslevel=1)
+            assert len(copied) == 9
+            # a different level compresses everything again
+            copied.clear()
+            m.make_context(fpath, compresslevel=9)
+            assert copied == []
+            # without the zipfile internals, members are compressed again too
+            with mock.patch.object(dt_maps.context, "_can_copy_raw", lambda zout: False):
+                m.make_context(fpath, compresslevel=9)
+            assert copied == []
+        _check_archive(m, fpath)
+
+
+def test_context_reuse_fallback():
+    assert not dt_maps.context._can_copy_raw(object())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        fpath = os.path.join(tmp_dir, "context.zip")
+        m.make_context(fpath)
+        # internals that do not behave as expected fail before anything is written
+        file_header = zipfile.ZipInfo.FileHeader
+        calls = []
+
+        def _file_header(info, *args, **kwargs):
+            calls.append(info.filename)
+            if len(calls) == 1:
+                raise TypeError("FileHeader changed")
+            return file_header(info, *args, **kwargs)
+
+        with mock.patch.object(zipfile.ZipInfo, "FileHeader", _file_header):
+            m.make_context(fpath)
+        assert len(calls) > 1
+        _check_archive(m, fpath)
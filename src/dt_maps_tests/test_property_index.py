@@ -0,0 +1,64 @@
+from dt_maps import Map
+from dt_maps.indices.properties import PropertyIndex, property_index_name
+from dt_maps.types.tiles import TileType
+from dt_maps.types.traffic_signs import TrafficSignType
+from dt_maps.types.vehicles import VehicleType
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def test_property_index_declared():
+    m = _load_map()
+    assert m.layers.tiles.index(property_index_name("type")) is not None
+    assert m.layers.traffic_signs.index(property_index_name("type")) is not None
+    assert m.layers.ground_tags.index(property_index_name("id")) is not None
+    assert m.layers.vehicles.index(property_index_name("configuration")) is not None
+    assert m.layers.watchtowers.index(property_index_name("configuration")) is not None
+
+
+def test_property_index_filter():
+    m = _load_map()
+    curves = m.layers.tiles.filter(type=TileType.CURVE)
+    assert len(curves) == 4
+    assert all(tile.type == TileType.CURVE for tile in curves.values())
+    assert m.layers.tiles.filter(type="curve").keys() == curves.keys()
+    stops = m.layers.traffic_signs.filter(type=TrafficSignType.STOP)
+    assert list(stops.keys()) == ["map_0/sign1"]
+    assert list(m.layers.ground_tags.filter(id=2).keys()) == ["map_0/tag3"]
+    # indexed and non-indexed properties together
+    db19 = m.layers.vehicles.filter("map_0/duckiebot1", configuration=VehicleType.DB19)
+    assert list(db19.keys()) == ["map_0/duckiebot1/duckiebot2"]
+    assert len(m.layers.vehicles.filter(configuration=VehicleType.DB19, color="red")) == 2
+
+
+def test_property_index_sync():
+    m = _load_map()
+    signs = m.layers.traffic_signs
+    index = signs.index(property_index_name("type"))
+    # through the entity helper
+    signs["map_0/sign3"].type = TrafficSignType.STOP
+    assert sorted(index.lookup("stop")) == ["map_0/sign1", "map_0/sign3"]
+    assert "map_0/sign3" not in index.lookup("yield")
+    # through the layer
+    signs.write("map_0/sign1", "type", "yield")
+    assert index.lookup("stop") == ["map_0/sign3"]
+    # adding and removing entities
+    signs["map_0/sign4"] = {"type": "stop", "id": 4, "family": "36h11"}
+    assert sorted(index.lookup(TrafficSignType.STOP)) == ["map_0/sign3", "map_0/sign4"]
+    del signs["map_0/sign3"]
+    assert index.lookup("stop") == ["map_0/sign4"]
+    assert len(signs.filter(type=TrafficSignType.STOP)) == 1
+
+
+def test_property_index_custom():
+    m = _load_map()
+    tags = m.layers.ground_tags
+    tags.add_index(PropertyIndex("size"))
+    assert sorted(tags.filter(size=0.15).keys()) == ["map_0/tag1/tag2", "map_0/tag3"]
+    tags["map_0/tag3"].size = 0.1
+    assert list(tags.filter(size=0.15).keys()) == ["map_0/tag1/tag2"]
@@ -0,0 +1,76 @@
+from dt_maps import Map
+from dt_maps.types.traffic_signs import TrafficSign, TrafficSignType
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def test_query_equal():
+    m = _load_map()
+    results = list(m.layers.traffic_signs.query().where(type=TrafficSignType.STOP))
+    assert [key for key, _ in results] == ["map_0/sign1"]
+    assert isinstance(results[0][1], TrafficSign)
+    assert m.layers.traffic_signs.query().where(type="yield").count() == 2
+
+
+def test_query_select():
+    m = _load_map()
+    query = m.layers.ground_tags.query().isin("id", [1, 2]).select("id", "size")
+    assert sorted(query) == [("map_0/tag1", 1, 0.1), ("map_0/tag3", 2, 0.15)]
+    # projections do not create entity helpers
+    m.layers.ground_tags._cache.clear()
+    list(query)
+    assert len(m.layers.ground_tags._cache) == 0
+
+
+def test_query_range():
+    m = _load_map()
+    frames = m.layers.frames
+    expected = sorted(
+        key for key, frame in frames.as_raw_dict().items()
+        if 0.0 <= frame["pose"].get("x", 0.0) <= 1.0 and "x" in frame["pose"]
+    )
+    assert len(expected) > 0
+    assert sorted(frames.query().between("pose.x", 0.0, 1.0).keys()) == expected
+    assert frames.query().between("pose.x", high=-1e9).count() == 0
+
+
+def test_query_order_limit():
+    m = _load_map()
+    frames = m.layers.frames
+    xs = sorted(
+        frame["pose"]["x"] for frame in frames.as_raw_dict().values() if "x" in frame["pose"]
+    )
+    results = list(frames.query().order_by("pose.x").select("pose.x"))
+    assert [x for _, x in results[:len(xs)]] == xs
+    assert all(x is None for _, x in results[len(xs):])
+    top = list(frames.query().order_by("pose.x", reverse=True).limit(2).select("pose.x"))
+    assert [x for _, x in top] == xs[::-1][:2]
+
+
+def test_query_planner():
+    m = _load_map()
+    query = m.layers.traffic_signs.query().where(type="stop", family="36h11")
+    plan = query.explain()
+    assert plan["index"] == "by_type"
+    assert plan["candidates"] == 1
+    assert plan["filters"] == ["family == '36h11'"]
+    query = m.layers.vehicles.query().below("map_0/duckiebot1").where(configuration="DB19")
+    assert query.explain()["index"] in ("keys", "by_configuration")
+    assert query.keys() == ["map_0/duckiebot1/duckiebot2"]
+    assert m.layers.frames.query().between("pose.x", 0.0).explain()["index"] == "scan"
+
+
+def test_query_filter():
+    m = _load_map()
+    tags = m.layers.ground_tags
+    expected = sorted(key for key, tag in tags.as_raw_dict().items() if tag["id"] % 2 == 0)
+    query = tags.query().filter("id", lambda tag_id: tag_id % 2 == 0)
+    assert sorted(query.keys()) == expected
+    assert query.explain()["filters"] == ["<lambda>(id)"]
+    # missing fields never match
+    assert tags.query().filter("missing", lambda value: True).count() == 0
@@ -0,0 +1,149 @@
+from unittest import mock
+
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.indices.spatial import SpatialIndex
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def _positions(m: Map, layer: str) -> dict:
+    return {
+        key: m.transforms.world(key)[:2, 3] for key in m.get_layer(layer).keys()
+        if key in m.layers.frames
+    }
+
+
+def test_spatial_index_declared():
+    m = _load_map()
+    for layer in ["watchtowers", "traffic_signs", "ground_tags", "citizens", "vehicles"]:
+        assert isinstance(m.get_layer(layer).index(SpatialIndex.name), SpatialIndex)
+
+
+def test_spatial_index_queries():
+    m = _load_map()
+    index = m.layers.watchtowers.index(SpatialIndex.name)
+    positions = _positions(m, "watchtowers")
+    assert len(positions) > 0
+    point = np.array([0.3, 0.4])
+    distances = {k: float(np.linalg.norm(p - point)) for k, p in positions.items()}
+    expected = sorted(distances, key=distances.get)
+    # nearest
+    nearest = index.nearest(point, k=2)
+    assert [k for k, _ in nearest] == expected[:2]
+    assert np.allclose([d for _, d in nearest], [distances[k] for k in expected[:2]])
+    assert len(index.nearest(point, k=100)) == len(positions)
+    # radius
+    radius = sorted(distances.values())[len(distances) // 2]
+    within = index.within(point, radius)
+    assert [k for k, _ in within] == [k for k in expected if distances[k] <= radius]
+    # bounding box
+    low, high = point - 0.5, point + 0.5
+    inside = [k for k, p in positions.items() if np.all(p >= low) and np.all(p <= high)]
+    assert sorted(index.in_bbox(low, high)) == sorted(inside)
+
+
+def test_spatial_index_batched():
+    m = _load_map()
+    index = m.layers.ground_tags.index(SpatialIndex.name)
+    points = np.random.RandomState(0).uniform(-1, 3, (20, 2))
+    keys, distances = index.nearest_many(points, k=2)
+    assert keys.shape == (20, 2) and distances.shape == (20, 2)
+    for point, row_keys, row_distances in zip(points, keys, distances):
+        single = index.nearest(point, k=2)
+        assert list(row_keys) == [k for k, _ in single]
+        assert np.allclose(row_distances, [d for _, d in single])
+    within = index.within_many(points, 1.0)
+    for point, row in zip(points, within):
+        assert row == [k for k, _ in index.within(point, 1.0)]
+    keys, distances = index.nearest_many(points[:1], k=10)
+    assert keys[0, -1] is None and np.isinf(distances[0, -1])
+
+
+def test_spatial_index_batched_grid():
+    m = _load_map()
+    frames = m.layers.frames
+    rng = np.random.RandomState(1)
+    for i, (x, y) in enumerate(rng.uniform(-5, 5, (300, 2))):
+        frames[f"point_{i}"] = {
+            "relative_to": None,
+            "pose": {"x": float(x), "y": float(y), "z": 0.0, "roll": 0.0, "pitch": 0.0, "yaw": 0.0}
+        }
+    # small cells, the batched queries only look at a few of them
+    index = SpatialIndex(cell_size=0.25)
+    frames.add_index(index)
+    keys = list(frames.keys())
+    positions = np.array([index.position(key)[:2] for key in keys])
+    points = rng.uniform(-6, 6, (50, 2))
+    distances = np.linalg.norm(points[:, None, :] - positions[None, :, :], axis=2)
+    nearest_keys, nearest_distances = index.nearest_many(points, k=3)
+    assert np.allclose(nearest_distances, np.sort(distances, axis=1)[:, :3])
+    for row, row_keys in zip(distances, nearest_keys):
+        assert np.allclose(sorted(row[keys.index(k)] for k in row_keys), np.sort(row)[:3])
+    within = index.within_many(points, 0.7)
+    for row, found in zip(distances, within):
+        assert sorted(found) == sorted(k for k, d in zip(keys, row) if d <= 0.7)
+
+
+def test_spatial_index_far_query():
+    m = _load_map()
+    index = SpatialIndex(cell_size=0.05)
+    m.layers.watchtowers.add_index(index)
+    positions = _positions(m, "watchtowers")
+    keys = list(positions.keys())
+    points = np.array([[1e4, 1e4], [-1e4, 0.5], [0.5, -1e4]])
+    distances = np.linalg.norm(
+        points[:, None, :] - np.array([positions[k] for k in keys])[None, :, :], axis=2)
+    # the rings outside the extent of the occupied cells are never visited
+    index.refresh()
+    x0, y0, x1, y1 = index._extent
+    visited = []
+    ring = index._ring
+
+    def _ring(cx, cy, r):
+        cells = list(ring(cx, cy, r))
+        visited.extend(cells)
+        return iter(cells)
+
+    with mock.patch.object(index, "_ring", _ring):
+        for point, row in zip(points, distances):
+            nearest = index.nearest(point, k=2)
+            assert np.allclose([d for _, d in nearest], np.sort(row)[:2])
+        _, nearest_distances = index.nearest_many(points, k=2)
+        assert np.allclose(nearest_distances, np.sort(distances, axis=1)[:, :2])
+    assert visited
+    assert all(x0 <= cx <= x1 and y0 <= cy <= y1 for cx, cy in visited)
+    assert len(visited) <= 6 * (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def test_spatial_index_updates():
+    m = _load_map()
+    frames = m.layers.frames
+    layer = m.layers.watchtowers
+    index = layer.index(SpatialIndex.name)
+    key = next(iter(_positions(m, "watchtowers")))
+    far = np.array([100.0, 100.0])
+    assert index.nearest(far)[0][0] != key or len(layer) == 1
+    # moving the frame of an entity
+    relative_to = frames.read(key, "relative_to")
+    origin = m.transforms.world(relative_to)[:2, 3] if relative_to else np.zeros(2)
+    frames[key].pose.x = float(far[0] - origin[0])
+    frames[key].pose.y = float(far[1] - origin[1])
+    nearest = index.nearest(far)
+    assert nearest[0][0] == key and nearest[0][1] < 1.0
+    # frames relative to the moved one move with it
+    dependents = {k for k in layer.keys() if k in frames and frames.read(k, "relative_to") == key}
+    moved = {k for k, _ in index.within(far, 1.0)}
+    assert moved == {key} | dependents
+    # removing and adding entities
+    raw = layer.as_raw_dict()[key]
+    del layer[key]
+    assert all(k != key for k, _ in index.within(far, 1.0))
+    layer[key] = raw
+    assert {k for k, _ in index.within(far, 1.0)} == moved
@@ -0,0 +1,63 @@
+from dt_maps import Map
+from dt_maps.indices.tiles import TileGridIndex
+from dt_maps.types.tiles import TileType
+from dt_maps.utils.tiles import get_tile
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/loop")
+    return Map.from_disk("loop", map_dir)
+
+
+def test_tile_index_get_tile():
+    m = _load_map()
+    assert m.layers.tiles.index(TileGridIndex.name) is not None
+    assert get_tile(m, 0, 1).key == "map_0/tile_0_1"
+    assert get_tile(m, 2, 2, "map_0").key == "map_0/tile_2_2"
+    assert get_tile(m, 2, 2, "map_1") is None
+    assert get_tile(m, 5, 5) is None
+
+
+def test_tile_index_write():
+    m = _load_map()
+    m.layers.tiles["map_0/tile_1_1"].i = 4
+    assert get_tile(m, 1, 1) is None
+    assert get_tile(m, 4, 1).key == "map_0/tile_1_1"
+    m.layers.tiles["map_0/tile_1_1"]["j"] = 7
+    assert get_tile(m, 4, 7).key == "map_0/tile_1_1"
+
+
+def test_tile_index_insert_remove():
+    m = _load_map()
+    del m.layers.tiles["map_0/tile_0_0"]
+    assert get_tile(m, 0, 0) is None
+    m.layers.tiles["map_0/tile_3_0"] = {"i": 3, "j": 0, "type": "floor"}
+    assert get_tile(m, 3, 0).type == TileType.FLOOR
+
+
+def test_tile_index_grid():
+    m = _load_map()
+    index: TileGridIndex = m.layers.tiles.index(TileGridIndex.name)
+    grid = index.grid("map_0")
+    assert grid.shape == (3, 3)
+    assert grid[0, 1] == "straight"
+    assert grid[1, 1] == "floor"
+    m.layers.tiles["map_0/tile_1_1"].type = TileType.ASPHALT
+    assert index.grid("map_0")[1, 1] == "asphalt"
+
+
+def test_tile_index_overlapping():
+    m = _load_map()
+    index: TileGridIndex = m.layers.tiles.index(TileGridIndex.name)
+    m.layers.tiles["map_0/tile_0_0_copy"] = {"i": 0, "j": 0, "type": "floor"}
+    assert get_tile(m, 0, 0, "map_0").key == "map_0/tile_0_0_copy"
+    assert index.key_grid("map_0")[0, 0] == "map_0/tile_0_0_copy"
+    # the other tile in the same cell is still found
+    del m.layers.tiles["map_0/tile_0_0_copy"]
+    assert get_tile(m, 0, 0, "map_0").key == "map_0/tile_0_0"
+    assert index.key_grid("map_0")[0, 0] == "map_0/tile_0_0"
+    m.layers.tiles["map_0/tile_0_0_copy"] = {"i": 0, "j": 0, "type": "floor"}
+    del m.layers.tiles["map_0/tile_0_0"]
+    assert get_tile(m, 0, 0, "map_0").key == "map_0/tile_0_0_copy"
@@ -0,0 +1,54 @@
+import numpy as np
+
+from dt_maps import Map
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def test_tiles_at_centers():
+    m = _load_map()
+    tiles = m.layers.tiles
+    keys = list(tiles.keys())
+    ij = np.array([[tiles[k].i, tiles[k].j] for k in keys])
+    centers = m.tile_to_world(ij)
+    lookup = m.tiles_at(centers)
+    assert list(lookup.keys) == keys
+    assert np.array_equal(lookup.ij, ij)
+    assert np.allclose(lookup.local, 0.0)
+    # the center of a tile is the origin of its frame
+    for key, center in zip(keys, centers):
+        assert np.allclose(m.transforms.world(key)[:2, 3], center)
+
+
+def test_tiles_at_local_roundtrip():
+    m = _load_map()
+    m.layers.frames["map_0"].pose.yaw = 0.4
+    size = m.layers.tile_maps["map_0"].tile_size.x
+    rng = np.random.RandomState(0)
+    tiles = m.layers.tiles
+    keys = list(tiles.keys())
+    ij = np.array([[tiles[k].i, tiles[k].j] for k in keys])
+    local = rng.uniform(-0.45 * size, 0.45 * size, ij.shape)
+    points = m.tile_to_world(ij, local=local)
+    lookup = m.tiles_at(points)
+    assert list(lookup.keys) == keys
+    assert np.array_equal(lookup.ij, ij)
+    assert np.allclose(lookup.local, local)
+    # tile-local coordinates follow the orientation of the tile
+    for key, point, coords in zip(keys, points, lookup.local):
+        expected = m.transforms.transform_points(point[None], None, key)[0]
+        assert np.allclose(coords, expected)
+
+
+def test_tiles_at_outside():
+    m = _load_map()
+    lookup = m.tiles_at(np.array([[-100.0, -100.0], [100.0, 100.0]]))
+    assert list(lookup.keys) == [None, None]
+    assert np.all(lookup.ij == -1)
+    assert np.all(np.isnan(lookup.local))
+    assert m.tiles_at(np.zeros((0, 2))).keys.shape == (0,)
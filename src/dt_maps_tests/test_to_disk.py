@@ -0,0 +1,109 @@
+import os
+import stat
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from dt_maps import Map
+from dt_maps.utils.files import atomic_open
+
+from . import copy_map, get_asset_path
+
+
+def _load_map_copy(tmp_dir: str) -> Map:
+    map_dir = copy_map("minimal_autolab", tmp_dir)
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def _read(m: Map, fname: str) -> bytes:
+    with open(os.path.join(m._path, fname), "rb") as fin:
+        return fin.read()
+
+
+def test_to_disk_atomic():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        before = _read(m, "vehicles.yaml")
+        # objects that cannot be serialized make the dump fail halfway
+        m.layers.vehicles["map_0/duckiebot9"] = {"configuration": object()}
+        try:
+            m.to_disk()
+            assert False
+        except Exception:
+            pass
+        assert _read(m, "vehicles.yaml") == before
+        expected = os.listdir(get_asset_path("maps/minimal_autolab"))
+        assert sorted(os.listdir(m._path)) == sorted(expected)
+
+
+def test_to_disk_parallel():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.to_disk(force=True, workers=4)
+        expected = Map.from_disk("minimal_autolab", get_asset_path("maps/minimal_autolab"))
+        m = Map.from_disk("minimal_autolab", m._path)
+        for name, layer in expected.layers.items():
+            assert m.layers[name].as_raw_dict() == layer.as_raw_dict()
+
+
+def test_to_disk_canonical():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.to_disk(force=True, canonical=True)
+        before = {f: _read(m, f) for f in ["frames.yaml", "tiles.yaml"]}
+        # same content, different insertion order
+        for name in ["frames", "tiles"]:
+            layer = m.layers.get(name)
+            items = list(layer.as_raw_dict().items())
+            layer.clear()
+            for key, value in reversed(items):
+                layer[key] = dict(reversed(list(value.items())))
+        m.to_disk(canonical=True, workers=2)
+        for fname, content in before.items():
+            assert _read(m, fname) == content
+
+
+def test_to_disk_canonical_json():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        m.set_layer_format("tiles", ".json")
+        m.to_disk(canonical=True)
+        content = _read(m, "tiles.json")
+        assert content.startswith(b'{\n  "tiles": {\n    "map_0/tile_0_0": {\n')
+
+
+def test_to_disk_keeps_permissions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map_copy(tmp_dir)
+        fpath = os.path.join(m._path, "vehicles.yaml")
+        os.chmod(fpath, 0o644)
+        m.to_disk(force=True)
+        assert stat.S_IMODE(os.stat(fpath).st_mode) == 0o644
+        # new files get the default permissions
+        umask = os.umask(0o022)
+        try:
+            new_fpath = os.path.join(m._path, "new.txt")
+            with atomic_open(new_fpath) as fout:
+                fout.write(b"new")
+            assert stat.S_IMODE(os.stat(new_fpath).st_mode) == 0o644
+        finally:
+            os.umask(umask)
+
+
+def test_atomic_open_parallel_umask():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        umask = os.umask(0o022)
+        try:
+            def write(i):
+                with atomic_open(os.path.join(tmp_dir, f"file_{i}.txt")) as fout:
+                    fout.write(b"content")
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(write, range(64)))
+            # the umask of the process is never changed
+            assert os.umask(0o022) == 0o022
+            for i in range(64):
+                fpath = os.path.join(tmp_dir, f"file_{i}.txt")
+                assert stat.S_IMODE(os.stat(fpath).st_mode) == 0o644
+            assert sorted(os.listdir(tmp_dir)) == sorted(f"file_{i}.txt" for i in range(64))
+        finally:
+            os.umask(umask)
@@ -0,0 +1,133 @@
+import os
+import tempfile
+
+import numpy as np
+
+from dt_maps import Map
+from dt_maps.transforms import pose_to_matrix, matrix_to_pose, invert_transform
+
+from . import get_asset_path
+
+
+def _load_map() -> Map:
+    map_dir = get_asset_path("maps/minimal_autolab")
+    return Map.from_disk("minimal_autolab", map_dir)
+
+
+def _world_by_hand(m: Map, key: str) -> np.ndarray:
+    T = np.eye(4)
+    while key is not None:
+        raw = m.layers.frames.as_raw_dict()[key]
+        pose = raw.get("pose", None) or {}
+        T = pose_to_matrix(**{k: float(v) for k, v in pose.items()}) @ T
+        key = raw.get("relative_to", None)
+    return T
+
+
+def test_pose_matrix_roundtrip():
+    pose = {"x": 1.0, "y": -2.0, "z": 0.5, "roll": 0.1, "pitch": -0.2, "yaw": 2.5}
+    T = pose_to_matrix(**pose)
+    assert np.allclose(T[:3, :3] @ T[:3, :3].T, np.eye(3))
+    assert np.allclose(list(matrix_to_pose(T).values()), list(pose.values()))
+    assert np.allclose(invert_transform(T) @ T, np.eye(4))
+
+
+def test_transforms_world():
+    m = _load_map()
+    for key in m.layers.frames.keys():
+        assert np.allclose(m.transforms.world(key), _world_by_hand(m, key))
+    # tiles are placed at the center of their cell
+    tile = "map_0/tile_1_2"
+    size = m.layers.tile_maps["map_0"].tile_size
+    origin = m.transforms.world("map_0")[:3, 3]
+    position = m.transforms.world(tile)[:3, 3]
+    assert np.allclose(position[:2] - origin[:2], [1.5 * size.x, 2.5 * size.y])
+
+
+def test_transforms_between_frames():
+    m = _load_map()
+    keys = list(m.layers.frames.keys())
+    a, b = keys[1], keys[-1]
+    T_ab = m.transforms.transform(a, b)
+    expected = np.linalg.inv(_world_by_hand(m, b)) @ _world_by_hand(m, a)
+    assert np.allclose(T_ab, expected)
+    assert np.allclose(m.transforms.transform(a, None), m.transforms.world(a))
+    assert np.allclose(m.transforms.transform(a, a), np.eye(4))
+
+
+def test_transforms_invalidation():
+    m = _load_map()
+    frames = m.layers.frames
+    tile = "map_0/tile_1_2"
+    before = m.transforms.world(tile).copy()
+    cache = m.transforms.cache
+    assert tile in cache._world and "map_0" in cache._world
+    other = [k for k in frames.keys() if frames.read(k, "relative_to") is None and k != "map_0"]
+    for key in other:
+        m.transforms.world(key)
+    # moving the map moves the tiles but not the frames not relative to it
+    frames["map_0"].pose.x = float(frames.as_raw_dict()["map_0"]["pose"].get("x", 0.0)) + 1.0
+    assert tile not in cache._world
+    assert all(key in cache._world for key in other)
+    after = m.transforms.world(tile)
+    assert np.allclose(after[:3, 3] - before[:3, 3], [1.0, 0.0, 0.0])
+    # changing what a frame is relative to
+    frames[tile].relative_to = None
+    assert np.allclose(m.transforms.world(tile), m.transforms.local(tile))
+    frames["map_0"].pose.x = 5.0
+    assert np.allclose(m.transforms.world(tile), m.transforms.local(tile))
+
+
+def test_transforms_snapshot():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map()
+        tile = "map_0/tile_1_2"
+        expected = m.transforms.world(tile).copy()
+        m.export_frames_snapshot(os.path.join(tmp_dir, "frames.npy"))
+        m.load_frames_snapshot(os.path.join(tmp_dir, "frames.npy"))
+        assert np.allclose(m.transforms.world(tile), expected)
+        m.layers.frames["map_0"].pose.x += 1.0
+        assert np.allclose(m.transforms.world(tile)[0, 3], expected[0, 3] + 1.0)
+
+
+def test_transforms_batched():
+    m = _load_map()
+    keys = list(m.layers.frames.keys())
+    poses = m.transforms.local_poses()
+    assert poses.shape == (len(keys), 6)
+    W = m.transforms.world_matrices()
+    assert W.shape == (len(keys), 4, 4)
+    for key, T in zip(keys, W):
+        assert np.allclose(T, _world_by_hand(m, key))
+    assert np.allclose(m.transforms.world_positions(keys[:2]), W[:2, :3, 3])
+    assert m.transforms.world_matrices([]).shape == (0, 4, 4)
+    # the batched and single-frame APIs share the cache
+    m.layers.frames["map_0"].pose.yaw = 0.3
+    for key, T in zip(keys, m.transforms.world_matrices(keys[::-1])[::-1]):
+        assert np.allclose(T, _world_by_hand(m, key))
+        assert np.allclose(T, m.transforms.world(key))
+
+
+def test_transforms_points():
+    m = _load_map()
+    m.layers.frames["map_0"].pose.yaw = 0.7
+    tile = "map_0/tile_1_2"
+    points = np.random.RandomState(0).uniform(-1, 1, (10, 3))
+    world = m.transforms.transform_points(points, tile, None)
+    T = m.transforms.world(tile)
+    assert np.allclose(world, (T[:3, :3] @ points.T).T + T[:3, 3])
+    back = m.transforms.transform_points(world, None, tile)
+    assert np.allclose(back, points)
+    planar = m.transforms.transform_points(points[:, :2], tile, "map_0")
+    assert planar.shape == (10, 2)
+
+
+def test_transforms_batched_snapshot():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        m = _load_map()
+        expected = m.transforms.world_matrices().copy()
+        poses = m.transforms.local_poses()
+        m.export_frames_snapshot(os.path.join(tmp_dir, "frames.npy"))
+        m.load_frames_snapshot(os.path.join(tmp_dir, "frames.npy"))
+        assert np.allclose(m.transforms.local_poses(), poses)
+        assert np.allclose(m.transforms.world_matrices(), expected)